@@ -0,0 +1,76 @@
+# Builds the yolo_model dataset from every source dataset in DATA_DIR in a single pass.
+# Replaces running create_new_data_yaml.py, update_labels.py, update_images.py and random_split.py in sequence.
+# Rebuilds are incremental against yolo_model/.manifest.json; pass --full to rewrite everything.
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.pipeline_utils import run_pipeline
+from utils.file_utils import MATERIALIZE_MODES
+from utils.split_utils import SPLIT_MODES
+from utils.dedup_utils import DEDUP_MODES, MAX_DISTANCE
+
+load_dotenv()
+data_dir = os.getenv('DATA_DIR')
+model_dir = os.getenv('MODEL_DIR')
+link_mode = os.getenv('LINK_MODE', 'copy')
+split_mode = os.getenv('SPLIT_MODE', 'copy')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Merge, remap and split the source datasets into the yolo model directory.')
+    parser.add_argument('--data-dir', default=data_dir, help='Root directory of the source datasets (default: DATA_DIR)')
+    parser.add_argument('--model-dir', default=model_dir, help='Output yolo model directory (default: MODEL_DIR)')
+    parser.add_argument('--train-pct', type=float, default=0.80)
+    parser.add_argument('--valid-pct', type=float, default=0.15)
+    parser.add_argument('--seed', type=int, default=123)
+    parser.add_argument('--keep-splits', action='store_true', help="Keep each source dataset's own train/valid/test split")
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: all cores)')
+    parser.add_argument('--full', action='store_true', help='Ignore the build manifest and rewrite every output')
+    parser.add_argument('--link-mode', choices=MATERIALIZE_MODES, default=link_mode,
+                        help='How images are placed in the model directory; falls back to copy if unsupported (default: LINK_MODE or copy)')
+    parser.add_argument('--split-mode', choices=SPLIT_MODES, default=split_mode,
+                        help="'virtual' writes train/val/test list files instead of split directories (default: SPLIT_MODE or copy)")
+    parser.add_argument('--dedup', choices=DEDUP_MODES, default=None,
+                        help="Near-duplicate handling: 'group' keeps each cluster in one split, 'collapse' keeps one image per cluster")
+    parser.add_argument('--dedup-distance', type=int, default=MAX_DISTANCE,
+                        help=f'Maximum perceptual hash distance of near-duplicates (default: {MAX_DISTANCE})')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    summary = run_pipeline(
+        args.data_dir,
+        args.model_dir,
+        train_pct=args.train_pct,
+        valid_pct=args.valid_pct,
+        seed=args.seed,
+        keep_source_splits=args.keep_splits,
+        workers=args.workers,
+        full_rebuild=args.full,
+        link_mode=args.link_mode,
+        split_mode=args.split_mode,
+        dedup=args.dedup,
+        dedup_distance=args.dedup_distance
+    )
+    print(f"Scanned {summary['scanned']} images, skipped {summary['duplicates']} duplicates.")
+    if summary['quarantined']:
+        print(f"Skipped {summary['quarantined']} images that were quarantined.")
+    if args.dedup:
+        action = 'kept in one split' if args.dedup == 'group' else 'dropped'
+        print(f"Found {summary['near_duplicates']} near-duplicate images ({action}).")
+    print(f"Wrote {summary['written']} files, {summary['skipped']} up to date, deleted {summary['deleted']} stale outputs.")
+    if summary['dropped_boxes']:
+        print(f"Dropped {summary['dropped_boxes']} boxes whose class is not in the model data.yaml.")
+    if summary['fallback_copies']:
+        print(f"{summary['fallback_copies']} images were copied because {args.link_mode} is not supported there.")
+    print(f"Placed {summary['train']} train, {summary['valid']} valid and {summary['test']} test images in {args.model_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# Prints and saves class counts, box size distributions, boxes per image and per-class split coverage
+# for the model dataset. Results are cached in yolo_model/.stats_cache and only changed label files are re-read.
+
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.stats_utils import compute_dataset_stats, plot_stats
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compute per-class and per-split statistics of the model dataset.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--output', default=None, help='Output directory for stats.json and plots (default: stats/ next to the yaml)')
+    parser.add_argument('--plots', action='store_true', help='Also write PNG plots (needs matplotlib)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--refresh', action='store_true', help='Recompute even if no label file changed')
+    args = parser.parse_args()
+
+    output_dir = args.output or os.path.join(os.path.dirname(os.path.abspath(args.yaml)), 'stats')
+    stats = compute_dataset_stats(args.yaml, workers=args.workers, refresh=args.refresh)
+
+    os.makedirs(output_dir, exist_ok=True)
+    stats_path = os.path.join(output_dir, 'stats.json')
+    with open(stats_path, 'w') as file:
+        json.dump(stats, file, indent=2)
+
+    for split_name, split in stats['splits'].items():
+        print(f"{split_name}: {split['images']} images, {split['boxes']} boxes, {split['background_images']} background images")
+
+    by_boxes = sorted(stats['classes'], key=lambda cls: cls['boxes'])
+    print('Rarest classes: ' + ', '.join(f"{cls['name']} ({cls['boxes']})" for cls in by_boxes[:10]))
+    missing = [cls for cls in stats['classes'] if cls['missing_from']]
+    for cls in missing:
+        print(f"Class '{cls['name']}' has no images in {', '.join(cls['missing_from'])}")
+
+    print(f"Stats written to {stats_path}")
+    for plot_path in plot_stats(stats, output_dir) if args.plots else []:
+        print(f"Plot written to {plot_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Finds near-duplicate images in the model dataset by perceptual hash and reports clusters that
+# span more than one split, which leak training images into validation and inflate mAP.
+# --collapse quarantines all but one image of every cluster. To keep clusters in a single split
+# instead, rebuild with `build_dataset.py --dedup group`.
+
+import os
+import sys
+import json
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.dedup_utils import hash_images, find_duplicate_clusters, collapse_clusters, cluster_report, MAX_DISTANCE
+from utils.images_util import quarantine_image
+from utils.manifest_utils import record_quarantined
+from utils.split_utils import resolve_split_images, remove_from_split_lists
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report or collapse near-duplicate images in the model dataset.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--max-distance', type=int, default=MAX_DISTANCE,
+                        help=f'Maximum perceptual hash distance of near-duplicates (default: {MAX_DISTANCE})')
+    parser.add_argument('--report', default=None, help='JSON report path (default: dedup_report.json next to the yaml)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--collapse', action='store_true', help='Quarantine all but the first image of every cluster')
+    args = parser.parse_args()
+
+    root_dir = os.path.dirname(os.path.abspath(args.yaml))
+    split_of = {path: split_name for split_name, paths in resolve_split_images(args.yaml).items() for path in paths}
+    image_paths = sorted(path for path in split_of if os.path.exists(path))
+
+    hashes = hash_images(image_paths, workers=args.workers)
+    clusters = find_duplicate_clusters(hashes, max_distance=args.max_distance)
+    report = cluster_report(image_paths, clusters, split_of)
+
+    report_path = args.report or os.path.join(root_dir, 'dedup_report.json')
+    with open(report_path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    summary = report['summary']
+    print(f"Found {summary['clusters']} near-duplicate clusters with {summary['duplicate_images']} redundant images "
+          f"in {summary['images']} images; {summary['cross_split_clusters']} clusters span more than one split.")
+    print(f"Report written to {report_path}")
+
+    if args.collapse:
+        dropped = [image_paths[index] for index in collapse_clusters(clusters)]
+        for image_path in dropped:
+            quarantine_image(image_path, root_dir)
+        remove_from_split_lists(args.yaml, dropped)
+        record_quarantined(root_dir, dropped, 'near-duplicate')
+        print(f"Quarantined {len(dropped)} near-duplicate images.")
+
+
+if __name__ == '__main__':
+    main()
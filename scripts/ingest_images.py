@@ -0,0 +1,94 @@
+# Verifies that every image referenced by the model data.yaml decodes before training starts.
+# Headers and pixels are decoded on a thread pool (PIL releases the GIL while decoding), dimensions and
+# EXIF orientation are cached in yolo_model/.image_meta.json, and undecodable images are quarantined.
+
+import os
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.images_util import inspect_image, fix_exif_orientation, quarantine_image, load_image_meta, save_image_meta
+from utils.manifest_utils import file_signature, record_quarantined
+from utils.split_utils import resolve_split_images, remove_from_split_lists
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+
+
+def ingest_images(yaml_file: str, workers: int = None, full_decode: bool = True, fix_orientation: bool = False) -> dict:
+    """
+    Inspect every image of every split, reusing cached metadata for images whose size and mtime are unchanged.
+
+    Args:
+        yaml_file (str): Path to the model data.yaml.
+        workers (int, optional): Number of decode threads. Defaults to ThreadPoolExecutor's default.
+        full_decode (bool, optional): Decode all pixels rather than only verifying the structure. Defaults to True.
+        fix_orientation (bool, optional): Rewrite images with a non-upright EXIF orientation. Defaults to False.
+
+    Returns:
+        dict: Counts of 'checked', 'cached', 'quarantined' and 'reoriented' images.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    image_paths = sorted({path for paths in resolve_split_images(yaml_file).values() for path in paths})
+
+    cached_meta = load_image_meta(root_dir)
+    image_meta = {}
+    to_check = []
+    for image_path in image_paths:
+        if not os.path.exists(image_path):
+            continue
+        image_rel = os.path.relpath(image_path, root_dir)
+        size, mtime_ns = file_signature(image_path)
+        cached = cached_meta.get(image_rel)
+        if cached is not None and cached['size'] == size and cached['mtime_ns'] == mtime_ns:
+            image_meta[image_rel] = cached
+        else:
+            to_check.append((image_path, image_rel, size, mtime_ns))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lambda task: inspect_image(task[0], full_decode), to_check)
+        checked = list(zip(to_check, results))
+
+    quarantined = []
+    reoriented = 0
+    for (image_path, image_rel, size, mtime_ns), meta in checked:
+        if not meta['ok']:
+            dest = quarantine_image(image_path, root_dir)
+            print(f"Quarantined {image_rel} -> {dest}: {meta['error']}")
+            quarantined.append(image_path)
+            continue
+
+        if fix_orientation and meta['orientation'] not in (None, 1):
+            meta['width'], meta['height'] = fix_exif_orientation(image_path)
+            meta['orientation'] = 1
+            size, mtime_ns = file_signature(image_path)
+            reoriented += 1
+        image_meta[image_rel] = {'size': size, 'mtime_ns': mtime_ns, **{key: meta[key] for key in ['width', 'height', 'format', 'orientation']}}
+
+    if quarantined:
+        remove_from_split_lists(yaml_file, quarantined)
+        record_quarantined(root_dir, quarantined, 'undecodable')
+    save_image_meta(root_dir, image_meta)
+
+    return {'checked': len(to_check), 'cached': len(image_paths) - len(to_check),
+            'quarantined': len(quarantined), 'reoriented': reoriented}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify, measure and quarantine the images of the model dataset.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of decode threads')
+    parser.add_argument('--headers-only', action='store_true', help='Only verify file structure instead of decoding every pixel')
+    parser.add_argument('--fix-orientation', action='store_true', help='Rewrite images whose EXIF orientation is not upright')
+    args = parser.parse_args()
+
+    summary = ingest_images(args.yaml, workers=args.workers, full_decode=not args.headers_only, fix_orientation=args.fix_orientation)
+    print(f"Checked {summary['checked']} images ({summary['cached']} unchanged since the last run), "
+          f"quarantined {summary['quarantined']}, reoriented {summary['reoriented']}.")
+
+
+if __name__ == '__main__':
+    main()
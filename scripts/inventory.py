@@ -0,0 +1,12 @@
+# Prints what's in the pantry right now from the materialized stock table, and optionally per-class
+# rollups of items added and removed per hour, day or month. Same as `python -m smart_pantry stock`.
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from smart_pantry.cli import main
+
+if __name__ == '__main__':
+    main(['stock', *sys.argv[1:]])
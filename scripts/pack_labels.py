@@ -0,0 +1,57 @@
+# Packs the YOLO txt labels of every split in the model data.yaml into one memory-mapped label store per split,
+# or unpacks the stores back into txt label files.
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.images_util import convert_imgpath_to_labelpath
+from utils.split_utils import resolve_split_images
+from utils.label_store_utils import pack_labels, save_label_store, load_label_store, unpack_label_store, LABEL_STORE_DIR
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+
+
+def pack_splits(yaml_file: str, workers: int = None) -> None:
+    """
+    Pack the labels of every split in a data.yaml into <model_dir>/label_store/<split>.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    for split_name, image_paths in resolve_split_images(yaml_file).items():
+        label_files = [convert_imgpath_to_labelpath(image_path) for image_path in image_paths]
+        store = pack_labels(label_files, root_dir, workers=workers)
+        store_dir = os.path.join(root_dir, LABEL_STORE_DIR, split_name)
+        save_label_store(store, store_dir)
+        print(f"Packed {len(store['names'])} label files with {len(store['classes'])} boxes into {store_dir}")
+
+
+def unpack_splits(yaml_file: str, output_dir: str) -> None:
+    """
+    Write every split's label store back out as txt label files under output_dir.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    store_root = os.path.join(root_dir, LABEL_STORE_DIR)
+    for split_name in sorted(os.listdir(store_root)):
+        count = unpack_label_store(load_label_store(os.path.join(store_root, split_name)), output_dir)
+        print(f"Unpacked {count} label files of {split_name} into {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack YOLO txt labels into memory-mapped label stores, or unpack them.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--unpack', metavar='OUTPUT_DIR', default=None, help='Unpack the stores into txt label files under OUTPUT_DIR')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.unpack:
+        unpack_splits(args.yaml, args.unpack)
+    else:
+        pack_splits(args.yaml, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,47 +1,35 @@
-# This script does a random split of the img_files and label files in train, test and valid folders of the yolo_model directory
+# This script splits the img_files and label files in train, test and valid folders of the yolo_model directory
+# using a stable hash of each image's source ID, so adding images never reshuffles existing ones
 
 import os
 import sys
 from typing import List, Tuple
-import random
 
 from dotenv import load_dotenv
-import shutil
 from pprint import pprint
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.images_util import get_image_label_pairs
 from utils.directories_util import create_split_dirs
+from utils.split_utils import stratified_hash_split, write_split_lists, POOL_DIR
+from utils.stats_utils import load_labels_cached, store_image_classes
+from utils.yaml_utils import update_yaml_split_paths
+from utils.file_utils import materialize_file
 
 load_dotenv()
 model_dir = os.getenv('MODEL_DIR')
+link_mode = os.getenv('LINK_MODE', 'copy')  # copy, hardlink, reflink or symlink
+split_mode = os.getenv('SPLIT_MODE', 'copy')  # copy or virtual
 
 
 
 
 
-def split_dataset(data: List[Tuple[str, str]], train_pct: float, valid_pct: float, seed: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]:
+def copy_files(data: List[Tuple[str, str]], split_dir: str, link_mode: str = 'copy'):
     """
-    Split the dataset into train, validation, and test sets based on the given percentages.
-    Returns: 
-        Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]: Tuple of Lists to each path for each split set
-    """
-    random.seed(seed)
-    random.shuffle(data)
-    
-    train_end = int(train_pct * len(data))
-    valid_end = int(valid_pct * len(data)) + train_end
-    
-    train_data = data[:train_end]
-    valid_data = data[train_end:valid_end]
-    test_data = data[valid_end:]
-    
-    return train_data, valid_data, test_data
-
-def copy_files(data: List[Tuple[str, str]], split_dir: str):
-    """
-    Copy image and label files to the appropriate split directory.
+    Copy or link image and label files to the appropriate split directory.
+    link_mode is one of 'copy', 'hardlink', 'reflink' or 'symlink' and falls back to copy when unsupported.
     """
     add_count = 0
     skipped_count = 0
@@ -51,9 +39,9 @@ def copy_files(data: List[Tuple[str, str]], split_dir: str):
         
         if image_path != image_dest:
             try:
-                # Copy file to destination
-                shutil.copy(image_path, image_dest)
-                shutil.copy(label_path, label_dest)
+                # Copy or link file to destination
+                materialize_file(image_path, image_dest, link_mode)
+                materialize_file(label_path, label_dest, link_mode)
                 print(f"Copied: {label_path} to {label_dest}")
             except FileNotFoundError as e:
                 print(f"Error copying file {label_path}: {e}")
@@ -65,8 +53,58 @@ def copy_files(data: List[Tuple[str, str]], split_dir: str):
     print(f'Added {add_count} files. in {split_dir} Directory')
     print(f'Skipped {skipped_count} files. in {split_dir} Directory')
 
+def get_pooled_image_label_pairs(model_dir: str) -> List[Tuple[str, str]]:
+    """
+    Collect every image/label pair in the model directory once, whichever split directory it sits in.
+    Copies left in several splits by earlier copy-mode runs are only kept once, by file name.
+    """
+    pairs = []
+    seen_names = set()
+    for split_name in ['train', 'valid', 'test', POOL_DIR]:
+        images_dir = os.path.join(model_dir, split_name, 'images')
+        if not os.path.isdir(images_dir):
+            continue
+        for image_path, label_path in get_image_label_pairs(images_dir):
+            image_name = os.path.basename(image_path)
+            if image_name not in seen_names:
+                seen_names.add(image_name)
+                pairs.append((image_path, label_path))
+    return pairs
+
+def load_image_classes(image_label_pairs: List[Tuple[str, str]], model_dir: str) -> List[List[int]]:
+    """
+    Get the classes of every image from the stats cache, so only label files changed since the last run are read.
+    Stops with a message naming the malformed label file, leaving the current split as it is.
+    """
+    try:
+        store = load_labels_cached([label_path for _, label_path in image_label_pairs], model_dir, 'pool')
+    except ValueError as e:
+        sys.exit(f"Malformed label file, split not changed: {e}\n"
+                 f"Run scripts/validate_yolo.py to list every problem, fix or remove those files, then split again.")
+    return store_image_classes(store)
+
+def virtual_split(model_dir: str):
+    """
+    Split without copying: write train/val/test image lists and point data.yaml at them.
+    """
+    image_label_pairs = get_pooled_image_label_pairs(model_dir)
+
+    image_classes = load_image_classes(image_label_pairs, model_dir)
+    train_data, valid_data, test_data = stratified_hash_split(image_label_pairs, image_classes, train_pct=0.80, valid_pct=0.15, seed=123)
+
+    list_files = write_split_lists(model_dir, {
+        'train': [image_path for image_path, _ in train_data],
+        'valid': [image_path for image_path, _ in valid_data],
+        'test': [image_path for image_path, _ in test_data]
+    })
+    update_yaml_split_paths(os.path.join(model_dir, 'data.yaml'), list_files)
+    print(f'Wrote {len(train_data)} train, {len(valid_data)} valid and {len(test_data)} test images to {list_files}')
+
 def main():
     model_dir = 'yolo_model'
+    if split_mode == 'virtual':
+        virtual_split(model_dir)
+        return
     images_dir = os.path.join(model_dir, 'train', 'images')
     labels_dir = os.path.join(model_dir, 'train', 'labels')
     
@@ -74,11 +112,12 @@ def main():
     
     image_label_pairs = get_image_label_pairs(images_dir)
     
-    train_data, valid_data, test_data = split_dataset(image_label_pairs, train_pct=0.80, valid_pct=0.15, seed=123)
+    image_classes = load_image_classes(image_label_pairs, model_dir)
+    train_data, valid_data, test_data = stratified_hash_split(image_label_pairs, image_classes, train_pct=0.80, valid_pct=0.15, seed=123)
     
-    copy_files(train_data, os.path.join(model_dir, 'train'))
-    copy_files(valid_data, os.path.join(model_dir, 'valid'))
-    copy_files(test_data, os.path.join(model_dir, 'test'))
+    copy_files(train_data, os.path.join(model_dir, 'train'), link_mode)
+    copy_files(valid_data, os.path.join(model_dir, 'valid'), link_mode)
+    copy_files(test_data, os.path.join(model_dir, 'test'), link_mode)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
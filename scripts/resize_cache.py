@@ -0,0 +1,34 @@
+# Writes a copy of the model dataset with every image already resized to the training imgsz, so the
+# dataloader no longer decodes full-size Roboflow exports and resizes them again in every epoch.
+# Point training at it with USE_RESIZE_CACHE=1 in .env.yolo (see yolo_train/model.py).
+
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.resize_cache_utils import build_resize_cache
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+imgsz = int(os.getenv('IMGSZ', 640))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the pre-resized image cache for one training imgsz.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--imgsz', type=int, default=imgsz, help='Training image size (default: IMGSZ or 640)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes')
+    parser.add_argument('--full', action='store_true', help='Resize every image instead of only new or changed ones')
+    args = parser.parse_args()
+
+    summary = build_resize_cache(args.yaml, imgsz=args.imgsz, workers=args.workers, full_rebuild=args.full)
+    print(f"Cached {summary['images']} images at imgsz {args.imgsz}: {summary['resized']} resized, "
+          f"{summary['skipped']} unchanged, {summary['deleted']} stale files deleted.")
+    print(f"Train with {summary['yaml']}")
+
+
+if __name__ == '__main__':
+    main()
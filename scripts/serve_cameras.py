@@ -0,0 +1,17 @@
+# Runs one YOLO model over several camera or video sources at once, batching their frames
+# into a single predict call per tick under a latency budget.
+#
+#   python scripts/serve_cameras.py 0 1 pantry_left.mp4 --batch 8 --latency-ms 30
+#
+# Sources default to CAMERA_SOURCES (comma separated) in .env; a bare number is a camera index.
+# Same as `python -m smart_pantry serve`.
+
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from smart_pantry.cli import main
+
+if __name__ == '__main__':
+    main(['serve', *sys.argv[1:]])
@@ -1,6 +1,7 @@
 import yaml
 import os
 import sys
+import numpy as np
 from dotenv import load_dotenv
 import shutil
 from pprint import pprint
@@ -10,6 +11,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.directories_util import *
 from utils.yaml_utils import *
 from utils.label_utils import *
+from utils.label_store_utils import pack_labels, remap_label_store, unpack_label_store
+from utils.scan_utils import index_data_dir
 
 load_dotenv()
 
@@ -26,47 +29,40 @@ def get_label_file_paths(data_dir: str, split_dirs: List[str] = ['train', 'test'
         data_dir (str): The root data directory.
         split_dirs (List[str], optional): A list of directory names to filter by. Defaults to ['train', 'test', 'valid'].
     """
-    top_level_dirs = list_subdirectories(data_dir)
-    print(f'Top Level Directories: \n {top_level_dirs}')
+    data_index = index_data_dir(data_dir, with_stats=False)
+    print(f'Top Level Directories: \n {[dataset["dir"] for dataset in data_index.values()]}')
     
-    for dir in top_level_dirs:
+    for dataset in data_index.values():
         # Load YAML data from old and new locations
-        yaml_filepath = os.path.join(dir, 'data.yaml')
-        directory = dir.split('/')[-1]
+        yaml_filepath = dataset['yaml']
         
-        if not os.path.exists(yaml_filepath):
-            print(f"Skipping directory {dir}: 'data.yaml' not found.")
+        if yaml_filepath is None:
+            print(f"Skipping directory {dataset['dir']}: 'data.yaml' not found.")
             continue
         
-        # Create the label mapping
-        lbl_mapping = create_label_mapping(get_yaml_data(yaml_filepath), get_yaml_data(model_yaml_path))
+        # Create the label mapping and its lookup table
+        old_classes = get_yaml_data(yaml_filepath)
+        lbl_mapping = create_label_mapping(old_classes, get_yaml_data(model_yaml_path))
+        lbl_lut = build_class_lut(lbl_mapping, len(old_classes))
         
-        # Loop through subdirectories ('train', 'test', 'valid')
-        split_dirs = list_subdirectories(dir)
-        for split_dir in split_dirs:
-            split_name = split_dir.split('/')[-1]  # Get the directory name (train, test, or valid)
-
-            if split_name not in ['train', 'test', 'valid']:
+        # Loop through the 'train', 'test' and 'valid' splits present in the dataset
+        for split_name, split in dataset['splits'].items():
+            if split_name not in split_dirs:
                 continue
 
-            # Loop through labels directory
-            label_dirs = list_subdirectories(split_dir)[1]  # Gets only the labels directory (index 1)
-            print(f'Label Directories: {label_dirs}')
+            label_dir = split['labels_dir']
+            print(f'Label Directory: {label_dir}')
             
-            for file in os.listdir(label_dirs):
-                filepath = os.path.join(label_dirs, file)
-                
-                # Update the label file using the label mapping
-                txt_file = update_yolo_label_file(filepath, lbl_mapping)
-                
-                # Set the output directory based on the split_name
-                output_dir = os.path.join(model_dir, split_name, 'labels')
-                
-                if not os.path.exists(output_dir):
-                    os.makedirs(output_dir)
+            # Read every label file of the split into one array and remap all classes in one pass
+            label_files = [os.path.join(label_dir, label_file) for label_file, _ in split['labels'].values()]
+            store = pack_labels(label_files, label_dir, box_dtype=np.float64)
+            remapped, dropped = remap_label_store(store, lbl_lut)
+            for old_class_idx, count in dropped.items():
+                print(f"Dropped {count} boxes of class '{old_classes.get(old_class_idx, old_class_idx)}' not found in label mapping.")
 
-                output_filepath = os.path.join(output_dir, file)
-                write_label_files(txt_file, output_filepath)
+            # Set the output directory based on the split_name
+            output_dir = os.path.join(model_dir, split_name, 'labels')
+            unpack_label_store(remapped, output_dir)
 
 def main():
     get_label_file_paths(data_dir, ['train', 'test', 'valid'])
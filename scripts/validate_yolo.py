@@ -1,72 +1,246 @@
+# Validates every YOLO label file referenced by the model data.yaml and writes a JSON and CSV report.
+# Exits with status 1 when errors are found, so training can be gated on it.
+
 import os
+import sys
+import csv
+import json
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple
+
+import yaml
 import numpy as np
+from dotenv import load_dotenv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.label_utils import read_label_array
+from utils.images_util import convert_imgpath_to_labelpath
+from utils.split_utils import resolve_split_images
+
+load_dotenv()
+model_dir = os.getenv('MODEL_DIR', 'yolo_model')
+
+# Severity of every check. Errors fail validation, warnings only do with --strict
+CHECKS = {
+    'unreadable_file': 'error',
+    'invalid_format': 'error',
+    'class_out_of_range': 'error',
+    'non_finite_value': 'error',
+    'coords_out_of_range': 'error',
+    'degenerate_box': 'error',
+    'orphan_label': 'error',
+    'box_exceeds_image': 'warning',
+    'duplicate_row': 'warning',
+    'empty_file': 'warning',
+    'missing_label': 'warning',
+}
+
+CHUNK_SIZE = 256
+EDGE_TOLERANCE = 1e-6
 
-def check_labels(directory, num_classes):
+
+def make_issue(label_file: str, check: str, rows: List[int] = None, detail: str = '', split: str = '') -> Dict:
+    return {'split': split, 'file': label_file, 'check': check, 'severity': CHECKS[check], 'rows': rows or [], 'detail': detail}
+
+
+def check_labels(label_files: List[str], num_classes: int) -> Tuple[List[Dict], int]:
     """
-    Function to check for inappropriate data in YOLO label files.
-    
-    Parameters:
-        directory (str): Directory containing the label files (train, valid, or test).
+    Check a chunk of YOLO label files for inappropriate data. All boxes of the chunk are stacked
+    into one array so every check runs once per chunk instead of once per row.
+
+    Args:
+        label_files (List[str]): Label files to check.
         num_classes (int): Number of classes in the dataset.
+
+    Returns:
+        Tuple[List[Dict], int]: The issues found and the number of boxes checked.
     """
-    errors_found = False
-    label_files = [f for f in os.listdir(directory) if f.endswith('.txt')]
-    
-    for label_file in label_files:
-        file_path = os.path.join(directory, label_file)
-        
+    issues = []
+    arrays = []
+    owners = []
+    for file_index, label_file in enumerate(label_files):
         try:
-            # Check if the file is empty
-            if os.path.getsize(file_path) == 0:
-                print(f"Error: Empty label file found - {file_path}")
-                errors_found = True
-                continue
-            
-            # Load the label file
-            labels = np.loadtxt(file_path, ndmin=2)
-            
-            for label in labels:
-                # Check if the label has 5 elements (class index, x_center, y_center, width, height)
-                if len(label) != 5:
-                    print(f"Error: Invalid label format in file - {file_path}")
-                    errors_found = True
-                    continue
-                
-                class_index, x_center, y_center, width, height = label
-                
-                # Check if class index is within the valid range
-                if not (0 <= class_index < num_classes):
-                    print(f"Error: Class index out of bounds in file - {file_path}. Found {class_index}, but should be in range [0, {num_classes - 1}]")
-                    errors_found = True
-                
-                # Check if bounding box coordinates are within the valid range (0 to 1)
-                if not (0 <= x_center <= 1) or not (0 <= y_center <= 1) or not (0 <= width <= 1) or not (0 <= height <= 1):
-                    print(f"Error: Bounding box coordinates out of range in file - {file_path}. Found ({x_center}, {y_center}, {width}, {height})")
-                    errors_found = True
-
-                # Check for NaN or Inf values
-                if np.isnan(label).any() or np.isinf(label).any():
-                    print(f"Error: NaN or Inf value found in file - {file_path}")
-                    errors_found = True
-        
-        except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
-            errors_found = True
-    
-    if not errors_found:
-        print(f"No errors found in {directory}.")
+            labels = read_label_array(label_file)
+        except OSError as e:
+            issues.append(make_issue(label_file, 'unreadable_file', detail=str(e)))
+            continue
+        except ValueError as e:
+            issues.append(make_issue(label_file, 'invalid_format', detail=str(e)))
+            continue
+
+        if len(labels) == 0:
+            issues.append(make_issue(label_file, 'empty_file'))
+            continue
+        arrays.append(labels)
+        owners.append(np.full(len(labels), file_index))
+
+    if not arrays:
+        return issues, 0
+
+    labels = np.concatenate(arrays)
+    owner = np.concatenate(owners)
+    row = np.concatenate([np.arange(len(array)) + 1 for array in arrays])
+    cls, xywh = labels[:, 0], labels[:, 1:]
+    finite = np.isfinite(labels).all(axis=1)
+
+    with np.errstate(invalid='ignore'):
+        masks = {
+            'non_finite_value': ~finite,
+            'class_out_of_range': finite & ((cls < 0) | (cls >= num_classes) | (cls != np.round(cls))),
+            'coords_out_of_range': finite & ((xywh < 0) | (xywh > 1)).any(axis=1),
+            'degenerate_box': finite & ((xywh[:, 2] <= 0) | (xywh[:, 3] <= 0)),
+            'box_exceeds_image': finite & (
+                (xywh[:, 0] - xywh[:, 2] / 2 < -EDGE_TOLERANCE) | (xywh[:, 0] + xywh[:, 2] / 2 > 1 + EDGE_TOLERANCE) |
+                (xywh[:, 1] - xywh[:, 3] / 2 < -EDGE_TOLERANCE) | (xywh[:, 1] + xywh[:, 3] / 2 > 1 + EDGE_TOLERANCE)),
+        }
+
+    # Duplicate rows: sort by (file, values) and compare each row with its predecessor
+    keyed = np.column_stack([owner, labels])
+    order = np.lexsort(keyed.T[::-1])
+    same_as_previous = np.zeros(len(keyed), dtype=bool)
+    same_as_previous[order[1:]] = (keyed[order[1:]] == keyed[order[:-1]]).all(axis=1)
+    masks['duplicate_row'] = same_as_previous
+
+    for check, mask in masks.items():
+        bad = np.flatnonzero(mask)
+        if len(bad) == 0:
+            continue
+        bad_owners = owner[bad]
+        for file_index in np.unique(bad_owners):
+            file_rows = row[bad[bad_owners == file_index]].tolist()
+            issues.append(make_issue(label_files[file_index], check, rows=file_rows))
+
+    return issues, len(labels)
+
+
+def check_pairs(split_images: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], List[Dict]]:
+    """
+    Check that every image has a label and every label in the split label directories has an image.
+
+    Args:
+        split_images (Dict[str, List[str]]): Image paths per split.
+
+    Returns:
+        Tuple[Dict[str, List[str]], List[Dict]]: The existing label files per split and the pairing issues.
+    """
+    issues = []
+    split_labels = {}
+    label_dir_split = {}
+    image_stems = {}
+    for split_name, image_paths in split_images.items():
+        split_labels[split_name] = []
+        for image_path in image_paths:
+            label_path = convert_imgpath_to_labelpath(image_path)
+            label_dir = os.path.dirname(label_path)
+            label_dir_split.setdefault(label_dir, split_name)
+            image_stems.setdefault(label_dir, set()).add(os.path.splitext(os.path.basename(image_path))[0])
+            if os.path.exists(label_path):
+                split_labels[split_name].append(label_path)
+            else:
+                issues.append(make_issue(label_path, 'missing_label', detail=f'No label for {image_path}', split=split_name))
+
+    for label_dir, split_name in sorted(label_dir_split.items()):
+        if not os.path.isdir(label_dir):
+            continue
+        images_dir = os.path.join(os.path.dirname(label_dir), 'images')
+        existing_images = {os.path.splitext(name)[0] for name in os.listdir(images_dir)} if os.path.isdir(images_dir) else set()
+        for name in sorted(os.listdir(label_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext == '.txt' and stem not in existing_images and stem not in image_stems[label_dir]:
+                issues.append(make_issue(os.path.join(label_dir, name), 'orphan_label', detail='No image for label', split=split_name))
+
+    return split_labels, issues
+
+
+def write_report(report: Dict, json_path: str) -> str:
+    """
+    Write the report as JSON and its issues as CSV next to it.
+
+    Returns:
+        str: Path to the CSV report.
+    """
+    with open(json_path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    csv_path = os.path.splitext(json_path)[0] + '.csv'
+    with open(csv_path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['split', 'file', 'check', 'severity', 'rows', 'detail'])
+        for issue in report['issues']:
+            writer.writerow([issue['split'], issue['file'], issue['check'], issue['severity'],
+                             ' '.join(map(str, issue['rows'])), issue['detail']])
+    return csv_path
+
+
+def validate_dataset(yaml_file: str, workers: int = None) -> Dict:
+    """
+    Validate every label file of every split in a data.yaml.
+
+    Args:
+        yaml_file (str): Path to the model data.yaml. The class count is read from its 'nc'.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        Dict: The report with a 'summary' and a list of 'issues'.
+    """
+    with open(yaml_file, 'r') as file:
+        num_classes = int(yaml.safe_load(file)['nc'])
+
+    split_images = resolve_split_images(yaml_file)
+    split_labels, pair_issues = check_pairs(split_images)
+    split_of = {label: split_name for split_name, labels in split_labels.items() for label in labels}
+
+    issues = list(pair_issues)
+
+    label_files = sorted(split_of)
+    chunks = [label_files[i:i + CHUNK_SIZE] for i in range(0, len(label_files), CHUNK_SIZE)]
+    n_boxes = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_issues, chunk_boxes in executor.map(check_labels, chunks, [num_classes] * len(chunks)):
+            n_boxes += chunk_boxes
+            issues.extend({**issue, 'split': split_of[issue['file']]} for issue in chunk_issues)
+
+    by_check = Counter(issue['check'] for issue in issues)
+    summary = {
+        'yaml': yaml_file,
+        'num_classes': num_classes,
+        'images': {split_name: len(images) for split_name, images in split_images.items()},
+        'label_files': len(label_files),
+        'boxes': n_boxes,
+        'errors': sum(1 for issue in issues if issue['severity'] == 'error'),
+        'warnings': sum(1 for issue in issues if issue['severity'] == 'warning'),
+        'by_check': dict(by_check)
+    }
+    return {'summary': summary, 'issues': issues}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Validate the YOLO labels referenced by a data.yaml.')
+    parser.add_argument('--yaml', default=os.path.join(model_dir, 'data.yaml'), help='Model data.yaml (default: MODEL_DIR/data.yaml)')
+    parser.add_argument('--report', default=None, help='JSON report path (default: validation_report.json next to the yaml)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--strict', action='store_true', help='Fail on warnings as well as errors')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report_path = args.report or os.path.join(os.path.dirname(os.path.abspath(args.yaml)), 'validation_report.json')
+
+    report = validate_dataset(args.yaml, workers=args.workers)
+    csv_path = write_report(report, report_path)
+
+    summary = report['summary']
+    print(f"Checked {summary['label_files']} label files with {summary['boxes']} boxes: "
+          f"{summary['errors']} errors, {summary['warnings']} warnings {summary['by_check']}")
+    print(f"Report written to {report_path} and {csv_path}")
+
+    failed = summary['errors'] > 0 or (args.strict and summary['warnings'] > 0)
+    sys.exit(1 if failed else 0)
+
 
 if __name__ == "__main__":
-    # Replace these paths with your actual dataset directories
-    directories = [
-        "/Users/laffer/Desktop/smart_pantry_model/yolo_model/train/labels",
-        "/Users/laffer/Desktop/smart_pantry_model/yolo_model/test/labels", 
-        "/Users/laffer/Desktop/smart_pantry_model/yolo_model/valid/labels"]
-    num_classes = 109  #
-    
-    for directory in directories:
-        if os.path.exists(directory):
-            print(f"Checking labels in directory: {directory}")
-            check_labels(directory, num_classes)
-        else:
-            print(f"Directory not found: {directory}")
+    main()
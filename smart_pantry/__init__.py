@@ -0,0 +1,17 @@
+# Smart pantry inference: one implementation of the per-frame path (read, detect, extract, track, confirm
+# events, annotate, store) shared by the CLI (python -m smart_pantry) and the scripts in scripts/.
+
+from smart_pantry.annotate import draw_detections, draw_zones
+from smart_pantry.batching import BatchInferenceServer, read_source
+from smart_pantry.detections import Detections
+from smart_pantry.events import EventConfirmer, zone_events
+from smart_pantry.inventory import run_inventory, post_event
+from smart_pantry.model_server import RemoteModel, connect_model, run_model_server
+from smart_pantry.models import load_model, prepare_model, warm_up, register_model, resolve_model, model_format
+from smart_pantry.motion import MotionGate
+from smart_pantry.pipeline import run_video_pipeline
+from smart_pantry.settings import load_settings
+from smart_pantry.sources import open_source, parse_source, FrameSource, VideoSource, ImageSource
+from smart_pantry.store import TransactionWriter, connect, current_stock, rollups
+from smart_pantry.tracking import Tracker
+from smart_pantry.zones import ZoneMap, load_zone_map
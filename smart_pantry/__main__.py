@@ -0,0 +1,3 @@
+from smart_pantry.cli import main
+
+main()
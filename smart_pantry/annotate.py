@@ -0,0 +1,54 @@
+# Drawing detections, zones and tripwires on frames. All coordinates are converted to integer pixels in
+# one array operation per frame; only the cv2 drawing calls run per box.
+
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+from smart_pantry.detections import Detections
+from smart_pantry.zones import ZoneMap
+
+BOX_COLOR = (0, 255, 0)
+ZONE_COLOR = (255, 160, 0)
+TRIPWIRE_COLOR = (0, 0, 255)
+
+
+def draw_detections(frame: np.ndarray, detections: Detections, color: Tuple[int, int, int] = BOX_COLOR) -> np.ndarray:
+    """
+    Draw bounding boxes and labels on the frame.
+
+    Args:
+        frame (np.ndarray): The frame on which to draw the detections.
+        detections (Detections): The detections to draw. Tracked detections get their track ID in the label.
+        color (Tuple[int, int, int], optional): BGR box and label color. Defaults to green.
+
+    Returns:
+        np.ndarray: The annotated frame with bounding boxes and labels.
+    """
+    if not len(detections):
+        return frame
+    boxes = detections.xyxy.astype(np.int32).tolist()
+    track_ids = detections.track_id.tolist() if detections.track_id is not None else [0] * len(detections)
+    for (x1, y1, x2, y2), confidence, name, track_id in zip(boxes, detections.confidence.tolist(), detections.class_names, track_ids):
+        label = f"{name} #{track_id}: {confidence:.2f}" if track_id else f"{name}: {confidence:.2f}"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 2)
+    return frame
+
+
+def draw_zones(frame: np.ndarray, zone_map: ZoneMap) -> np.ndarray:
+    """
+    Draw zone outlines with their names, and tripwires, on the frame.
+    """
+    height, width = frame.shape[:2]
+    scale = np.array([width, height], dtype=np.float64)
+    for zone in zone_map.zones:
+        polygon = np.round(np.asarray(zone['polygon'], dtype=np.float64) * scale).astype(np.int32)
+        cv2.polylines(frame, [polygon], True, ZONE_COLOR, 1)
+        x, y = polygon.min(axis=0).tolist()
+        cv2.putText(frame, str(zone['name']), (x + 5, y + 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, ZONE_COLOR, 1)
+    for wire, (start, end) in zip(zone_map.tripwires, np.round(zone_map.wire_points * scale).astype(np.int32).tolist()):
+        cv2.line(frame, tuple(start), tuple(end), TRIPWIRE_COLOR, 2)
+        cv2.putText(frame, str(wire['name']), (start[0] + 5, start[1] + 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, TRIPWIRE_COLOR, 1)
+    return frame
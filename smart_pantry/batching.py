@@ -0,0 +1,181 @@
+# Batched inference for several camera or video sources sharing one YOLO model.
+#
+# Source threads submit frames to a BatchInferenceServer. The server thread waits for the first frame,
+# keeps gathering frames until the batch is full or the latency budget since that first frame is spent,
+# then runs a single model.predict on the whole batch and hands every source its own results. The
+# per-call overhead of predict (pre/post-processing setup, model dispatch) is paid once per batch
+# instead of once per frame of every camera.
+#
+# An exception from predict or a result callback is stored and aborts the server: submit stops waiting
+# for queue space, the source threads stop reading, and stop() re-raises the error.
+
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from smart_pantry.sources import open_source
+
+# Default batch limits: at most MAX_BATCH frames, and no frame waits more than MAX_LATENCY_MS for its batch to fill
+MAX_BATCH = 8
+MAX_LATENCY_MS = 30
+
+# How often a submit waiting for queue space checks whether the server was aborted
+POLL_SECONDS = 0.1
+
+
+class BatchInferenceServer:
+    """
+    Long-running batched inference over frames submitted by any number of sources.
+
+    Args:
+        model: A loaded Ultralytics YOLO model.
+        max_batch (int, optional): Maximum number of frames per predict call. Defaults to 8.
+        max_latency_ms (float, optional): Longest time the first frame of a batch waits for more
+            frames before the batch is run anyway. Defaults to 30.
+        predict_kwargs (Dict, optional): Extra keyword arguments for model.predict, e.g. imgsz or conf.
+        queue_size (int, optional): Maximum number of pending frames; submit blocks when it is full,
+            applying back-pressure to the sources. Defaults to 4 * max_batch.
+    """
+
+    def __init__(self, model, max_batch: int = MAX_BATCH, max_latency_ms: float = MAX_LATENCY_MS,
+                 predict_kwargs: Optional[Dict] = None, queue_size: Optional[int] = None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.predict_kwargs = {'verbose': False, **(predict_kwargs or {})}
+        self.pending = queue.Queue(maxsize=queue_size or 4 * max_batch)
+        self.callbacks = {}
+        self.stats = {'batches': 0, 'frames': 0, 'predict_seconds': 0.0, 'wait_seconds': 0.0}
+        self.aborted = threading.Event()
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, source_id: str, callback: Callable[[str, Any, Dict], None]) -> None:
+        """
+        Register a source. callback(source_id, result, meta) is called from the server thread with the
+        Ultralytics result of every frame the source submits and the meta it was submitted with.
+        """
+        self.callbacks[source_id] = callback
+
+    def submit(self, source_id: str, frame: np.ndarray, meta: Optional[Dict] = None) -> bool:
+        """
+        Queue a frame for the next batch. Blocks while the queue is full.
+
+        Returns:
+            bool: False if the frame was not queued because the server was aborted by an error.
+        """
+        item = (source_id, frame, {'submitted': time.perf_counter(), **(meta or {})})
+        while not self.aborted.is_set():
+            try:
+                self.pending.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def start(self) -> 'BatchInferenceServer':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='batch-inference', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the server after the batch in progress, then run whatever frames are still queued.
+        Re-raises the error that aborted the server, if any.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._error is not None:
+            raise self._error
+        while not self.pending.empty():
+            self.run_batch(self.gather_batch(block=False))
+
+    def gather_batch(self, block: bool = True) -> List:
+        """
+        Wait for a first frame, then gather more until the batch is full or the latency budget is spent.
+        """
+        try:
+            first = self.pending.get(timeout=0.1) if block else self.pending.get_nowait()
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run_batch(self, batch: List) -> None:
+        """
+        Run one predict call on a batch and dispatch every result to its source.
+        """
+        if not batch:
+            return
+        started = time.perf_counter()
+        results = self.model.predict(source=[frame for _, frame, _ in batch], **self.predict_kwargs)
+        finished = time.perf_counter()
+
+        self.stats['batches'] += 1
+        self.stats['frames'] += len(batch)
+        self.stats['predict_seconds'] += finished - started
+        self.stats['wait_seconds'] += sum(started - meta['submitted'] for _, _, meta in batch)
+
+        for (source_id, _, meta), result in zip(batch, results):
+            callback = self.callbacks.get(source_id)
+            if callback is not None:
+                callback(source_id, result, {**meta, 'latency': finished - meta['submitted'], 'batch_size': len(batch)})
+
+    def run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                self.run_batch(self.gather_batch())
+        except BaseException as error:
+            self._error = error
+            self.aborted.set()
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get throughput statistics: frames, batches, mean batch size, predict time per frame and mean queueing delay.
+        """
+        frames = max(self.stats['frames'], 1)
+        return {
+            'frames': self.stats['frames'],
+            'batches': self.stats['batches'],
+            'mean_batch_size': self.stats['frames'] / max(self.stats['batches'], 1),
+            'predict_ms_per_frame': 1000 * self.stats['predict_seconds'] / frames,
+            'mean_wait_ms': 1000 * self.stats['wait_seconds'] / frames,
+        }
+
+
+def read_source(server: BatchInferenceServer, source_id: str, source: Union[int, str], stop: threading.Event,
+                realtime: bool = False) -> int:
+    """
+    Read frames from one source and submit them to the server until it ends, stop is set or the server is aborted.
+
+    Args:
+        server (BatchInferenceServer): The server to submit frames to.
+        source_id (str): Name results are dispatched under.
+        source (Union[int, str]): Camera index, video file, stream URL or image directory (see open_source).
+        stop (threading.Event): Set to stop reading.
+        realtime (bool, optional): Pace file sources at their native FPS, like a live camera. Defaults to False.
+
+    Returns:
+        int: The number of frames submitted.
+    """
+    frame_index = 0
+    with open_source(source, realtime) as frames:
+        for frame in frames:
+            if stop.is_set() or not server.submit(source_id, frame, {'frame_index': frame_index}):
+                break
+            frame_index += 1
+    return frame_index
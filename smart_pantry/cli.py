@@ -0,0 +1,328 @@
+# Command line entry point shared by every inference script:
+#
+#   python -m smart_pantry image [PATH]          detect on an image or a directory of images
+#   python -m smart_pantry video [SOURCE]        pipelined detection over a video, camera or stream
+#   python -m smart_pantry track [SOURCE]        track items and post zone/tripwire transactions to SQLite
+#   python -m smart_pantry serve [SOURCE ...]    batched detection over several sources at once
+#   python -m smart_pantry bench [SOURCE]        time every step of the per-frame hot path
+#   python -m smart_pantry stock                 print current stock and movement rollups
+#   python -m smart_pantry model-server [MODEL ...]  keep warmed-up models resident for the other commands
+#
+# Defaults come from .env (see smart_pantry.settings); --model takes a registered name or a path.
+# Models are warmed up right after loading, or taken from the model server with --server.
+
+import os
+import time
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import cv2
+
+from smart_pantry.annotate import draw_detections
+from smart_pantry.batching import BatchInferenceServer, read_source, MAX_BATCH, MAX_LATENCY_MS
+from smart_pantry.detections import Detections
+from smart_pantry.events import EventConfirmer, zone_events
+from smart_pantry.inventory import run_inventory, post_event
+from smart_pantry.model_server import DEFAULT_ADDRESS, connect_model, run_model_server
+from smart_pantry.models import prepare_model
+from smart_pantry.motion import MotionGate
+from smart_pantry.pipeline import run_video_pipeline, QUEUE_POLICIES, QUEUE_SIZE
+from smart_pantry.settings import load_settings
+from smart_pantry.sources import open_source, source_list
+from smart_pantry.store import TransactionWriter, connect, current_stock, rollups, ROLLUP_PERIODS
+from smart_pantry.tracking import Tracker
+from smart_pantry.zones import load_zone_map
+
+
+def get_model(args: argparse.Namespace, batch: int = 1):
+    """
+    Get the command's model from the model server when one answers, otherwise load and warm it up in this process.
+    """
+    if args.server:
+        model = connect_model(args.server, args.model, imgsz=args.imgsz, batch=batch)
+        if model is not None:
+            print(f"Using {args.model} from the model server at {args.server}")
+            return model
+        print(f"Model server at {args.server} unavailable, loading {args.model} here")
+    return prepare_model(args.model, imgsz=args.imgsz, batch=batch, warmup=not args.skip_warmup)
+
+
+def motion_gate(args: argparse.Namespace, settings: Dict) -> Optional[MotionGate]:
+    return MotionGate(idle_interval=settings['idle_interval']) if args.motion_gate else None
+
+
+def cmd_image(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Detect on one image or every image of a directory, print the detections and show or save the annotated images.
+    """
+    model = get_model(args)
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+    with open_source(args.path) as images:
+        for index, image in enumerate(images):
+            result = model.predict(source=image, imgsz=args.imgsz, verbose=False)[0]
+            detections = Detections.from_result(result, args.conf)
+            print(f'Predictions: {detections.to_predictions()}')
+            annotated_image = draw_detections(image, detections)
+            if args.save:
+                cv2.imwrite(os.path.join(args.save, f'{index:06d}.jpg'), annotated_image)
+            if args.show:
+                cv2.imshow('YOLO Predictions', annotated_image)
+                if cv2.waitKey(0) & 0xFF == ord('q'):
+                    break
+    if args.show:
+        cv2.destroyAllWindows()
+
+
+def cmd_video(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Run detection over a source with pipelined capture, inference, annotation and encoding.
+    """
+    stats = run_video_pipeline(get_model(args, args.batch), args.source, output_path=args.output, show=not args.headless,
+                               policy=args.policy, queue_size=args.queue_size, max_batch=args.batch, min_confidence=args.conf,
+                               predict_kwargs={'imgsz': args.imgsz}, gate=motion_gate(args, settings))
+
+    print(f"Wrote {stats['frames']} frames at {stats['fps']:.1f} FPS. Dropped frames: {stats['dropped']}")
+    for stage in ['capture', 'inference', 'annotate', 'encode']:
+        stage_stats = stats[stage]
+        print(f"  {stage}: {stage_stats['items']} frames, {stage_stats['busy_seconds']:.1f}s busy")
+    if 'gate' in stats:
+        print(f"Motion gate ran detection on {stats['gate']['detections']} of {stats['gate']['frames']} frames.")
+
+
+def cmd_track(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Track items and write confirmed zone and tripwire movements to the inventory database.
+    """
+    logging.basicConfig(filename='object_movement_and_inventory.log', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    model = get_model(args)
+    with TransactionWriter(args.db) as writer:
+        stats = run_inventory(model, args.source, post_event(writer), zone_map=load_zone_map(args.zones),
+                              confirmer=EventConfirmer(min_confidence=args.event_conf), gate=motion_gate(args, settings),
+                              min_confidence=args.conf, output_path=args.output, show=not args.headless,
+                              predict_kwargs={'imgsz': args.imgsz})
+    summary = writer.summary()
+    print(f"Processed {stats['frames']} frames ({stats['detected_frames']} detected) at {stats['fps']:.1f} FPS.")
+    print(f"Confirmed {stats['events']['events']} events from {stats['events']['candidates']} candidate changes; "
+          f"wrote {summary['transactions']} transactions in {summary['flushes']} batches.")
+    logging.info(f"Wrote {summary['transactions']} transactions in {summary['flushes']} batches.")
+    if 'gate' in stats:
+        print(f"Motion gate ran detection on {stats['gate']['detections']} of {stats['gate']['frames']} frames.")
+
+
+def cmd_serve(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Run one model over several sources, batching their frames into one predict call per tick.
+    """
+    sources = args.sources or source_list(settings['camera_sources'])
+    if not sources:
+        raise ValueError('No sources given. Pass them as arguments or set CAMERA_SOURCES.')
+
+    server = BatchInferenceServer(get_model(args, args.batch), max_batch=args.batch, max_latency_ms=args.latency_ms,
+                                  predict_kwargs={'imgsz': args.imgsz, 'conf': args.conf})
+    frame_counts = defaultdict(int)
+    class_counts = defaultdict(lambda: defaultdict(int))
+
+    def on_result(source_id, result, meta):
+        frame_counts[source_id] += 1
+        for name in Detections.from_result(result, args.conf).class_names:
+            class_counts[source_id][name] += 1
+
+    stop = threading.Event()
+    readers = []
+    for index, source in enumerate(sources):
+        source_id = f'{index}:{source}'
+        server.register(source_id, on_result)
+        readers.append(threading.Thread(target=read_source, args=(server, source_id, source, stop, args.realtime), daemon=True))
+
+    started = time.perf_counter()
+    server.start()
+    for reader in readers:
+        reader.start()
+    try:
+        for reader in readers:
+            reader.join()
+    except KeyboardInterrupt:
+        stop.set()
+    # Re-raises the error if predict or a callback failed; the readers stopped submitting when it happened
+    server.stop()
+    elapsed = time.perf_counter() - started
+
+    summary = server.summary()
+    print(f"Processed {summary['frames']} frames in {summary['batches']} batches "
+          f"(mean batch {summary['mean_batch_size']:.1f}) in {elapsed:.1f}s: {summary['frames'] / elapsed:.1f} FPS, "
+          f"{summary['predict_ms_per_frame']:.1f} ms predict per frame, {summary['mean_wait_ms']:.1f} ms mean queueing delay.")
+    for source_id in sorted(frame_counts):
+        top = sorted(class_counts[source_id].items(), key=lambda item: -item[1])[:5]
+        print(f"{source_id}: {frame_counts[source_id]} frames, top detections {top}")
+
+
+def cmd_bench(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Run the per-frame hot path sequentially and print the time to the first detection and the mean time of every step.
+    """
+    started = time.perf_counter()
+    model = get_model(args)
+    zone_map = load_zone_map(args.zones)
+    tracker, confirmer = Tracker(), EventConfirmer()
+    timings = defaultdict(float)
+    frame_count = 0
+
+    with open_source(args.source) as frames:
+        clock = time.perf_counter()
+        while frame_count < args.frames + args.warmup:
+            frame = frames.read()
+            if frame is None:
+                break
+            steps = {'decode': time.perf_counter()}
+            result = model.predict(source=frame, imgsz=args.imgsz, verbose=False)[0]
+            steps['predict'] = time.perf_counter()
+            if frame_count == 0:
+                print(f"First detection {steps['predict'] - started:.2f}s after start, model loading included")
+            detections = Detections.from_result(result, args.conf)
+            steps['extract'] = time.perf_counter()
+            tracker.track(detections)
+            steps['track'] = time.perf_counter()
+            zone_events(confirmer, zone_map, detections, frame.shape[1], frame.shape[0], frame_count / frames.fps)
+            steps['events'] = time.perf_counter()
+            draw_detections(frame, detections)
+            steps['annotate'] = time.perf_counter()
+
+            # The first frames include model initialization and are not counted
+            if frame_count >= args.warmup:
+                for step, finished in steps.items():
+                    timings[step] += finished - clock
+                    clock = finished
+            clock = time.perf_counter()
+            frame_count += 1
+
+    measured = max(frame_count - args.warmup, 0)
+    if not measured:
+        print(f"Source ended after {frame_count} frames; nothing measured.")
+        return
+    total = sum(timings.values())
+    print(f"{measured} frames, {1000 * total / measured:.2f} ms per frame ({measured / total:.1f} FPS)")
+    for step, seconds in timings.items():
+        print(f"  {step}: {1000 * seconds / measured:.3f} ms ({100 * seconds / total:.1f}%)")
+
+
+def cmd_stock(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Print current stock per class and optional movement rollups.
+    """
+    conn = connect(args.db)
+    stock = current_stock(conn, in_stock_only=not args.all)
+    print(f"{len(stock)} classes in stock" if not args.all else f"{len(stock)} classes")
+    for class_id, quantity in stock.items():
+        print(f"  {class_id}: {quantity}")
+
+    if args.rollup:
+        print(f"\nPer {args.rollup}: added / removed / net")
+        for bucket, class_id, added, removed, net in rollups(conn, args.rollup, args.since, args.class_id):
+            print(f"  {bucket}  {class_id}: +{added} / -{removed} / {net:+d}")
+    conn.close()
+
+
+def cmd_model_server(args: argparse.Namespace, settings: Dict) -> None:
+    """
+    Load and warm up models and keep them resident for the other commands.
+    """
+    run_model_server(args.address, args.models or [settings['model']], imgsz=args.imgsz, batch=args.batch,
+                     allow_remote=args.allow_remote)
+
+
+def build_parser(settings: Dict) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m smart_pantry', description='Smart pantry inference.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_model_args(command: argparse.ArgumentParser, conf: float) -> None:
+        command.add_argument('--model', default=settings['model'], help="Registered model name (best, ncnn, onnx) or path (default: MODEL or 'best')")
+        command.add_argument('--conf', type=float, default=conf, help=f'Minimum detection confidence (default: {conf})')
+        command.add_argument('--imgsz', type=int, default=settings['imgsz'], help='Inference size (default: IMGSZ or 640)')
+        command.add_argument('--server', default=settings['model_server'],
+                             help='Model server address to take the model from, host:port or a socket path (default: MODEL_SERVER)')
+        command.add_argument('--skip-warmup', action='store_true', help='Do not run dummy predictions after loading the model')
+
+    def add_display_args(command: argparse.ArgumentParser) -> None:
+        command.add_argument('--output', default=settings['output'], help='Annotated video to write (default: OUTPUT_VIDEO_PATH)')
+        command.add_argument('--headless', action='store_true', default=settings['headless'], help='Do not display frames (default: HEADLESS=1)')
+
+    image = commands.add_parser('image', help='Detect on an image or a directory of images')
+    image.add_argument('path', nargs='?', default=settings['image'], help='Image or directory (default: TEST_IMAGE_PATH)')
+    add_model_args(image, 0.25)
+    image.add_argument('--save', default=None, help='Directory to write annotated images to')
+    image.add_argument('--show', action='store_true', help='Display every annotated image; any key shows the next, q stops')
+    image.set_defaults(run=cmd_image)
+
+    video = commands.add_parser('video', help='Pipelined detection over a video, camera or stream')
+    video.add_argument('source', nargs='?', default=settings['video'], help='Video, camera index, stream URL or image directory (default: TEST_VIDEO_PATH)')
+    add_model_args(video, 0.60)
+    add_display_args(video)
+    video.add_argument('--policy', choices=QUEUE_POLICIES, default=settings['queue_policy'],
+                       help="'block' keeps every frame, 'drop_oldest' drops stale frames when inference falls behind (default: QUEUE_POLICY or block)")
+    video.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    video.add_argument('--batch', type=int, default=4, help='Maximum frames per predict call')
+    video.add_argument('--motion-gate', action=argparse.BooleanOptionalAction, default=bool(settings['motion_gate']),
+                       help='Only run detection on moving frames, and every IDLE_INTERVAL-th frame while idle (default: MOTION_GATE=1)')
+    video.set_defaults(run=cmd_video)
+
+    track = commands.add_parser('track', help='Track items and post zone/tripwire transactions')
+    track.add_argument('source', nargs='?', default=settings['video'], help='Video, camera index, stream URL or image directory (default: TEST_VIDEO_PATH)')
+    add_model_args(track, 0.5)
+    add_display_args(track)
+    track.add_argument('--event-conf', type=float, default=0.75, help="Minimum aggregated track confidence for a transaction (default: 0.75)")
+    track.add_argument('--db', default=settings['db'], help='Inventory database (default: INVENTORY_DB_PATH)')
+    track.add_argument('--zones', default=settings['zones'], help='Zones config (default: ZONES_CONFIG or config/zones.yaml)')
+    track.add_argument('--motion-gate', action=argparse.BooleanOptionalAction, default=settings['motion_gate'] is not False,
+                       help='Skip detection on frames where nothing moved (default: on unless MOTION_GATE=0)')
+    track.set_defaults(run=cmd_track)
+
+    serve = commands.add_parser('serve', help='Batched detection over several sources')
+    serve.add_argument('sources', nargs='*', help='Camera indices, video files or stream URLs (default: CAMERA_SOURCES)')
+    add_model_args(serve, 0.60)
+    serve.add_argument('--batch', type=int, default=MAX_BATCH, help=f'Maximum frames per predict call (default: {MAX_BATCH})')
+    serve.add_argument('--latency-ms', type=float, default=MAX_LATENCY_MS,
+                       help=f'Longest a frame waits for its batch to fill (default: {MAX_LATENCY_MS})')
+    serve.add_argument('--realtime', action='store_true', help='Pace video files at their native FPS like live cameras')
+    serve.set_defaults(run=cmd_serve)
+
+    bench = commands.add_parser('bench', help='Time every step of the per-frame hot path')
+    bench.add_argument('source', nargs='?', default=settings['video'], help='Video, camera index, stream URL or image directory (default: TEST_VIDEO_PATH)')
+    add_model_args(bench, 0.5)
+    bench.add_argument('--zones', default=settings['zones'], help='Zones config (default: ZONES_CONFIG or config/zones.yaml)')
+    bench.add_argument('--frames', type=int, default=200, help='Frames to measure (default: 200)')
+    bench.add_argument('--warmup', type=int, default=5, help='Frames to run before measuring (default: 5)')
+    bench.set_defaults(run=cmd_bench)
+
+    stock = commands.add_parser('stock', help='Print current stock and movement rollups')
+    stock.add_argument('--db', default=settings['db'], help='Inventory database (default: INVENTORY_DB_PATH)')
+    stock.add_argument('--all', action='store_true', help='Also list classes that are out of stock')
+    stock.add_argument('--rollup', choices=tuple(ROLLUP_PERIODS), default=None, help='Also print added/removed per class and period')
+    stock.add_argument('--since', default=None, help="Only rollup periods from this UTC time on, e.g. '2024-10-01'")
+    stock.add_argument('--class-id', default=None, help='Only rollups of this class')
+    stock.set_defaults(run=cmd_stock)
+
+    model_server = commands.add_parser('model-server', help='Keep warmed-up models resident for the other commands')
+    model_server.add_argument('models', nargs='*', help="Registered model names or paths to preload (default: MODEL or 'best')")
+    model_server.add_argument('--address', default=settings['model_server'] or DEFAULT_ADDRESS,
+                              help=f'host:port or Unix socket path to listen on (default: MODEL_SERVER or {DEFAULT_ADDRESS})')
+    model_server.add_argument('--imgsz', type=int, default=settings['imgsz'], help='Inference size to warm up for (default: IMGSZ or 640)')
+    model_server.add_argument('--batch', type=int, default=1, help='Frames per predict call to warm up for (default: 1)')
+    model_server.add_argument('--allow-remote', action='store_true',
+                              help='Allow a TCP address other than loopback. Anyone with the key can then run code on this machine')
+    model_server.set_defaults(run=cmd_model_server)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    settings = load_settings()
+    args = build_parser(settings).parse_args(argv)
+    args.run(args, settings)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Compact per-frame detections shared by the tracker, the annotator, event confirmation and the
+# inventory writer.
+#
+# A Results object keeps boxes, confidences and classes as one (n, 6) tensor, (n, 7) when it carries
+# track IDs. Detections copies that tensor to host memory in a single transfer and keeps views into it,
+# so a frame costs one device sync instead of one per .item() / .tolist() call, and filtering by
+# confidence is one boolean mask over all detections. Class names are only looked up where text is needed.
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class Detections:
+    """
+    Structure of arrays holding one frame's detections.
+
+    Args:
+        xyxy (np.ndarray): (n, 4) boxes as x1, y1, x2, y2 pixels.
+        confidence (np.ndarray): (n,) confidences.
+        class_id (np.ndarray): (n,) class indices.
+        names (Dict[int, str]): Class names by index.
+        track_id (np.ndarray, optional): (n,) track IDs, 0 for untracked detections. Defaults to None.
+    """
+
+    __slots__ = ('xyxy', 'confidence', 'class_id', 'names', 'track_id')
+
+    def __init__(self, xyxy: np.ndarray, confidence: np.ndarray, class_id: np.ndarray, names: Dict[int, str],
+                 track_id: Optional[np.ndarray] = None):
+        self.xyxy = xyxy
+        self.confidence = confidence
+        self.class_id = class_id
+        self.names = names
+        self.track_id = track_id
+
+    @classmethod
+    def from_result(cls, result, min_confidence: float = 0.0) -> 'Detections':
+        """
+        Read the boxes of an Ultralytics result with one device-to-host copy and keep those above min_confidence.
+        """
+        data = result.boxes.data
+        data = data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+        # Columns are x1, y1, x2, y2, [track id,] confidence, class
+        detections = cls(data[:, :4], data[:, -2], data[:, -1].astype(np.int64), result.names)
+        return detections.above(min_confidence) if min_confidence > 0 else detections
+
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None) -> 'Detections':
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64), names or {})
+
+    def __len__(self) -> int:
+        return len(self.confidence)
+
+    def select(self, index: np.ndarray) -> 'Detections':
+        """
+        Get the detections at an index array or boolean mask.
+        """
+        track_id = self.track_id[index] if self.track_id is not None else None
+        return Detections(self.xyxy[index], self.confidence[index], self.class_id[index], self.names, track_id)
+
+    def above(self, min_confidence: float) -> 'Detections':
+        """
+        Get the detections with a confidence above min_confidence.
+        """
+        return self.select(self.confidence > min_confidence)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """
+        (n, 2) box centers as x, y pixels.
+        """
+        return (self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2
+
+    @property
+    def class_names(self) -> List[str]:
+        return [self.names[class_id] for class_id in self.class_id.tolist()]
+
+    def to_predictions(self) -> List[Dict]:
+        """
+        Get one {'box', 'confidence', 'class'} dict per detection, box as [x1, y1, x2, y2].
+        """
+        return [{'box': box, 'confidence': confidence, 'class': name}
+                for box, confidence, name in zip(self.xyxy.tolist(), self.confidence.tolist(), self.class_names)]
+
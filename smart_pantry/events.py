@@ -0,0 +1,171 @@
+# Confirmation of zone and tripwire crossings, so detection jitter near a line doesn't post transactions.
+#
+# Every track has a confirmed state per channel (its zone, or its side of each tripwire). Observations
+# inside the hysteresis band around a border (ZoneMap margins) carry no evidence either way. A
+# different state only becomes confirmed, and produces an event, once it was observed without
+# interruption for MIN_FRAMES detected frames or for MIN_SECONDS, and the track's aggregated
+# confidence (an exponential moving average over its detections) reaches MIN_CONFIDENCE. A single
+# flickering box, or one low-confidence frame, never produces an event; going back to the confirmed
+# state cancels a pending change.
+
+import time
+from typing import Dict, Hashable, List, Optional
+
+from smart_pantry.zones import ZoneMap
+from smart_pantry.detections import Detections
+
+# A new state has to be observed for this many detected frames, or for this long
+MIN_FRAMES = 3
+MIN_SECONDS = 0.25
+
+# Events need the track's aggregated confidence to reach this
+MIN_CONFIDENCE = 0.75
+
+# Weight of the latest detection in a track's aggregated confidence
+CONFIDENCE_SMOOTHING = 0.3
+
+# Width of the band around zone borders and tripwires without evidence, as a fraction of the smaller frame side
+HYSTERESIS_BAND = 0.03
+
+
+class EventConfirmer:
+    """
+    Turns per-frame track states (zone, tripwire side, ...) into confirmed transition events.
+
+    Args:
+        min_frames (int, optional): Detected frames a new state has to persist. Defaults to 3.
+        min_seconds (float, optional): Or how long it has to persist; 0 disables. Defaults to 0.25.
+        min_confidence (float, optional): Minimum aggregated track confidence for an event. Defaults to 0.75.
+        smoothing (float, optional): Weight of the latest detection in the aggregated confidence. Defaults to 0.3.
+    """
+
+    def __init__(self, min_frames: int = MIN_FRAMES, min_seconds: float = MIN_SECONDS,
+                 min_confidence: float = MIN_CONFIDENCE, smoothing: float = CONFIDENCE_SMOOTHING):
+        self.min_frames = min_frames
+        self.min_seconds = min_seconds
+        self.min_confidence = min_confidence
+        self.smoothing = smoothing
+        self.confidences = {}
+        self.states = {}
+        self.stats = {'observations': 0, 'candidates': 0, 'events': 0}
+
+    def observe_confidence(self, track_id: int, confidence: float) -> float:
+        """
+        Fold a detection's confidence into its track's aggregated confidence and return the aggregate.
+        """
+        previous = self.confidences.get(track_id)
+        aggregated = confidence if previous is None else previous + self.smoothing * (confidence - previous)
+        self.confidences[track_id] = aggregated
+        return aggregated
+
+    def observe(self, track_id: int, channel: Hashable, value: Optional[Hashable],
+                now: Optional[float] = None) -> Optional[Dict]:
+        """
+        Record one observation of a track's state on a channel.
+
+        Args:
+            track_id (int): The track.
+            channel (Hashable): What the state describes, e.g. 'zone' or a tripwire name.
+            value (Hashable, optional): The observed state; None inside a hysteresis band (no evidence, but
+                a pending change starts over).
+            now (float, optional): Observation time in seconds. Defaults to time.perf_counter().
+
+        Returns:
+            Optional[Dict]: The event if a new state was confirmed: 'track_id', 'channel', 'previous',
+            'current' and the track's aggregated 'confidence'. None otherwise.
+        """
+        now = time.perf_counter() if now is None else now
+        self.stats['observations'] += 1
+        key = (track_id, channel)
+        state = self.states.get(key)
+
+        if value is None:
+            # Back on the border: a pending change has to start over
+            if state is not None:
+                state['candidate'] = None
+            return None
+        if state is None:
+            # First evidence of a track only sets its state
+            self.states[key] = {'confirmed': value, 'candidate': None, 'frames': 0, 'since': now}
+            return None
+        if value == state['confirmed']:
+            state['candidate'] = None
+            return None
+
+        if value != state['candidate']:
+            self.stats['candidates'] += 1
+            state.update(candidate=value, frames=1, since=now)
+        else:
+            state['frames'] += 1
+
+        persisted = state['frames'] >= self.min_frames or (self.min_seconds > 0 and now - state['since'] >= self.min_seconds)
+        confidence = self.confidences.get(track_id, 0.0)
+        if not persisted or confidence < self.min_confidence:
+            return None
+
+        event = {'track_id': track_id, 'channel': channel, 'previous': state['confirmed'], 'current': value, 'confidence': confidence}
+        state.update(confirmed=value, candidate=None, frames=0)
+        self.stats['events'] += 1
+        return event
+
+    def prune(self, active_ids: set) -> None:
+        """
+        Forget the tracks that are no longer active.
+        """
+        self.confidences = {track_id: confidence for track_id, confidence in self.confidences.items() if track_id in active_ids}
+        self.states = {key: state for key, state in self.states.items() if key[0] in active_ids}
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Get the number of observations, pending state changes started and events confirmed.
+        """
+        return dict(self.stats)
+
+
+def hysteresis_margin(width: int, height: int, band: float = HYSTERESIS_BAND) -> int:
+    """
+    Get the hysteresis band width in pixels for a frame size.
+    """
+    return max(1, round(band * min(width, height)))
+
+
+def zone_events(confirmer: EventConfirmer, zone_map: ZoneMap, detections: Detections, width: int, height: int,
+                now: Optional[float] = None, band: float = HYSTERESIS_BAND) -> List[Dict]:
+    """
+    Observe every confirmed track's zone and tripwire sides, with hysteresis bands, and return the confirmed events.
+
+    Args:
+        confirmer (EventConfirmer): Per-track confirmation state.
+        zone_map (ZoneMap): Zones and tripwires of the view.
+        detections (Detections): The frame's tracked detections (track_id 0 for unconfirmed tracks).
+        width (int): Frame width.
+        height (int): Frame height.
+        now (float, optional): Frame time in seconds. Defaults to time.perf_counter().
+        band (float, optional): Hysteresis band as a fraction of the smaller frame side. Defaults to 0.03.
+
+    Returns:
+        List[Dict]: Confirmed events (see EventConfirmer.observe) with the detection's 'class' name and
+        'movement' added: the zone's movement for entering a zone ('channel' 'zone'), the tripwire's movement
+        times the crossing direction for tripwires.
+    """
+    now = time.perf_counter() if now is None else now
+    margin = hysteresis_margin(width, height, band)
+    points = detections.centers
+    zones = zone_map.zone_names(points, width, height, margin)
+    sides = zone_map.wire_sides(points, width, height, margin).tolist()
+
+    events = []
+    for index, (track_id, confidence) in enumerate(zip(detections.track_id.tolist(), detections.confidence.tolist())):
+        if not track_id:
+            continue
+        confirmer.observe_confidence(track_id, confidence)
+        name = detections.names[int(detections.class_id[index])]
+        event = confirmer.observe(track_id, 'zone', zones[index], now)
+        if event is not None:
+            events.append({**event, 'class': name, 'movement': zone_map.movements.get(event['current'], 0)})
+        for wire, side in zip(zone_map.tripwires, sides[index]):
+            event = confirmer.observe(track_id, wire['name'], side or None, now)
+            if event is not None:
+                # From the left side (+1) to the right side (-1) of a wire drawn top to bottom is direction +1
+                events.append({**event, 'class': name, 'movement': zone_map.wire_movements[wire['name']] * event['previous']})
+    return events
@@ -0,0 +1,105 @@
+# The inventory loop: detect, track, confirm zone and tripwire events, and hand them to a callback
+# (by default the batched SQLite transaction writer), optionally writing and showing the annotated video.
+#
+# Frames the motion gate skips reuse the last detections for annotation and don't touch the tracks.
+# Event times come from the frame index for files and from the clock for live sources, so confirmation
+# windows mean the same thing whether a recording is replayed faster or slower than real time.
+
+import time
+import logging
+from typing import Callable, Dict, Optional, Union
+
+import cv2
+
+from smart_pantry.annotate import draw_detections, draw_zones
+from smart_pantry.detections import Detections
+from smart_pantry.events import EventConfirmer, zone_events
+from smart_pantry.motion import MotionGate
+from smart_pantry.sources import open_source
+from smart_pantry.store import TransactionWriter
+from smart_pantry.tracking import Tracker
+from smart_pantry.zones import ZoneMap, load_zone_map
+
+
+def post_event(writer: TransactionWriter) -> Callable[[Dict], None]:
+    """
+    Get an event callback that logs every event and queues a transaction for those with a movement.
+    """
+    def on_event(event: Dict) -> None:
+        logging.info(f"Object '{event['class']}' (track {event['track_id']}, confidence {event['confidence']:.2f}) "
+                     f"{event['channel']}: {event['previous']} -> {event['current']}")
+        if event['movement']:
+            writer.post(event['class'], event['movement'])
+            logging.info(f"Object '{event['class']}' (track {event['track_id']}): {event['movement']:+d} transaction logged")
+    return on_event
+
+
+def run_inventory(model, source: Union[int, str], on_event: Callable[[Dict], None], zone_map: Optional[ZoneMap] = None,
+                  confirmer: Optional[EventConfirmer] = None, gate: Optional[MotionGate] = None, min_confidence: float = 0.5,
+                  output_path: Optional[str] = None, show: bool = False, predict_kwargs: Optional[Dict] = None,
+                  window_name: str = 'Smart Pantry Predictions') -> Dict:
+    """
+    Track every detection of a source and call on_event for every confirmed zone change or tripwire crossing.
+
+    Args:
+        model: A loaded Ultralytics YOLO model.
+        source (Union[int, str]): Camera index, video file, stream URL or image directory (see open_source).
+        on_event (Callable[[Dict], None]): Called with every confirmed event (see zone_events).
+        zone_map (ZoneMap, optional): Zones and tripwires. Defaults to load_zone_map().
+        confirmer (EventConfirmer, optional): Event confirmation settings. Defaults to EventConfirmer().
+        gate (MotionGate, optional): Only detect frames the gate lets through. Defaults to None (detect every frame).
+        min_confidence (float, optional): Boxes at or below this confidence are ignored. Defaults to 0.5.
+        output_path (str, optional): Annotated mp4 to write. Defaults to None.
+        show (bool, optional): Display annotated frames; 'q' stops. Defaults to False.
+        predict_kwargs (Dict, optional): Extra keyword arguments for model.predict.
+        window_name (str, optional): Display window name.
+
+    Returns:
+        Dict: 'frames', 'detected_frames', 'fps' and the 'events' summary, plus the motion 'gate' summary with a gate.
+    """
+    zone_map = zone_map or load_zone_map()
+    confirmer = confirmer or EventConfirmer()
+    tracker = Tracker()
+    predict_kwargs = {'verbose': False, **(predict_kwargs or {})}
+
+    frames = open_source(source)
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), round(frames.fps), (frames.width, frames.height)) if output_path else None
+    detections = Detections.empty()
+    frame_index = detected = 0
+    started = time.perf_counter()
+
+    for frame in frames:
+        frame_time = time.perf_counter() - started if frames.live else frame_index / frames.fps
+        frame_index += 1
+
+        if gate is None or gate.should_detect(frame):
+            detected += 1
+            result = model.predict(source=frame, **predict_kwargs)[0]
+            detections = tracker.track(Detections.from_result(result, min_confidence))
+            for event in zone_events(confirmer, zone_map, detections, frame.shape[1], frame.shape[0], frame_time):
+                on_event(event)
+            # Forget tracks the tracker dropped
+            confirmer.prune(tracker.active_ids())
+
+        if writer is None and not show:
+            continue
+        annotated_frame = draw_detections(draw_zones(frame, zone_map), detections)
+        if writer is not None:
+            writer.write(annotated_frame)
+        if show:
+            cv2.imshow(window_name, annotated_frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+    elapsed = time.perf_counter() - started
+    frames.release()
+    if writer is not None:
+        writer.release()
+    if show:
+        cv2.destroyAllWindows()
+
+    stats = {'frames': frame_index, 'detected_frames': detected, 'fps': frame_index / elapsed if elapsed > 0 else 0.0,
+             'events': confirmer.summary()}
+    if gate is not None:
+        stats['gate'] = gate.summary()
+    return stats
@@ -0,0 +1,233 @@
+# Resident model server. The camera service is restarted on every deploy, and a fresh process pays for
+# importing torch, loading the model and warming it up before its first detection. The model server
+# loads and warms the models once and keeps them resident:
+#
+#   python -m smart_pantry model-server best ncnn --address localhost:6010
+#
+# Commands started with --server (or MODEL_SERVER in .env) send their frames to it instead of loading
+# a model, and reach their first detection without importing torch. RemoteModel has the same predict
+# interface as an Ultralytics model. It only returns what Detections.from_result reads (boxes.data and
+# names), so no tensors or images are sent back. A command falls back to loading the model itself
+# when no server answers.
+#
+# Frames are pickled over a multiprocessing connection. On a local socket that costs about a
+# millisecond per 640x480 frame, small next to inference on the edge device. Unpickling runs code, so
+# only authenticated clients may send anything. The key is MODEL_SERVER_KEY. Without it, the server
+# writes a random key to MODEL_SERVER_KEY_FILE (owner-only permissions), and clients of the same user
+# read it from there. The server refuses TCP addresses outside loopback unless allow_remote is given.
+# Every client gets its own thread. A model runs one predict call at a time, since Ultralytics
+# predictors are not thread-safe.
+
+import os
+import time
+import socket
+import secrets
+import ipaddress
+import threading
+from multiprocessing.connection import Client, Listener
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from smart_pantry.models import prepare_model, resolve_model
+
+DEFAULT_ADDRESS = 'localhost:6010'
+DEFAULT_KEY_FILE = os.path.join(os.path.expanduser('~'), '.smart_pantry_model_server.key')
+
+
+def parse_address(address: str) -> Union[Tuple[str, int], str]:
+    """
+    Parse a server address: 'host:port' for TCP, anything else is a Unix socket path.
+    """
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def is_loopback(host: str) -> bool:
+    """
+    Check whether every address a host name resolves to is a loopback address.
+    """
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_loopback for address in addresses)
+
+
+def server_key(create: bool = False) -> Optional[bytes]:
+    """
+    Get the key connections are authenticated with: MODEL_SERVER_KEY, or the key in MODEL_SERVER_KEY_FILE.
+
+    Args:
+        create (bool, optional): Write a new random key to the key file if there is none. Defaults to False.
+
+    Returns:
+        Optional[bytes]: The key, or None if there is none and create is False.
+    """
+    key = os.getenv('MODEL_SERVER_KEY')
+    if key:
+        return key.encode()
+    path = os.getenv('MODEL_SERVER_KEY_FILE', DEFAULT_KEY_FILE)
+    if create and not os.path.exists(path):
+        # Created with owner-only permissions, so other users can't read the key
+        with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as file:
+            file.write(secrets.token_hex(32))
+        print(f"Wrote a new model server key to {path}")
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return file.read().strip().encode()
+
+
+class RemoteResult:
+    """
+    The part of an Ultralytics result the inference code reads: boxes.data and names.
+    """
+    __slots__ = ('boxes', 'names')
+
+    def __init__(self, data: np.ndarray, names: Dict[int, str]):
+        self.boxes = SimpleNamespace(data=data)
+        self.names = names
+
+
+class RemoteModel:
+    """
+    A model loaded in the model server, used like a local Ultralytics model.
+    """
+
+    def __init__(self, conn, path: str, task: str, names: Dict[int, str]):
+        self.conn = conn
+        self.path = path
+        self.task = task
+        self.names = names
+        self.lock = threading.Lock()
+
+    def request(self, *message):
+        with self.lock:
+            self.conn.send(message)
+            status, payload = self.conn.recv()
+        if status == 'error':
+            raise RuntimeError(f"Model server: {payload}")
+        return payload
+
+    def predict(self, source: Union[np.ndarray, List[np.ndarray]], **predict_kwargs) -> List[RemoteResult]:
+        """
+        Run the model in the server on one frame or a list of frames.
+        """
+        frames = source if isinstance(source, list) else [source]
+        return [RemoteResult(data, self.names) for data in self.request('predict', self.path, self.task, frames, predict_kwargs)]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def connect_model(address: str, model: str, task: str = 'detect', imgsz: int = 640, batch: int = 1) -> Optional[RemoteModel]:
+    """
+    Connect to a model in the model server, which loads and warms it up if it isn't resident yet.
+
+    Args:
+        address (str): Server address, 'host:port' or a Unix socket path.
+        model (str): A registered model name or a model path.
+        task (str, optional): The model task. Defaults to 'detect'.
+        imgsz (int, optional): Inference size to warm up for. Defaults to 640.
+        batch (int, optional): Frames per predict call to warm up for. Defaults to 1.
+
+    Returns:
+        Optional[RemoteModel]: The remote model, or None if no server answers at the address, there is no key,
+        or the server can't load the model.
+    """
+    key = server_key()
+    if key is None:
+        return None
+    try:
+        conn = Client(parse_address(address), authkey=key)
+    except OSError:
+        return None
+    # Paths are resolved here, since the server may run in another directory
+    path = os.path.abspath(resolve_model(model))
+    remote = RemoteModel(conn, path, task, {})
+    try:
+        remote.names = remote.request('load', path, task, imgsz, batch)
+    except (RuntimeError, EOFError, OSError) as error:
+        # e.g. the model path doesn't exist where the server runs
+        print(f"Model server at {address} could not load {model}: {error}")
+        remote.close()
+        return None
+    return remote
+
+
+def serve_client(conn, locks: Dict, locks_lock: threading.Lock) -> None:
+    """
+    Answer one client's requests until it disconnects.
+    """
+    with conn:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if not isinstance(message, tuple):
+                    raise ValueError(f"Malformed request of type {type(message).__name__}")
+                command, path, task, *args = message
+                with locks_lock:
+                    lock = locks.setdefault((path, task), threading.Lock())
+                with lock:
+                    if command == 'load':
+                        imgsz, batch = args
+                        reply = dict(prepare_model(path, task, imgsz=imgsz, batch=batch).names)
+                    elif command == 'predict':
+                        frames, predict_kwargs = args
+                        results = prepare_model(path, task, warmup=False).predict(source=frames, **predict_kwargs)
+                        reply = [result.boxes.data.cpu().numpy() if hasattr(result.boxes.data, 'cpu') else np.asarray(result.boxes.data)
+                                 for result in results]
+                    else:
+                        raise ValueError(f"Unknown command '{command}'")
+                conn.send(('ok', reply))
+            except Exception as error:
+                conn.send(('error', f"{type(error).__name__}: {error}"))
+
+
+def run_model_server(address: str, models: List[str], task: str = 'detect', imgsz: int = 640, batch: int = 1,
+                     allow_remote: bool = False) -> None:
+    """
+    Load and warm up models, then serve predictions until interrupted.
+
+    Args:
+        address (str): Address to listen on, 'host:port' or a Unix socket path.
+        models (List[str]): Registered model names or paths to preload.
+        task (str, optional): The model task. Defaults to 'detect'.
+        imgsz (int, optional): Inference size to warm up for. Defaults to 640.
+        batch (int, optional): Frames per predict call to warm up for. Defaults to 1.
+        allow_remote (bool, optional): Allow listening on a TCP address other than loopback. Defaults to False.
+    """
+    parsed = parse_address(address)
+    if isinstance(parsed, tuple) and not allow_remote and not is_loopback(parsed[0]):
+        raise ValueError(f"Refusing to listen on {address}: clients can run code in the server, so it only listens on "
+                         f"loopback or a Unix socket unless remote access is allowed explicitly.")
+    key = server_key(create=True)
+
+    started = time.perf_counter()
+    for model in models:
+        prepare_model(model, task, imgsz=imgsz, batch=batch)
+
+    if isinstance(parsed, str) and os.path.exists(parsed):
+        # A stale socket left by a server that didn't shut down cleanly
+        os.remove(parsed)
+    locks, locks_lock = {}, threading.Lock()
+    with Listener(parsed, authkey=key) as listener:
+        print(f"Model server ready at {address} after {time.perf_counter() - started:.2f}s with {len(models)} models")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as error:
+                    # Failed handshakes (wrong key, port scans) don't stop the server
+                    print(f"Rejected connection: {error}")
+                    continue
+                threading.Thread(target=serve_client, args=(conn, locks, locks_lock), daemon=True).start()
+        except KeyboardInterrupt:
+            print('Model server stopped')
@@ -0,0 +1,135 @@
+# Model registry: resolves a model name or path, detects its format (PyTorch .pt, NCNN export directory,
+# ONNX file) and loads it once per process.
+#
+# Named models come from the settings (BEST_MODEL_PATH as 'best', NCNN_MODEL_PATH as 'ncnn',
+# ONNX_MODEL_PATH as 'onnx') or register_model. Loaded models are cached by path, so every entry point
+# and every source in a process share one model instead of loading their own copy.
+#
+# A freshly loaded model is slow on its first frames: Ultralytics builds the predictor, exported formats
+# load their weights and the backend picks kernels for the input shape on the first inference.
+# prepare_model runs dummy predictions at the configured imgsz and batch right after loading, so that
+# cost is paid at startup instead of on the first real frame. Each size is warmed up once per process.
+
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+MODEL_FORMATS = ('pt', 'ncnn', 'onnx')
+
+# Registered model paths by name
+_registry = {}
+
+# Loaded models by (absolute path, task)
+_loaded = {}
+
+# (absolute path, task, imgsz, batch) combinations that were warmed up
+_warmed = set()
+
+
+def register_model(name: str, path: Optional[str]) -> None:
+    """
+    Register a model path under a name. Empty paths are ignored.
+    """
+    if path:
+        _registry[name] = path
+
+
+def registered_models() -> Dict[str, str]:
+    return dict(_registry)
+
+
+def resolve_model(model: str) -> str:
+    """
+    Get the path of a registered model name, or the argument itself if it isn't a registered name.
+    """
+    return _registry.get(model, model)
+
+
+def model_format(path: str) -> str:
+    """
+    Detect a model's format from its path: 'ncnn' for an NCNN export directory, 'onnx' or 'pt' by extension.
+    """
+    if os.path.isdir(path):
+        if path.rstrip('/\\').endswith('_ncnn_model') or os.path.exists(os.path.join(path, 'model.ncnn.param')):
+            return 'ncnn'
+        raise ValueError(f"Directory {path} is not an NCNN model export.")
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in MODEL_FORMATS:
+        raise ValueError(f"Unsupported model format '{extension}' for {path}. Expected one of {MODEL_FORMATS}.")
+    return extension
+
+
+def load_model(model: str, task: str = 'detect'):
+    """
+    Load a YOLO model by registered name or path, reusing it if this process loaded it before.
+
+    Args:
+        model (str): A registered model name ('best', 'ncnn', 'onnx') or a model path.
+        task (str, optional): The model task, needed by exported formats. Defaults to 'detect'.
+
+    Returns:
+        The loaded Ultralytics YOLO model.
+    """
+    path = resolve_model(model)
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"Model path {path} does not exist.")
+    model_format(path)
+
+    key = (os.path.abspath(path), task)
+    if key not in _loaded:
+        # Imported here so commands that don't run a model start without loading torch
+        from ultralytics import YOLO
+        _loaded[key] = YOLO(path, task=task)
+    return _loaded[key]
+
+
+def warm_up(model, imgsz: int = 640, batch: int = 1, runs: int = 2) -> float:
+    """
+    Run dummy predictions on black frames so predictor setup and first-inference work happen before the first real frame.
+
+    Args:
+        model: A loaded Ultralytics YOLO model.
+        imgsz (int, optional): Inference size. Defaults to 640.
+        batch (int, optional): Frames per predict call. Defaults to 1.
+        runs (int, optional): Dummy predict calls. Defaults to 2.
+
+    Returns:
+        float: Seconds the warm-up took.
+    """
+    frames = [np.zeros((imgsz, imgsz, 3), dtype=np.uint8)] * batch
+    started = time.perf_counter()
+    for _ in range(runs):
+        model.predict(source=frames if batch > 1 else frames[0], imgsz=imgsz, verbose=False)
+    return time.perf_counter() - started
+
+
+def prepare_model(model: str, task: str = 'detect', imgsz: int = 640, batch: int = 1, warmup: bool = True):
+    """
+    Load a model and warm it up for an inference size and batch, once per process for each combination.
+
+    Args:
+        model (str): A registered model name ('best', 'ncnn', 'onnx') or a model path.
+        task (str, optional): The model task, needed by exported formats. Defaults to 'detect'.
+        imgsz (int, optional): Inference size to warm up for. Defaults to 640.
+        batch (int, optional): Frames per predict call to warm up for. Defaults to 1.
+        warmup (bool, optional): Run the warm-up predictions. Defaults to True.
+
+    Returns:
+        The loaded Ultralytics YOLO model.
+    """
+    path = resolve_model(model)
+    key = (os.path.abspath(path), task) if path else None
+    if key in _loaded:
+        loaded = _loaded[key]
+    else:
+        started = time.perf_counter()
+        loaded = load_model(model, task)
+        print(f"Loaded {model} ({model_format(path)}) in {time.perf_counter() - started:.2f}s")
+
+    if warmup and (*key, imgsz, batch) not in _warmed:
+        seconds = warm_up(loaded, imgsz, batch)
+        _warmed.add((*key, imgsz, batch))
+        print(f"Warmed up {model} at imgsz {imgsz}, batch {batch} in {seconds:.2f}s")
+    return loaded
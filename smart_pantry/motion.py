@@ -0,0 +1,119 @@
+# Motion gating: decide per frame whether object detection has to run.
+#
+# Each frame is shrunk to a small blurred grayscale image and compared with the previous frame and with
+# the frame the last detection ran on. The motion score is the fraction of pixels whose brightness changed
+# by more than a threshold. While the scene moves every frame is detected, detection keeps running for a
+# few frames after motion stops so add/remove events finish, and an idle scene is only re-detected every
+# Nth frame. The comparison with the last detected frame catches changes too slow to show between frames.
+
+from typing import Dict
+
+import cv2
+import numpy as np
+
+# Width of the grayscale image motion is measured on
+GATE_WIDTH = 160
+
+# A pixel changed if its brightness moved by more than this much (0-255)
+PIXEL_THRESHOLD = 25
+
+# Fraction of changed pixels that counts as motion
+MOTION_THRESHOLD = 0.01
+
+# Detect every IDLE_INTERVAL-th frame while nothing moves
+IDLE_INTERVAL = 15
+
+# Keep detecting for this many frames after the last motion
+HOLD_FRAMES = 10
+
+
+def small_gray(frame: np.ndarray, width: int = GATE_WIDTH) -> np.ndarray:
+    """
+    Shrink a BGR or grayscale frame to a blurred grayscale image of the given width. Resizing first
+    keeps the color conversion and blur cheap.
+    """
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return cv2.GaussianBlur(small, (5, 5), 0)
+
+
+def motion_score(previous: np.ndarray, current: np.ndarray, pixel_threshold: int = PIXEL_THRESHOLD) -> float:
+    """
+    Get the fraction of pixels whose brightness changed by more than pixel_threshold between two small gray frames.
+    """
+    return float(np.count_nonzero(cv2.absdiff(previous, current) > pixel_threshold)) / current.size
+
+
+class MotionGate:
+    """
+    Decides per frame whether to run detection, based on a cheap frame-difference motion score.
+
+    Args:
+        motion_threshold (float, optional): Fraction of changed pixels that counts as motion. Defaults to 0.01.
+        idle_interval (int, optional): Detect every Nth frame while the scene is idle. Defaults to 15.
+        hold_frames (int, optional): Frames to keep detecting after the last motion. Defaults to 10.
+        pixel_threshold (int, optional): Brightness change for a pixel to count as changed. Defaults to 25.
+        width (int, optional): Width of the grayscale image motion is measured on. Defaults to 160.
+    """
+
+    def __init__(self, motion_threshold: float = MOTION_THRESHOLD, idle_interval: int = IDLE_INTERVAL,
+                 hold_frames: int = HOLD_FRAMES, pixel_threshold: int = PIXEL_THRESHOLD, width: int = GATE_WIDTH):
+        self.motion_threshold = motion_threshold
+        self.idle_interval = max(1, idle_interval)
+        self.hold_frames = hold_frames
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+
+        self.previous = None
+        self.keyframe = None
+        self.frames_since_motion = None
+        self.frames_since_detection = 0
+        self.stats = {'frames': 0, 'detections': 0, 'motion_frames': 0}
+
+    def should_detect(self, frame: np.ndarray) -> bool:
+        """
+        Update the gate with the next frame and decide whether detection should run on it.
+
+        Args:
+            frame (np.ndarray): The next BGR (or grayscale) frame.
+
+        Returns:
+            bool: True if detection should run on this frame.
+        """
+        current = small_gray(frame, self.width)
+        self.stats['frames'] += 1
+
+        if self.previous is None or self.previous.shape != current.shape:
+            moving = True
+        else:
+            score = motion_score(self.previous, current, self.pixel_threshold)
+            drift = motion_score(self.keyframe, current, self.pixel_threshold)
+            moving = max(score, drift) >= self.motion_threshold
+        self.previous = current
+
+        if moving:
+            self.stats['motion_frames'] += 1
+            self.frames_since_motion = 0
+        elif self.frames_since_motion is not None:
+            self.frames_since_motion += 1
+
+        recently_moved = self.frames_since_motion is not None and self.frames_since_motion <= self.hold_frames
+        idle_due = self.frames_since_detection + 1 >= self.idle_interval
+        detect = moving or recently_moved or idle_due
+
+        if detect:
+            self.keyframe = current
+            self.frames_since_detection = 0
+            self.stats['detections'] += 1
+        else:
+            self.frames_since_detection += 1
+        return detect
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the number of frames seen, detections run, frames with motion and the fraction of frames detected.
+        """
+        frames = max(self.stats['frames'], 1)
+        return {**self.stats, 'detect_ratio': self.stats['detections'] / frames}
@@ -0,0 +1,247 @@
+# Staged video pipeline: capture -> inference -> annotate -> encode, each stage in its own thread,
+# connected by bounded queues. Decoding the next frames and encoding the previous ones overlap with
+# the model running on the current ones, so end-to-end FPS approaches the model-only FPS.
+#
+# A full queue either blocks its producer ('block', back-pressure all the way to capture, no frame is
+# lost) or discards the oldest queued frame ('drop_oldest', keeps live cameras current when inference
+# can't keep up). Stages pass a sentinel downstream when their input ends.
+#
+# An exception in any stage (or in the display loop) is stored and aborts the pipeline: every stage
+# stops at its next item, puts and gets that would wait on a dead neighbour give up, and
+# run_video_pipeline re-raises the error once all threads have finished.
+
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import cv2
+
+from smart_pantry.annotate import draw_detections
+from smart_pantry.detections import Detections
+from smart_pantry.motion import MotionGate
+from smart_pantry.sources import open_source
+
+QUEUE_POLICIES = ('block', 'drop_oldest')
+QUEUE_SIZE = 8
+
+# How often a waiting put or get checks whether the pipeline was aborted
+POLL_SECONDS = 0.1
+
+_END = object()
+
+
+class StageQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    Args:
+        maxsize (int): Maximum number of queued items.
+        policy (str, optional): 'block' makes put wait for space; 'drop_oldest' discards the oldest
+            queued item to make space. The end sentinel is never dropped. Defaults to 'block'.
+        abort (threading.Event, optional): Once set, a put waiting for space discards its item and a get
+            on an empty queue returns the end sentinel, so no stage waits forever on a failed one.
+    """
+
+    def __init__(self, maxsize: int, policy: str = 'block', abort: Optional[threading.Event] = None):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}'. Expected one of {QUEUE_POLICIES}.")
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.abort = abort or threading.Event()
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def put(self, item: Any) -> None:
+        if self.policy == 'block' or item is _END:
+            while not self.abort.is_set():
+                try:
+                    self.queue.put(item, timeout=POLL_SECONDS)
+                    return
+                except queue.Full:
+                    continue
+            return
+        with self._lock:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        oldest = self.queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    if oldest is _END:
+                        # Keep the sentinel, drop the new item instead
+                        self.queue.put_nowait(oldest)
+                        self.dropped += 1
+                        return
+                    self.dropped += 1
+
+    def get(self) -> Any:
+        while True:
+            try:
+                return self.queue.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                if self.abort.is_set():
+                    return _END
+
+    def get_batch(self, max_items: int) -> List[Any]:
+        """
+        Wait for one item, then take up to max_items - 1 more that are already queued.
+        """
+        items = [self.get()]
+        while len(items) < max_items and items[-1] is not _END:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+
+def run_stage(name: str, work: Callable, inbox: Optional[StageQueue], outbox: Optional[StageQueue], stats: Dict,
+              abort: threading.Event, errors: List[BaseException], batch: Optional[int] = None) -> None:
+    """
+    Run one stage until its input ends: take items (or batches) from inbox, pass them through work and
+    put the outputs on outbox. A stage without an inbox is a source: work() returns the next item, or
+    None when it ends. With a batch size, work takes a list of up to batch items and returns a list of
+    outputs. An exception is appended to errors and sets abort, which stops every stage.
+    """
+    stage_stats = stats.setdefault(name, {'items': 0, 'busy_seconds': 0.0})
+    try:
+        ended = False
+        while not ended and not abort.is_set():
+            if inbox is None:
+                started = time.perf_counter()
+                output = work()
+                ended = output is None
+                outputs = [] if ended else [output]
+            else:
+                items = inbox.get_batch(batch or 1)
+                ended = items[-1] is _END
+                items = items[:-1] if ended else items
+                started = time.perf_counter()
+                outputs = (work(items) if batch is not None else [work(item) for item in items]) if items else []
+            stage_stats['busy_seconds'] += time.perf_counter() - started
+
+            stage_stats['items'] += len(outputs)
+            if outbox is not None:
+                for output in outputs:
+                    outbox.put(output)
+    except BaseException as error:
+        errors.append(error)
+        abort.set()
+    finally:
+        if outbox is not None:
+            outbox.put(_END)
+
+
+def run_video_pipeline(model, source: Union[int, str], output_path: Optional[str] = None, show: bool = False,
+                       policy: str = 'block', queue_size: int = QUEUE_SIZE, max_batch: int = 4, min_confidence: float = 0.60,
+                       predict_kwargs: Optional[Dict] = None, window_name: str = 'Smart Pantry Predictions',
+                       gate: Optional[MotionGate] = None) -> Dict:
+    """
+    Run detection over a video or camera with capture, inference, annotation and encoding in separate threads.
+
+    Args:
+        model: A loaded Ultralytics YOLO model.
+        source (Union[int, str]): Camera index, video file, stream URL or image directory (see open_source).
+        output_path (str, optional): Annotated mp4 to write. Defaults to None (no output file).
+        show (bool, optional): Display frames with cv2.imshow on the calling thread. Defaults to False (headless).
+        policy (str, optional): Queue policy, 'block' or 'drop_oldest'. Defaults to 'block'.
+        queue_size (int, optional): Capacity of each queue between stages. Defaults to 8.
+        max_batch (int, optional): Frames already waiting for inference are predicted together, up to this many. Defaults to 4.
+        min_confidence (float, optional): Minimum confidence of drawn detections. Defaults to 0.60.
+        predict_kwargs (Dict, optional): Extra keyword arguments for model.predict.
+        window_name (str, optional): Display window name.
+        gate (MotionGate, optional): Only detect frames the gate lets through; skipped frames reuse the
+            last detections. Defaults to None (detect every frame).
+
+    Returns:
+        Dict: Per-stage 'items' and 'busy_seconds', frames 'dropped' per queue, 'frames' written and overall 'fps'.
+
+    Raises:
+        The first exception raised by a stage or the display loop, after every stage has stopped.
+    """
+    frames = open_source(source)
+    frame_size = (frames.width, frames.height)
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), round(frames.fps), frame_size) if output_path else None
+    predict_kwargs = {'verbose': False, **(predict_kwargs or {})}
+
+    # stop ends capture and lets queued frames finish ('q' pressed); abort drops them after an error
+    stop, abort = threading.Event(), threading.Event()
+    errors = []
+    captured, predicted, annotated = (StageQueue(queue_size, policy, abort) for _ in range(3))
+    display = StageQueue(2, 'drop_oldest', abort) if show else None
+    stats = {}
+
+    def capture():
+        return None if stop.is_set() else frames.read()
+
+    last_detections = Detections.empty()
+
+    def infer(frames):
+        nonlocal last_detections
+        detect = [gate is None or gate.should_detect(frame) for frame in frames]
+        selected = [frame for frame, selected in zip(frames, detect) if selected]
+        results = iter(model.predict(source=selected, **predict_kwargs) if selected else [])
+        outputs = []
+        for frame, selected in zip(frames, detect):
+            if selected:
+                last_detections = Detections.from_result(next(results), min_confidence)
+            outputs.append((frame, last_detections))
+        return outputs
+
+    def annotate(item):
+        frame, detections = item
+        return draw_detections(frame, detections)
+
+    def encode(frame):
+        if writer is not None:
+            # Image directories can mix sizes; the video has the first frame's size
+            writer.write(frame if frame.shape[1::-1] == frame_size else cv2.resize(frame, frame_size))
+        return frame
+
+    threads = [
+        threading.Thread(target=run_stage, args=('capture', capture, None, captured, stats, abort, errors), daemon=True),
+        threading.Thread(target=run_stage, args=('inference', infer, captured, predicted, stats, abort, errors, max_batch), daemon=True),
+        threading.Thread(target=run_stage, args=('annotate', annotate, predicted, annotated, stats, abort, errors), daemon=True),
+        threading.Thread(target=run_stage, args=('encode', encode, annotated, display, stats, abort, errors), daemon=True),
+    ]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    # cv2.imshow has to run on the main thread on some platforms, so display happens here
+    if display is not None:
+        try:
+            while True:
+                frame = display.get()
+                if frame is _END:
+                    break
+                cv2.imshow(window_name, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    stop.set()
+        except BaseException as error:
+            errors.append(error)
+            abort.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    frames.release()
+    if writer is not None:
+        writer.release()
+    if show:
+        cv2.destroyAllWindows()
+    if errors:
+        raise errors[0]
+
+    frames = stats.get('encode', {}).get('items', 0)
+    stats['dropped'] = {'captured': captured.dropped, 'predicted': predicted.dropped, 'annotated': annotated.dropped}
+    stats['frames'] = frames
+    stats['fps'] = frames / elapsed if elapsed > 0 else 0.0
+    if gate is not None:
+        stats['gate'] = gate.summary()
+    return stats
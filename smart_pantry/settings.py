@@ -0,0 +1,43 @@
+# Settings from the environment and .env, read when an entry point starts instead of at import time,
+# so importing smart_pantry has no side effects and tests or other programs can pass their own values.
+
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+
+from smart_pantry.models import register_model
+from smart_pantry.motion import IDLE_INTERVAL
+
+
+def load_settings() -> Dict:
+    """
+    Load .env and read the inference settings. Registers the configured models under 'best', 'ncnn' and 'onnx'.
+
+    Returns:
+        Dict: 'model' (the default model name or path), 'video' (TEST_VIDEO_PATH), 'output' (OUTPUT_VIDEO_PATH),
+        'image' (TEST_IMAGE_PATH), 'camera_sources' (CAMERA_SOURCES), 'db' (INVENTORY_DB_PATH), 'zones'
+        (ZONES_CONFIG), 'imgsz' (IMGSZ), 'headless' (HEADLESS), 'queue_policy' (QUEUE_POLICY),
+        'motion_gate' (MOTION_GATE, None when unset), 'idle_interval' (IDLE_INTERVAL) and 'model_server' (MODEL_SERVER).
+    """
+    load_dotenv()
+    register_model('best', os.getenv('BEST_MODEL_PATH'))
+    register_model('ncnn', os.getenv('NCNN_MODEL_PATH'))
+    register_model('onnx', os.getenv('ONNX_MODEL_PATH'))
+
+    motion_gate = os.getenv('MOTION_GATE')
+    return {
+        'model': os.getenv('MODEL', 'best'),
+        'video': os.getenv('TEST_VIDEO_PATH'),
+        'output': os.getenv('OUTPUT_VIDEO_PATH'),
+        'image': os.getenv('TEST_IMAGE_PATH'),
+        'camera_sources': os.getenv('CAMERA_SOURCES', ''),
+        'db': os.getenv('INVENTORY_DB_PATH', 'object_movement.db'),
+        'zones': os.getenv('ZONES_CONFIG'),
+        'imgsz': int(os.getenv('IMGSZ', 640)),
+        'headless': os.getenv('HEADLESS') == '1',
+        'queue_policy': os.getenv('QUEUE_POLICY', 'block'),
+        'motion_gate': None if motion_gate is None else motion_gate == '1',
+        'idle_interval': int(os.getenv('IDLE_INTERVAL', IDLE_INTERVAL)),
+        'model_server': os.getenv('MODEL_SERVER'),
+    }
@@ -0,0 +1,165 @@
+# Frame sources behind one interface: video files, cameras, network streams and image files or directories.
+#
+# open_source turns a source spec into a FrameSource: a bare integer is a camera index, an rtsp/rtmp/http(s)
+# URL a live stream, a directory or image file a sequence of still images, anything else a video file.
+# Live sources (cameras, streams) can't be replayed or paced, so consumers use the 'live' flag to pick
+# frame-dropping queue policies and wall-clock timing.
+
+import os
+import time
+from typing import Iterator, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from utils.scan_utils import IMAGE_EXTENSIONS
+
+STREAM_PREFIXES = ('rtsp://', 'rtmp://', 'http://', 'https://')
+
+
+def parse_source(source: Union[int, str]) -> Union[int, str]:
+    """
+    Interpret a source spec: a bare integer is a camera index, anything else a path or stream URL.
+    """
+    return int(source) if isinstance(source, str) and source.isdigit() else source
+
+
+class FrameSource:
+    """
+    Base class of frame sources: read() returns the next BGR frame, or None at the end.
+
+    Attributes:
+        name (str): The source spec, for logs.
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        fps (float): Native frame rate; 30 when the source doesn't report one.
+        live (bool): True for cameras and streams.
+    """
+
+    name = ''
+    width = 0
+    height = 0
+    fps = 30.0
+    live = False
+
+    def read(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def release(self) -> None:
+        pass
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def __enter__(self) -> 'FrameSource':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class VideoSource(FrameSource):
+    """
+    A video file, camera index or stream URL read with cv2.VideoCapture.
+
+    Args:
+        source (Union[int, str]): Camera index, video file or stream URL.
+        realtime (bool, optional): Pace a video file at its native FPS, like a live camera. Defaults to False.
+    """
+
+    def __init__(self, source: Union[int, str], realtime: bool = False):
+        self.name = str(source)
+        self.live = isinstance(source, int) or str(source).startswith(STREAM_PREFIXES)
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Video source {source} not found or cannot be opened.")
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_interval = 1 / self.fps if realtime and not self.live else 0
+        self.next_frame = time.perf_counter()
+
+    def read(self) -> Optional[np.ndarray]:
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if self.frame_interval:
+            self.next_frame += self.frame_interval
+            time.sleep(max(0.0, self.next_frame - time.perf_counter()))
+        return frame
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class ImageSource(FrameSource):
+    """
+    Still images, from one image file or every image in a directory (sorted by name).
+
+    Args:
+        path (str): Image file or directory.
+        fps (float, optional): Frame rate reported for the sequence. Defaults to 30.
+    """
+
+    def __init__(self, path: str, fps: float = 30.0):
+        self.name = path
+        self.fps = fps
+        if os.path.isdir(path):
+            self.paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                          if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+        elif os.path.isfile(path):
+            self.paths = [path]
+        else:
+            raise FileNotFoundError(f"Image source {path} not found.")
+        self.index = 0
+
+        # Frame size of the first readable image
+        self.first = None
+        while self.first is None and self.index < len(self.paths):
+            self.first = cv2.imread(self.paths[self.index])
+            self.index += 1
+        if self.first is not None:
+            self.height, self.width = self.first.shape[:2]
+
+    def read(self) -> Optional[np.ndarray]:
+        if self.first is not None:
+            frame, self.first = self.first, None
+            return frame
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return frame
+            print(f"Skipping unreadable image {self.paths[self.index - 1]}")
+        return None
+
+
+def open_source(source: Union[int, str], realtime: bool = False) -> FrameSource:
+    """
+    Open a frame source from a spec: camera index, stream URL, image file or directory, or video file.
+
+    Args:
+        source (Union[int, str]): The source spec.
+        realtime (bool, optional): Pace video files at their native FPS. Defaults to False.
+
+    Returns:
+        FrameSource: The opened source.
+    """
+    if source is None or source == '':
+        raise ValueError('No source given. Pass one as an argument or set it in .env.')
+    source = parse_source(source)
+    if isinstance(source, str) and not source.startswith(STREAM_PREFIXES):
+        if os.path.isdir(source) or os.path.splitext(source)[1].lower() in IMAGE_EXTENSIONS:
+            return ImageSource(source)
+    return VideoSource(source, realtime)
+
+
+def source_list(sources: str) -> List[str]:
+    """
+    Split a comma separated list of source specs, e.g. the CAMERA_SOURCES setting.
+    """
+    return [source.strip() for source in sources.split(',') if source.strip()]
@@ -0,0 +1,258 @@
+# Inventory transaction store in SQLite, written from a background thread.
+#
+# The video loop only appends transactions to an in-memory queue and never waits on disk. A writer
+# thread owns the SQLite connection and flushes queued transactions with one executemany inside one
+# transaction, whenever BATCH_SIZE transactions are waiting or FLUSH_INTERVAL seconds have passed since
+# the first of them. The database runs in WAL mode with synchronous=NORMAL, so a commit appends to the
+# log without an fsync of the main database file, and readers never block the writer. Stopping the
+# writer (explicitly, by leaving its with block, or at interpreter exit) flushes everything still queued.
+#
+# The transactions table is the append-only log. A trigger keeps a stock table (current quantity per
+# class) and hourly per-class rollups up to date inside the same transaction as each insert, so current
+# stock is one row per class to read and reports aggregate hours instead of scanning the log.
+
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+DB_PATH = 'object_movement.db'
+
+# Flush when this many transactions are queued, or this many seconds after the oldest queued one
+BATCH_SIZE = 64
+FLUSH_INTERVAL = 1.0
+
+_STOP = object()
+
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        class_id TEXT,
+        movement INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_class_timestamp ON transactions (class_id, timestamp)',
+    # Current quantity per class
+    '''CREATE TABLE IF NOT EXISTS stock (
+        class_id TEXT PRIMARY KEY,
+        quantity INTEGER NOT NULL,
+        updated DATETIME
+    )''',
+    # Items added, removed and the net change per class and hour ('YYYY-MM-DD HH:00:00')
+    '''CREATE TABLE IF NOT EXISTS hourly_rollups (
+        hour TEXT NOT NULL,
+        class_id TEXT NOT NULL,
+        added INTEGER NOT NULL,
+        removed INTEGER NOT NULL,
+        net INTEGER NOT NULL,
+        PRIMARY KEY (hour, class_id)
+    )''',
+    # Every insert updates stock and the hourly rollup in the same transaction
+    '''CREATE TRIGGER IF NOT EXISTS transactions_materialize AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO stock (class_id, quantity, updated) VALUES (NEW.class_id, NEW.movement, NEW.timestamp)
+            ON CONFLICT (class_id) DO UPDATE SET quantity = quantity + NEW.movement, updated = NEW.timestamp;
+        INSERT INTO hourly_rollups (hour, class_id, added, removed, net)
+            VALUES (strftime('%Y-%m-%d %H:00:00', NEW.timestamp), NEW.class_id,
+                    MAX(NEW.movement, 0), MAX(-NEW.movement, 0), NEW.movement)
+            ON CONFLICT (hour, class_id) DO UPDATE SET added = added + MAX(NEW.movement, 0),
+                removed = removed + MAX(-NEW.movement, 0), net = net + NEW.movement;
+    END''',
+]
+
+ROLLUP_PERIODS = {'hour': '%Y-%m-%d %H:00:00', 'day': '%Y-%m-%d', 'month': '%Y-%m'}
+
+
+def connect(db_path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Open the inventory database in WAL mode and create the schema if it doesn't exist. A database from
+    before the stock and rollup tables existed has them backfilled from its transactions once.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    with conn:
+        had_stock = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stock'").fetchone()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        if not had_stock:
+            conn.execute('''INSERT INTO stock (class_id, quantity, updated)
+                            SELECT class_id, SUM(movement), MAX(timestamp) FROM transactions GROUP BY class_id''')
+            conn.execute('''INSERT INTO hourly_rollups (hour, class_id, added, removed, net)
+                            SELECT strftime('%Y-%m-%d %H:00:00', timestamp), class_id, SUM(MAX(movement, 0)),
+                                   SUM(MAX(-movement, 0)), SUM(movement)
+                            FROM transactions GROUP BY 1, class_id''')
+    return conn
+
+
+def current_stock(conn: sqlite3.Connection, in_stock_only: bool = True) -> Dict[str, int]:
+    """
+    Get the current quantity of every class from the stock table, without touching the transaction log.
+
+    Args:
+        conn (sqlite3.Connection): An inventory database connection.
+        in_stock_only (bool, optional): Leave out classes with a quantity of zero or less. Defaults to True.
+
+    Returns:
+        Dict[str, int]: Quantity per class.
+    """
+    query = 'SELECT class_id, quantity FROM stock' + (' WHERE quantity > 0' if in_stock_only else '') + ' ORDER BY class_id'
+    return dict(conn.execute(query).fetchall())
+
+
+def rollups(conn: sqlite3.Connection, period: str = 'day', since: Optional[str] = None,
+            class_id: Optional[str] = None) -> List[Tuple[str, str, int, int, int]]:
+    """
+    Get items added, removed and the net change per class and period, aggregated from the hourly rollups.
+
+    Args:
+        conn (sqlite3.Connection): An inventory database connection.
+        period (str, optional): 'hour', 'day' or 'month'. Defaults to 'day'.
+        since (str, optional): Only periods from this UTC timestamp ('YYYY-MM-DD[ HH:MM:SS]') on.
+        class_id (str, optional): Only this class.
+
+    Returns:
+        List[Tuple[str, str, int, int, int]]: (period, class_id, added, removed, net) rows, oldest first.
+    """
+    if period not in ROLLUP_PERIODS:
+        raise ValueError(f"Unknown rollup period '{period}'. Expected one of {tuple(ROLLUP_PERIODS)}.")
+    conditions, params = [], [ROLLUP_PERIODS[period]]
+    if since is not None:
+        conditions.append('hour >= strftime(?, ?)')
+        params += [ROLLUP_PERIODS['hour'], since]
+    if class_id is not None:
+        conditions.append('class_id = ?')
+        params.append(class_id)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    query = f'''SELECT strftime(?, hour) AS bucket, class_id, SUM(added), SUM(removed), SUM(net)
+                FROM hourly_rollups{where} GROUP BY bucket, class_id ORDER BY bucket, class_id'''
+    return conn.execute(query, params).fetchall()
+
+
+def insert_transactions(conn: sqlite3.Connection, rows: List[Tuple[str, int, str]]) -> None:
+    """
+    Insert (class_id, movement, timestamp) rows in a single transaction.
+    """
+    with conn:
+        conn.executemany('INSERT INTO transactions (class_id, movement, timestamp) VALUES (?, ?, ?)', rows)
+
+
+class TransactionWriter:
+    """
+    Queues inventory transactions and writes them to SQLite in batches from a background thread.
+
+    Args:
+        db_path (str, optional): SQLite database file. Defaults to 'object_movement.db'.
+        batch_size (int, optional): Flush as soon as this many transactions are queued. Defaults to 64.
+        flush_interval (float, optional): Flush at most this many seconds after a transaction was queued. Defaults to 1.0.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = queue.Queue()
+        self.stats = {'transactions': 0, 'flushes': 0, 'flush_seconds': 0.0}
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def post(self, class_id: str, movement: int) -> None:
+        """
+        Queue a transaction. Never blocks; the timestamp is taken now, not when the row is written.
+        """
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        self.pending.put_nowait((class_id, movement, timestamp))
+
+    def start(self) -> 'TransactionWriter':
+        """
+        Start the writer thread, once the database is open and its schema exists.
+        """
+        self._thread = threading.Thread(target=self.run, name='transaction-writer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        atexit.register(self.stop)
+        return self
+
+    def stop(self) -> None:
+        """
+        Flush every queued transaction and stop the writer thread. Safe to call more than once.
+        Re-raises the error that stopped the writer thread, if any, since its transactions were not written.
+        """
+        if self._thread is None:
+            return
+        self.pending.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'TransactionWriter':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def flush(self, conn: sqlite3.Connection, rows: List[Tuple[str, int, str]]) -> None:
+        started = time.perf_counter()
+        insert_transactions(conn, rows)
+        self.stats['transactions'] += len(rows)
+        self.stats['flushes'] += 1
+        self.stats['flush_seconds'] += time.perf_counter() - started
+
+    def run(self) -> None:
+        try:
+            conn = connect(self.db_path)
+        except sqlite3.Error as error:
+            self._error = error
+            self._ready.set()
+            return
+        self._ready.set()
+
+        try:
+            stopping = False
+            rows = []
+            while not stopping:
+                # Wait for the first transaction of a batch, then gather more until the batch is full or due
+                item = self.pending.get()
+                deadline = time.perf_counter() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    rows.append(item)
+                    if len(rows) >= self.batch_size:
+                        break
+                    remaining = deadline - time.perf_counter()
+                    try:
+                        item = self.pending.get(timeout=remaining) if remaining > 0 else self.pending.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    if rows:
+                        self.flush(conn, rows)
+                    rows = []
+                except sqlite3.OperationalError as error:
+                    # e.g. the database is locked by another process: keep the rows for the next flush
+                    print(f"Could not write {len(rows)} transactions, retrying with the next batch: {error}")
+                    if stopping:
+                        raise
+        except BaseException as error:
+            # Anything else (a malformed database, a constraint violation) stops the writer; stop() re-raises it
+            self._error = error
+            print(f"Transaction writer stopped, {len(rows) + self.pending.qsize()} transactions not written: {error}")
+        finally:
+            conn.close()
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the number of transactions written, flushes and mean transactions per flush.
+        """
+        return {**self.stats, 'mean_batch_size': self.stats['transactions'] / max(self.stats['flushes'], 1)}
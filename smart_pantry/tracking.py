@@ -0,0 +1,273 @@
+# Multi-object tracking by detection: every detection of every frame gets a stable track ID, so two
+# jars of the same class are counted separately and line-crossing logic can run per object.
+#
+# Each track has a constant-velocity Kalman filter over its box (center, size and their velocities).
+# All tracks are predicted and updated together as batched numpy arrays. Detections are matched to the
+# predicted boxes by a (1 - IoU) cost matrix; pairs that don't overlap enough can still match by centroid
+# distance (fast moves between frames), at a cost above every IoU match. The matrix is solved with
+# Hungarian assignment (scipy), or greedy assignment when scipy isn't installed. Detections of another
+# class never match a track.
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Matches below this IoU are rejected
+IOU_THRESHOLD = 0.2
+
+# Without enough overlap, match centroids up to this many predicted box diagonals apart
+CENTROID_DISTANCE = 0.5
+
+# Tracks are dropped after this many frames without a matching detection
+MAX_AGE = 15
+
+# Tracks are only reported after this many matched detections
+MIN_HITS = 2
+
+STATE_DIM = 8
+
+
+def xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    return np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2,
+                            boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]])
+
+
+def cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    half_w, half_h = boxes[:, 2] / 2, boxes[:, 3] / 2
+    return np.column_stack([boxes[:, 0] - half_w, boxes[:, 1] - half_h, boxes[:, 0] + half_w, boxes[:, 1] + half_h])
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute the IoU of every pair of xyxy boxes.
+
+    Returns:
+        np.ndarray: An (len(boxes_a), len(boxes_b)) array.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(1, -1, 4)
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iou = inter / (area_a + area_b - inter)
+    return np.nan_to_num(iou)
+
+
+def centroid_distances(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Compute the distance between the centers of every pair of xyxy boxes, in diagonals of the boxes_a box.
+
+    Returns:
+        np.ndarray: An (len(boxes_a), len(boxes_b)) array.
+    """
+    a = xyxy_to_cxcywh(boxes_a)[:, None]
+    b = xyxy_to_cxcywh(boxes_b)[None]
+    diagonal = np.maximum(np.hypot(a[..., 2], a[..., 3]), 1.0)
+    return np.hypot(a[..., 0] - b[..., 0], a[..., 1] - b[..., 1]) / diagonal
+
+
+def assign(cost: np.ndarray, max_cost: float) -> List[Tuple[int, int]]:
+    """
+    Match rows to columns of a cost matrix, minimizing the total cost, and reject pairs above max_cost.
+    Uses the Hungarian algorithm when scipy is available and greedy lowest-cost-first matching otherwise.
+
+    Returns:
+        List[Tuple[int, int]]: Matched (row, column) pairs.
+    """
+    if cost.size == 0:
+        return []
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(np.where(np.isfinite(cost), cost, 1e9))
+        return [(row, col) for row, col in zip(rows.tolist(), cols.tolist()) if cost[row, col] <= max_cost]
+
+    pairs = []
+    used_rows, used_cols = set(), set()
+    for flat in np.argsort(cost, axis=None):
+        row, col = divmod(int(flat), cost.shape[1])
+        if cost[row, col] > max_cost:
+            break
+        if row not in used_rows and col not in used_cols:
+            pairs.append((row, col))
+            used_rows.add(row)
+            used_cols.add(col)
+    return pairs
+
+
+class Tracker:
+    """
+    Assigns stable IDs to detections across frames.
+
+    Args:
+        iou_threshold (float, optional): Minimum IoU between a detection and a predicted track box. Defaults to 0.2.
+        centroid_distance (float, optional): Without enough overlap, maximum centroid distance in predicted
+            box diagonals. Defaults to 0.5.
+        max_age (int, optional): Frames a track survives without a matching detection. Defaults to 15.
+        min_hits (int, optional): Matched detections before a track is reported. Defaults to 2.
+    """
+
+    def __init__(self, iou_threshold: float = IOU_THRESHOLD, centroid_distance: float = CENTROID_DISTANCE,
+                 max_age: int = MAX_AGE, min_hits: int = MIN_HITS):
+        self.iou_threshold = iou_threshold
+        self.centroid_distance = centroid_distance
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.next_id = 1
+
+        # One row per track
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.classes = np.zeros(0, dtype=np.int64)
+        self.confidences = np.zeros(0)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.misses = np.zeros(0, dtype=np.int64)
+        self.state = np.zeros((0, STATE_DIM))
+        self.covariance = np.zeros((0, STATE_DIM, STATE_DIM))
+
+        # Constant velocity: position += velocity every frame
+        self.transition = np.eye(STATE_DIM)
+        self.transition[:4, 4:] = np.eye(4)
+        self.observation = np.eye(4, STATE_DIM)
+
+    def noise(self, sizes: np.ndarray, position_weight: float, velocity_weight: float) -> np.ndarray:
+        """
+        Diagonal noise covariances that scale with each box's size, so large and small boxes are equally uncertain.
+        """
+        scale = np.maximum(sizes[:, [3, 3, 3, 3]], 1.0)
+        scale[:, 2] = np.maximum(sizes[:, 2], 1.0)
+        std = np.concatenate([position_weight * scale, velocity_weight * scale], axis=1)
+        return std[:, :, None] ** 2 * np.eye(STATE_DIM)[None]
+
+    def predict(self) -> np.ndarray:
+        """
+        Advance every track one frame and return the predicted xyxy boxes.
+        """
+        if len(self.ids):
+            self.state = self.state @ self.transition.T
+            process = self.noise(self.state[:, :4], 1 / 20, 1 / 160)
+            self.covariance = self.transition @ self.covariance @ self.transition.T + process
+            self.state[:, 2:4] = np.maximum(self.state[:, 2:4], 1.0)
+        return cxcywh_to_xyxy(self.state[:, :4])
+
+    def correct(self, track_rows: np.ndarray, measurements: np.ndarray) -> None:
+        """
+        Kalman update of the given tracks with their matched cxcywh measurements.
+        """
+        H = self.observation
+        P = self.covariance[track_rows]
+        x = self.state[track_rows]
+        R = self.noise(measurements, 1 / 20, 0)[:, :4, :4]
+        S = H @ P @ H.T + R
+        K = P @ H.T @ np.linalg.inv(S)
+        innovation = measurements - x @ H.T
+        self.state[track_rows] = x + np.einsum('nij,nj->ni', K, innovation)
+        self.covariance[track_rows] = (np.eye(STATE_DIM) - K @ H) @ P
+
+    def update(self, boxes: np.ndarray, confidences: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        """
+        Match one frame's detections to the tracks and start new tracks for unmatched detections.
+
+        Args:
+            boxes (np.ndarray): (n, 4) xyxy detection boxes.
+            confidences (np.ndarray): (n,) detection confidences.
+            classes (np.ndarray): (n,) detection class indices.
+
+        Returns:
+            np.ndarray: (n,) track ID of every detection; 0 for detections whose track isn't confirmed yet.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float64).reshape(-1)
+        classes = np.asarray(classes, dtype=np.int64).reshape(-1)
+
+        predicted = self.predict()
+        iou = iou_matrix(predicted, boxes)
+        distance = centroid_distances(predicted, boxes)
+        cost = np.where(iou >= self.iou_threshold, 1 - iou, 1 + distance)
+        cost[(self.classes[:, None] != classes[None, :]) | ((iou < self.iou_threshold) & (distance > self.centroid_distance))] = np.inf
+        pairs = assign(cost, 1 + self.centroid_distance)
+
+        detection_rows = np.full(len(boxes), -1, dtype=np.int64)
+        if pairs:
+            track_rows, matched = (np.array(indices) for indices in zip(*pairs))
+            self.correct(track_rows, xyxy_to_cxcywh(boxes[matched]))
+            self.confidences[track_rows] = confidences[matched]
+            self.hits[track_rows] += 1
+            detection_rows[matched] = track_rows
+        self.misses += 1
+        self.misses[detection_rows[detection_rows >= 0]] = 0
+
+        new = np.flatnonzero(detection_rows < 0)
+        if len(new):
+            measurements = xyxy_to_cxcywh(boxes[new])
+            detection_rows[new] = np.arange(len(self.ids), len(self.ids) + len(new))
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + len(new))])
+            self.next_id += len(new)
+            self.classes = np.concatenate([self.classes, classes[new]])
+            self.confidences = np.concatenate([self.confidences, confidences[new]])
+            self.hits = np.concatenate([self.hits, np.ones(len(new), dtype=np.int64)])
+            self.misses = np.concatenate([self.misses, np.zeros(len(new), dtype=np.int64)])
+            self.state = np.concatenate([self.state, np.column_stack([measurements, np.zeros((len(new), 4))])])
+            initial = self.noise(measurements, 2 / 20, 10 / 160)
+            self.covariance = np.concatenate([self.covariance, initial])
+
+        track_ids = np.where(self.hits[detection_rows] >= self.min_hits, self.ids[detection_rows], 0)
+
+        # Drop tracks that went unmatched too long
+        alive = self.misses <= self.max_age
+        if not alive.all():
+            for name in ['ids', 'classes', 'confidences', 'hits', 'misses', 'state', 'covariance']:
+                setattr(self, name, getattr(self, name)[alive])
+        return track_ids
+
+    def track(self, detections):
+        """
+        Update the tracks with a frame's Detections and set their track_id array (0 while a track isn't confirmed).
+        """
+        detections.track_id = self.update(detections.xyxy, detections.confidence, detections.class_id)
+        return detections
+
+    def tracks(self) -> List[Dict]:
+        """
+        Get the confirmed tracks matched in the latest frame, with their filtered xyxy boxes.
+        """
+        boxes = cxcywh_to_xyxy(self.state[:, :4])
+        visible = np.flatnonzero((self.hits >= self.min_hits) & (self.misses == 0))
+        return [{'id': int(self.ids[row]), 'class': int(self.classes[row]), 'confidence': float(self.confidences[row]),
+                 'box': boxes[row].tolist()} for row in visible]
+
+    def active_ids(self) -> set:
+        """
+        Get the IDs of all tracks still alive, confirmed or not.
+        """
+        return set(self.ids.tolist())
+
+
+def update_regions(regions: Dict[int, str], track_ids: np.ndarray, current: List[str]) -> List[Tuple[int, str, str]]:
+    """
+    Record the region (hemisphere, quadrant, ...) every confirmed track is in and report the tracks that changed region.
+
+    Args:
+        regions (Dict[int, str]): Last region per track ID, updated in place.
+        track_ids (np.ndarray): Track ID per detection, 0 for unconfirmed tracks.
+        current (List[str]): Region of every detection.
+
+    Returns:
+        List[Tuple[int, str, str]]: (track ID, previous region, new region) of every track that changed region.
+    """
+    changes = []
+    for track_id, region in zip(track_ids.tolist(), current):
+        if not track_id:
+            continue
+        previous = regions.get(track_id, region)
+        if previous != region:
+            changes.append((track_id, previous, region))
+        regions[track_id] = region
+    return changes
@@ -0,0 +1,174 @@
+# Zones and tripwires for line-crossing events, loaded from a YAML config instead of a hard-coded split
+# at frame_width / 2.
+#
+# Zones are polygons and tripwires are directed line segments, both in fractions of the frame size so one
+# config fits every resolution. For each frame resolution the zones are rasterized once into a per-pixel
+# zone-ID image; finding the zone of every track centroid is then a single array index, with no polygon
+# math per frame. Tripwires are tested against each track's step since the previous frame with vectorized
+# segment intersection.
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+ZONES_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'zones.yaml')
+
+# Without a config file: the left half is 'A' (taking an item out of the pantry is -1) and the right half 'B' (+1)
+DEFAULT_ZONES = [
+    {'name': 'A', 'polygon': [[0, 0], [0.5, 0], [0.5, 1], [0, 1]], 'movement': -1},
+    {'name': 'B', 'polygon': [[0.5, 0], [1, 0], [1, 1], [0.5, 1]], 'movement': 1},
+]
+
+
+class ZoneMap:
+    """
+    Zones and tripwires of one camera view.
+
+    Args:
+        zones (List[Dict]): Zones with a 'name', a 'polygon' of [x, y] frame fractions and an optional
+            'movement' posted when a track enters the zone. Later zones are drawn over earlier ones where they overlap.
+        tripwires (List[Dict], optional): Tripwires with a 'name', 'start' and 'end' [x, y] frame fractions and an
+            optional 'movement' posted when a track crosses in the positive direction (negated the other way).
+    """
+
+    def __init__(self, zones: List[Dict], tripwires: Optional[List[Dict]] = None):
+        if len(zones) > 254:
+            raise ValueError(f"At most 254 zones are supported, got {len(zones)}.")
+        self.zones = zones
+        self.tripwires = tripwires or []
+        self.names = [None] + [zone['name'] for zone in zones]
+        self.movements = {zone['name']: zone['movement'] for zone in zones if zone.get('movement')}
+        self.wire_movements = {wire['name']: wire.get('movement', 0) for wire in self.tripwires}
+        self.wire_points = np.array([[wire['start'], wire['end']] for wire in self.tripwires], dtype=np.float64).reshape(-1, 2, 2)
+        self._rasters = {}
+
+    def raster(self, width: int, height: int, margin: int = 0) -> np.ndarray:
+        """
+        Get the (height, width) zone-ID image for a frame size: 0 outside every zone, i + 1 inside zone i.
+        Built on first use per resolution and margin.
+
+        Args:
+            width (int): Frame width.
+            height (int): Frame height.
+            margin (int, optional): Shrink every zone by this many pixels from its borders with other zones,
+                leaving a band of 0 around each border. Defaults to 0.
+        """
+        key = (width, height, margin)
+        if key not in self._rasters:
+            if margin > 0:
+                full = self.raster(width, height)
+                raster = np.zeros_like(full)
+                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * margin + 1, 2 * margin + 1))
+                for zone_id in range(1, len(self.zones) + 1):
+                    # The frame edge isn't a border: erode pads with the maximum value
+                    core = cv2.erode((full == zone_id).astype(np.uint8), kernel)
+                    raster[core > 0] = zone_id
+            else:
+                raster = np.zeros((height, width), dtype=np.uint8)
+                scale = np.array([width, height], dtype=np.float64)
+                for zone_id, zone in enumerate(self.zones, start=1):
+                    polygon = np.round(np.asarray(zone['polygon'], dtype=np.float64) * scale).astype(np.int32)
+                    cv2.fillPoly(raster, [polygon], zone_id)
+            self._rasters[key] = raster
+        return self._rasters[key]
+
+    def zone_ids(self, points: np.ndarray, width: int, height: int, margin: int = 0) -> np.ndarray:
+        """
+        Get the zone ID of every (x, y) pixel point, 0 outside every zone (or within margin of a zone border).
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x = np.clip(points[:, 0].astype(np.int64), 0, width - 1)
+        y = np.clip(points[:, 1].astype(np.int64), 0, height - 1)
+        return self.raster(width, height, margin)[y, x]
+
+    def zone_names(self, points: np.ndarray, width: int, height: int, margin: int = 0) -> List[Optional[str]]:
+        """
+        Get the zone name of every (x, y) pixel point, None outside every zone (or within margin of a zone border).
+        """
+        return [self.names[zone_id] for zone_id in self.zone_ids(points, width, height, margin).tolist()]
+
+    def wire_sides(self, points: np.ndarray, width: int, height: int, margin: float = 0) -> np.ndarray:
+        """
+        Get the side of every tripwire each (x, y) pixel point is on.
+
+        Returns:
+            np.ndarray: (n, number of tripwires) array of +1 left of a wire drawn top to bottom, -1 right of it,
+            and 0 within margin pixels of the wire or beyond its ends.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        wires = self.wire_points * np.array([width, height])
+        start, direction = wires[None, :, 0], wires[None, :, 1] - wires[None, :, 0]
+        length = np.maximum(np.hypot(direction[..., 0], direction[..., 1]), 1e-9)
+        offset = points - start
+        distance = (direction[..., 0] * offset[..., 1] - direction[..., 1] * offset[..., 0]) / length
+        along = (offset * direction).sum(axis=-1) / length ** 2
+        sides = np.where(distance > 0, 1, -1)
+        sides[(np.abs(distance) <= margin) | (along < 0) | (along > 1)] = 0
+        return sides
+
+    def crossed_tripwires(self, previous: Dict[int, Tuple[float, float]], track_ids: np.ndarray, points: np.ndarray,
+                          width: int, height: int) -> List[Tuple[int, str, int]]:
+        """
+        Find the tripwires every confirmed track crossed since its previous point, and record its current point.
+
+        Args:
+            previous (Dict[int, Tuple[float, float]]): Last (x, y) pixel point per track ID, updated in place.
+            track_ids (np.ndarray): Track ID per point, 0 for unconfirmed tracks.
+            points (np.ndarray): (n, 2) current (x, y) pixel points.
+            width (int): Frame width.
+            height (int): Frame height.
+
+        Returns:
+            List[Tuple[int, str, int]]: (track ID, tripwire name, direction) per crossing. Direction is +1 when
+            the track moves from the left to the right of a wire drawn top to bottom, -1 the other way.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        track_ids = np.asarray(track_ids).reshape(-1)
+        confirmed = np.flatnonzero(track_ids > 0)
+        known = [index for index in confirmed.tolist() if int(track_ids[index]) in previous]
+        crossings = []
+        if known and len(self.wire_points):
+            start_points = np.array([previous[int(track_ids[index])] for index in known])[:, None]
+            end_points = points[known][:, None]
+            wires = self.wire_points * np.array([width, height])
+            wire_start, wire_end = wires[None, :, 0], wires[None, :, 1]
+
+            def cross(origin, a, b):
+                return (a[..., 0] - origin[..., 0]) * (b[..., 1] - origin[..., 1]) - (a[..., 1] - origin[..., 1]) * (b[..., 0] - origin[..., 0])
+
+            # The step crosses the wire when its ends lie on opposite sides of the wire and vice versa
+            side_before = cross(wire_start, wire_end, start_points)
+            side_after = cross(wire_start, wire_end, end_points)
+            wire_side_a = cross(start_points, end_points, wire_start)
+            wire_side_b = cross(start_points, end_points, wire_end)
+            crossed = (side_before * side_after < 0) & (wire_side_a * wire_side_b < 0)
+            for row, wire in zip(*np.nonzero(crossed)):
+                direction = 1 if side_before[row, wire] > 0 else -1
+                crossings.append((int(track_ids[known[row]]), self.tripwires[wire]['name'], direction))
+
+        for index in confirmed.tolist():
+            previous[int(track_ids[index])] = tuple(points[index].tolist())
+        return crossings
+
+
+def load_zone_map(config_path: Optional[str] = None) -> ZoneMap:
+    """
+    Load zones and tripwires from a YAML config with 'zones' and 'tripwires' lists.
+
+    Args:
+        config_path (str, optional): Config file. Defaults to the ZONES_CONFIG environment variable,
+            then config/zones.yaml. Without a config file the frame is split into halves 'A' and 'B'.
+
+    Returns:
+        ZoneMap: The loaded zones and tripwires.
+    """
+    config_path = config_path or os.getenv('ZONES_CONFIG') or ZONES_CONFIG
+    if not os.path.exists(config_path):
+        return ZoneMap(DEFAULT_ZONES)
+
+    with open(config_path, 'r') as file:
+        config = yaml.safe_load(file) or {}
+    return ZoneMap(config.get('zones') or [], config.get('tripwires') or [])
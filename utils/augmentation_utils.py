@@ -5,6 +5,9 @@ import random
 def oversample_class(class_dir, target_size):
     """
     Oversample a class by duplicating its images until it reaches the target size.
+
+    Superseded by weighted sampling (yolo_train/weighted_trainer.py), which balances classes
+    without copying files. The copies made here have no label files.
     
     Args:
         class_dir (str): Directory containing images of the class to oversample.
@@ -0,0 +1,198 @@
+# Near-duplicate image detection with perceptual hashes.
+#
+# Every image gets a 64 bit difference hash (dHash): the image is shrunk to 9x8 grayscale pixels and
+# each bit records whether a pixel is brighter than its right neighbour. Resized, re-encoded and lightly
+# augmented copies of a photo hash within a few bits of each other. Near-duplicates are found with
+# multi-index hashing: the hash is cut into max_distance + 1 chunks, every chunk indexes a hash table, and
+# only images sharing a chunk are compared, instead of every pair. Connected matches are merged into
+# clusters with union-find.
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils.split_utils import source_id
+
+DEDUP_MODES = ('group', 'collapse')
+HASH_SIZE = 8
+
+# Maximum Hamming distance between the dHashes of two near-duplicates
+MAX_DISTANCE = 6
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def image_dhash(image_path: str, hash_size: int = HASH_SIZE) -> Optional[int]:
+    """
+    Compute the difference hash of an image.
+
+    Args:
+        image_path (str): Path to the image.
+        hash_size (int, optional): Side of the hash grid; the hash has hash_size ** 2 bits. Defaults to 8.
+
+    Returns:
+        Optional[int]: The hash, or None if the image can't be decoded.
+    """
+    try:
+        with Image.open(image_path) as img:
+            img.draft('L', (hash_size * 4, hash_size * 4))
+            pixels = np.asarray(img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR), dtype=np.int16)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hash_images(image_paths: List[str], workers: Optional[int] = None) -> List[Optional[int]]:
+    """
+    Compute the difference hashes of many images in parallel.
+
+    Args:
+        image_paths (List[str]): Paths to the images.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        List[Optional[int]]: The hash of each image, None where the image can't be decoded.
+    """
+    if not image_paths:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(image_dhash, image_paths, chunksize=64))
+
+
+def hash_chunks(max_distance: int, bits: int = HASH_SIZE ** 2) -> List[Tuple[int, int]]:
+    """
+    Split the hash bits into max_distance + 1 contiguous (start, end) ranges. Two hashes within
+    max_distance of each other differ in at most max_distance ranges, so they agree exactly on at least one.
+    """
+    bounds = np.linspace(0, bits, min(max_distance + 1, bits) + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def hamming_distances(values: np.ndarray, value: int) -> np.ndarray:
+    """
+    Get the Hamming distances between an array of uint64 hashes and one hash.
+    """
+    differing = np.ascontiguousarray(values ^ np.uint64(value)).view(np.uint8)
+    return POPCOUNT[differing].reshape(-1, 8).sum(axis=1)
+
+
+def find_root(parents: List[int], index: int) -> int:
+    while parents[index] != index:
+        parents[index] = parents[parents[index]]
+        index = parents[index]
+    return index
+
+
+def union(parents: List[int], a: int, b: int) -> None:
+    root_a, root_b = find_root(parents, a), find_root(parents, b)
+    if root_a != root_b:
+        parents[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def find_duplicate_clusters(hashes: List[Optional[int]], max_distance: int = MAX_DISTANCE) -> List[List[int]]:
+    """
+    Cluster near-duplicate images. Two images are in one cluster if a chain of images, each within
+    max_distance of the next, connects them.
+
+    Each image only has its distance computed to the earlier images that share one of its hash
+    chunks exactly, which is every image within max_distance and few others.
+
+    Args:
+        hashes (List[Optional[int]]): The difference hash of each image. None entries are never clustered.
+        max_distance (int, optional): Maximum Hamming distance of a near-duplicate pair. Defaults to 6.
+
+    Returns:
+        List[List[int]]: Sorted indices of every cluster with more than one image.
+    """
+    indices = [index for index, value in enumerate(hashes) if value is not None]
+    values = np.array([hashes[index] for index in indices], dtype=np.uint64)
+    chunks = hash_chunks(max_distance)
+    tables = [{} for _ in chunks]
+
+    parents = list(range(len(hashes)))
+    for position, index in enumerate(indices):
+        value = hashes[index]
+        candidates = []
+        for table, (start, end) in zip(tables, chunks):
+            bucket = table.setdefault((value >> start) & ((1 << (end - start)) - 1), [])
+            candidates.extend(bucket)
+            bucket.append(position)
+        if not candidates:
+            continue
+        candidates = np.unique(candidates)
+        for match in candidates[hamming_distances(values[candidates], value) <= max_distance]:
+            union(parents, index, indices[match])
+
+    clusters = {}
+    for index in indices:
+        clusters.setdefault(find_root(parents, index), []).append(index)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def cluster_keys(image_paths: List[str], clusters: List[List[int]]) -> List[str]:
+    """
+    Get a split group key per image that joins Roboflow variants of one photo (same source_id) and
+    near-duplicate clusters, so stratified_hash_split keeps each joined group in a single split.
+
+    Args:
+        image_paths (List[str]): Paths of the images the clusters index into.
+        clusters (List[List[int]]): Near-duplicate clusters from find_duplicate_clusters.
+
+    Returns:
+        List[str]: The group key of each image: the smallest source_id of its group.
+    """
+    keys = [source_id(image_path) for image_path in image_paths]
+    parents = list(range(len(image_paths)))
+    first_with_key = {}
+    for index, key in enumerate(keys):
+        union(parents, index, first_with_key.setdefault(key, index))
+    for members in clusters:
+        for index in members[1:]:
+            union(parents, members[0], index)
+
+    group_key = {}
+    for index, key in enumerate(keys):
+        root = find_root(parents, index)
+        group_key[root] = min(group_key.get(root, key), key)
+    return [group_key[find_root(parents, index)] for index in range(len(image_paths))]
+
+
+def collapse_clusters(clusters: List[List[int]]) -> List[int]:
+    """
+    Pick the images to drop so one image per near-duplicate cluster remains (the first of each cluster).
+
+    Returns:
+        List[int]: Sorted indices of the images to drop.
+    """
+    return sorted(index for members in clusters for index in members[1:])
+
+
+def cluster_report(image_paths: List[str], clusters: List[List[int]], split_of: Dict[str, str]) -> Dict:
+    """
+    Summarize near-duplicate clusters, flagging those that span more than one split.
+
+    Args:
+        image_paths (List[str]): Paths of the images the clusters index into.
+        clusters (List[List[int]]): Near-duplicate clusters from find_duplicate_clusters.
+        split_of (Dict[str, str]): Split name of each image path.
+
+    Returns:
+        Dict: A 'summary' with counts and the list of 'clusters' with their images and splits.
+    """
+    entries = []
+    for members in clusters:
+        paths = [image_paths[index] for index in members]
+        splits = sorted({split_of.get(path, '') for path in paths})
+        entries.append({'images': paths, 'splits': splits, 'cross_split': len(splits) > 1})
+
+    summary = {
+        'images': len(image_paths),
+        'clusters': len(entries),
+        'duplicate_images': sum(len(entry['images']) - 1 for entry in entries),
+        'cross_split_clusters': sum(entry['cross_split'] for entry in entries),
+    }
+    return {'summary': summary, 'clusters': sorted(entries, key=lambda entry: (not entry['cross_split'], entry['images'][0]))}
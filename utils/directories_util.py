@@ -3,6 +3,8 @@
 import os
 from typing import List
 
+from utils.scan_utils import scan_dir
+
 def list_subdirectories(directory: str) -> List[str]:
     """
     List all subdirectories within a given directory.
@@ -13,7 +15,8 @@ def list_subdirectories(directory: str) -> List[str]:
     Returns:
         List[str]: A list of paths to subdirectories.
     """
-    return [os.path.join(directory, sub_dir) for sub_dir in os.listdir(directory) if os.path.isdir(os.path.join(directory, sub_dir))]
+    dirs, _ = scan_dir(directory)
+    return [dirs[name] for name in sorted(dirs)]
 
 
 def list_files_in_directory(directory: str, file_extension: str = None) -> List[str]:
@@ -27,10 +30,8 @@ def list_files_in_directory(directory: str, file_extension: str = None) -> List[
     Returns:
         List[str]: A list of file paths.
     """
-    files = [os.path.join(directory, file) for file in os.listdir(directory) if (os.path.isfile(os.path.join(directory, file))) & (os.path)]
-    if file_extension:
-        return [file for file in files if file.endswith(file_extension)]
-    return files
+    _, files = scan_dir(directory)
+    return [os.path.join(directory, name) for name in sorted(files) if not file_extension or name.endswith(file_extension)]
 
 
 
@@ -0,0 +1,85 @@
+# Utilities to materialize dataset files as copies or links of their source files
+
+import os
+import sys
+import errno
+import shutil
+
+MATERIALIZE_MODES = ('copy', 'hardlink', 'reflink', 'symlink')
+
+# ioctl request that clones a file's extents on Linux filesystems that support it (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+# Errors meaning the filesystem cannot link or clone these two paths, so a copy is made instead
+FALLBACK_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.EINVAL, errno.ENOTTY,
+                   errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+_warned_modes = set()
+
+
+def reflink_file(src: str, dst: str) -> None:
+    """
+    Create a copy-on-write clone of src at dst. Only supported on Linux.
+
+    Raises:
+        OSError: If the platform or filesystem does not support reflinks.
+    """
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, 'reflink is only supported on Linux', src)
+
+    import fcntl
+
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+    shutil.copymode(src, dst)
+
+
+def materialize_file(src: str, dst: str, mode: str = 'copy') -> str:
+    """
+    Place src at dst as a copy, hardlink, reflink or symlink, falling back to a copy when
+    the filesystem does not support the requested mode.
+
+    The destination is always replaced, never written through, so an existing hardlink at dst
+    can't modify the source it points to.
+
+    Args:
+        src (str): Path of the source file.
+        dst (str): Destination path.
+        mode (str, optional): One of MATERIALIZE_MODES. Defaults to 'copy'.
+
+    Returns:
+        str: The mode that was actually used.
+    """
+    if mode not in MATERIALIZE_MODES:
+        raise ValueError(f"Unknown materialize mode '{mode}'. Expected one of {MATERIALIZE_MODES}.")
+
+    tmp_dst = dst + '.tmp'
+    if os.path.lexists(tmp_dst):
+        os.remove(tmp_dst)
+
+    used_mode = mode
+    try:
+        if mode == 'hardlink':
+            os.link(src, tmp_dst)
+        elif mode == 'reflink':
+            reflink_file(src, tmp_dst)
+        elif mode == 'symlink':
+            os.symlink(os.path.abspath(src), tmp_dst)
+        else:
+            shutil.copy(src, tmp_dst)
+    except OSError as e:
+        if mode == 'copy' or e.errno not in FALLBACK_ERRNOS:
+            raise
+        if mode not in _warned_modes:
+            print(f"Warning: {mode} not supported for {dst} ({e.strerror}). Falling back to copy.")
+            _warned_modes.add(mode)
+        shutil.copy(src, tmp_dst)
+        used_mode = 'copy'
+
+    os.replace(tmp_dst, dst)
+    return used_mode
@@ -1,19 +1,120 @@
 # Library for functionality and manipulation of images for output YOLO files
 
 import os
-from typing import List, Tuple
-from PIL import Image
+import json
+import shutil
+from typing import List, Tuple, Dict
+from PIL import Image, ImageOps
 from pprint import pprint
 
+EXIF_ORIENTATION_TAG = 0x0112
+IMAGE_META_FILE = '.image_meta.json'
+QUARANTINE_DIR = 'quarantine'
+
 
 
 def get_img_size(img_path):
-    img = Image.open(img_path)
-    # Get original image size
-    img_size = img.size
+    # Only the header is read; the file is closed as soon as the size is known
+    with Image.open(img_path) as img:
+        img_size = img.size
     return img_size
 
 
+def inspect_image(img_path: str, full_decode: bool = True) -> Dict:
+    """
+    Decode an image and read its dimensions, format and EXIF orientation.
+
+    Args:
+        img_path (str): Path to the image.
+        full_decode (bool, optional): Decode every pixel, which catches truncated and corrupt JPEGs.
+            If False only the header and structure are verified. Defaults to True.
+
+    Returns:
+        Dict: 'ok', 'error', 'width', 'height', 'format' and 'orientation' (1 means upright).
+    """
+    try:
+        with Image.open(img_path) as img:
+            width, height = img.size
+            meta = {'ok': True, 'error': None, 'width': width, 'height': height, 'format': img.format,
+                    'orientation': int(img.getexif().get(EXIF_ORIENTATION_TAG, 1))}
+            if full_decode:
+                img.load()
+            else:
+                img.verify()
+        return meta
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return {'ok': False, 'error': f'{type(e).__name__}: {e}', 'width': None, 'height': None, 'format': None, 'orientation': None}
+
+
+def fix_exif_orientation(img_path: str, quality: int = 95) -> Tuple[int, int]:
+    """
+    Rotate an image's pixels to match its EXIF orientation and drop the tag, so every reader
+    (PIL, OpenCV, Ultralytics) sees the same upright image. The file is replaced atomically.
+
+    Args:
+        img_path (str): Path to the image.
+        quality (int, optional): JPEG quality used when re-encoding. Defaults to 95.
+
+    Returns:
+        Tuple[int, int]: The upright (width, height).
+    """
+    with Image.open(img_path) as img:
+        img_format = img.format
+        upright = ImageOps.exif_transpose(img)
+    exif = upright.getexif()
+    exif.pop(EXIF_ORIENTATION_TAG, None)
+
+    tmp_path = img_path + '.tmp'
+    save_kwargs = {'quality': quality} if img_format == 'JPEG' else {}
+    upright.save(tmp_path, format=img_format, exif=exif, **save_kwargs)
+    os.replace(tmp_path, img_path)
+    return upright.size
+
+
+def quarantine_image(img_path: str, root_dir: str) -> str:
+    """
+    Move an image and its label file out of the dataset into <root_dir>/quarantine, keeping their
+    relative paths so they can be inspected or restored.
+
+    Args:
+        img_path (str): Path to the image.
+        root_dir (str): The dataset root.
+
+    Returns:
+        str: The quarantined image path.
+    """
+    quarantined = None
+    for path in [img_path, convert_imgpath_to_labelpath(img_path)]:
+        if not os.path.exists(path):
+            continue
+        dest = os.path.join(root_dir, QUARANTINE_DIR, os.path.relpath(path, root_dir))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.move(path, dest)
+        quarantined = quarantined or dest
+    return quarantined
+
+
+def load_image_meta(root_dir: str) -> Dict[str, Dict]:
+    """
+    Load the image metadata cache of a dataset, keyed by image path relative to root_dir.
+    """
+    meta_path = os.path.join(root_dir, IMAGE_META_FILE)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, 'r') as file:
+        return json.load(file)
+
+
+def save_image_meta(root_dir: str, image_meta: Dict[str, Dict]) -> None:
+    """
+    Atomically write the image metadata cache of a dataset.
+    """
+    meta_path = os.path.join(root_dir, IMAGE_META_FILE)
+    with open(meta_path + '.tmp', 'w') as file:
+        json.dump(image_meta, file)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
 
 def convert_imgpath_to_labelpath(img_filepath: str) -> str:
     """
@@ -22,7 +123,9 @@ def convert_imgpath_to_labelpath(img_filepath: str) -> str:
     Returns:
         Label filepath
     """
-    label_filepath = img_filepath.replace('.jpg', '.txt').replace('images', 'labels')
+    # Same rule as Ultralytics: swap the last 'images' directory for 'labels' and the extension for .txt
+    images_sep, labels_sep = f'{os.sep}images{os.sep}', f'{os.sep}labels{os.sep}'
+    label_filepath = os.path.splitext(labels_sep.join(img_filepath.rsplit(images_sep, 1)))[0] + '.txt'
 
     return label_filepath
 
@@ -36,9 +139,3 @@ def get_image_label_pairs(images_dir: str) -> List[Tuple[str, str]]:
 
     return [(os.path.join(images_dir, img), convert_imgpath_to_labelpath(os.path.join(images_dir, img))) for img in image_files]
 
-
-tuple_list = get_image_label_pairs('/Users/laffer/Desktop/smart_pantry_model/yolo_model/train/images')
-
-assert tuple_list[0] != tuple_list[1]
-
-pprint(tuple_list)
\ No newline at end of file
@@ -0,0 +1,181 @@
+# Packed binary label store: every box of a split in one array instead of one small txt file per image.
+#
+# A store is a directory holding:
+#   classes.npy  uint16 (n_boxes,)     class index of every box
+#   boxes.npy    float32 (n_boxes, 4)  normalized x_center, y_center, width, height
+#   offsets.npy  int64 (n_images + 1,) boxes of image i are rows offsets[i]:offsets[i + 1]
+#   names.txt    one label file path per image, relative to the dataset root
+# The .npy files are loaded with np.load(mmap_mode='r'), which returns np.memmap arrays.
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from utils.label_utils import read_label_array, format_label_lines, write_label_files, remap_classes
+
+STORE_ARRAYS = ('classes', 'boxes', 'offsets')
+
+# Directory under the model directory holding one store per split
+LABEL_STORE_DIR = 'label_store'
+CHUNK_SIZE = 256
+# Largest class index classes.npy (uint16) can hold
+MAX_CLASS = np.iinfo(np.uint16).max
+
+
+def read_label_chunk(label_files: List[str]) -> List[np.ndarray]:
+    """
+    Read a chunk of label files into (n_boxes, 5) arrays. Missing files give an empty array, the
+    same way YOLO treats an image without a label file as background.
+
+    Raises:
+        ValueError: Naming the file, if a row is malformed or a class is not an integer in [0, 65535].
+    """
+    arrays = []
+    for label_file in label_files:
+        if not os.path.exists(label_file):
+            arrays.append(np.zeros((0, 5)))
+            continue
+        try:
+            labels = read_label_array(label_file)
+        except ValueError as e:
+            raise ValueError(f"{label_file}: {e}") from e
+        classes = labels[:, 0]
+        bad_rows = np.flatnonzero(~np.isfinite(classes) | (classes != np.round(classes)) | (classes < 0) | (classes > MAX_CLASS))
+        if len(bad_rows):
+            # Casting to uint16 would silently wrap them into valid-looking classes (-1 becomes 65535)
+            raise ValueError(f"{label_file}: class must be an integer in [0, {MAX_CLASS}], rows {(bad_rows + 1).tolist()} are not")
+        arrays.append(labels)
+    return arrays
+
+
+def pack_labels(label_files: List[str], root_dir: str, workers: Optional[int] = None, box_dtype: type = np.float32) -> Dict:
+    """
+    Read YOLO label files in parallel into a packed label store.
+
+    Args:
+        label_files (List[str]): Label files, one per image, in the order images should be indexed.
+        root_dir (str): The dataset root the stored names are made relative to.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        box_dtype (type, optional): Box dtype. Saved stores are float32; in-memory txt to txt
+            transforms can keep float64. Defaults to np.float32.
+
+    Returns:
+        Dict: The store with 'names', 'classes', 'boxes' and 'offsets'.
+
+    Raises:
+        ValueError: If a label file is malformed.
+    """
+    chunks = [label_files[i:i + CHUNK_SIZE] for i in range(0, len(label_files), CHUNK_SIZE)]
+    arrays = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_arrays in executor.map(read_label_chunk, chunks):
+            arrays.extend(chunk_arrays)
+
+    counts = np.array([len(array) for array in arrays], dtype=np.int64)
+    labels = np.concatenate(arrays) if arrays else np.zeros((0, 5))
+    return {
+        'names': [os.path.relpath(label_file, root_dir) for label_file in label_files],
+        'classes': labels[:, 0].astype(np.uint16),
+        'boxes': labels[:, 1:].astype(box_dtype),
+        'offsets': np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    }
+
+
+def save_label_store(store: Dict, store_dir: str) -> None:
+    """
+    Write a label store to a directory, replacing any store already there.
+
+    Args:
+        store (Dict): The store with 'names', 'classes', 'boxes' and 'offsets'.
+        store_dir (str): The store directory.
+    """
+    tmp_dir = store_dir.rstrip(os.sep) + '.tmp'
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    for name in STORE_ARRAYS:
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(store[name]))
+    with open(os.path.join(tmp_dir, 'names.txt'), 'w') as file:
+        file.write(''.join(name + '\n' for name in store['names']))
+
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    os.replace(tmp_dir, store_dir)
+
+
+def load_label_store(store_dir: str, mmap: bool = True) -> Dict:
+    """
+    Load a label store.
+
+    Args:
+        store_dir (str): The store directory.
+        mmap (bool, optional): Memory-map the arrays instead of reading them. Defaults to True.
+
+    Returns:
+        Dict: The store with 'names', 'classes', 'boxes' and 'offsets'.
+    """
+    store = {name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r' if mmap else None) for name in STORE_ARRAYS}
+    with open(os.path.join(store_dir, 'names.txt'), 'r') as file:
+        store['names'] = file.read().splitlines()
+    return store
+
+
+def get_image_labels(store: Dict, index: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the classes and boxes of one image in a store.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (n,) classes and (n, 4) boxes of the image.
+    """
+    start, end = store['offsets'][index], store['offsets'][index + 1]
+    return store['classes'][start:end], store['boxes'][start:end]
+
+
+def box_image_index(store: Dict) -> np.ndarray:
+    """
+    Get the index of the image every box belongs to, for grouping box-level arrays by image.
+
+    Returns:
+        np.ndarray: An int64 array of shape (n_boxes,).
+    """
+    return np.repeat(np.arange(len(store['offsets']) - 1), np.diff(store['offsets']))
+
+
+def unpack_label_store(store: Dict, root_dir: str) -> int:
+    """
+    Write a store back out as one YOLO txt label file per image under root_dir.
+
+    Args:
+        store (Dict): The store to unpack.
+        root_dir (str): The dataset root the stored names are relative to.
+
+    Returns:
+        int: The number of label files written.
+    """
+    offsets = np.asarray(store['offsets'])
+    lines = format_label_lines(np.asarray(store['classes']), np.asarray(store['boxes']))
+    for index, name in enumerate(store['names']):
+        label_file = os.path.join(root_dir, name)
+        os.makedirs(os.path.dirname(label_file), exist_ok=True)
+        write_label_files(lines[offsets[index]:offsets[index + 1]], label_file)
+    return len(store['names'])
+
+
+def remap_label_store(store: Dict, lut: np.ndarray) -> Tuple[Dict, Dict[int, int]]:
+    """
+    Remap the classes of a whole store in one pass, dropping boxes of unmapped classes.
+
+    Args:
+        store (Dict): The store to remap.
+        lut (np.ndarray): Lookup table from label_utils.build_class_lut.
+
+    Returns:
+        Tuple[Dict, Dict[int, int]]: The remapped store and the dropped boxes per old class index.
+    """
+    classes, boxes, offsets, dropped = remap_classes(store['classes'], store['boxes'], store['offsets'], lut)
+    remapped = {'names': list(store['names']), 'classes': classes.astype(np.uint16), 'boxes': boxes, 'offsets': offsets}
+    return remapped, dropped
@@ -2,7 +2,8 @@
 
 import os
 import yaml
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Tuple
 
 
 def get_labelfile_data(label_filepath: str):
@@ -19,6 +20,59 @@ def get_labelfile_data(label_filepath: str):
         lines = file.readlines()
     return lines
 
+def read_label_array(label_filepath: str) -> np.ndarray:
+    """
+    Read a YOLO label file into an array with one (class, x_center, y_center, width, height) row per box.
+
+    Args:
+        label_filepath (str): Path to YOLO label file.
+
+    Returns:
+        np.ndarray: A float64 array of shape (n_boxes, 5). Empty files give shape (0, 5).
+
+    Raises:
+        ValueError: If a row does not have exactly 5 values or a value is not a number.
+    """
+    with open(label_filepath, 'r') as file:
+        text = file.read()
+
+    rows = [line.split() for line in text.splitlines() if line.strip()]
+    bad_rows = [i + 1 for i, row in enumerate(rows) if len(row) != 5]
+    if bad_rows:
+        raise ValueError(f"Expected 5 values per row, rows {bad_rows} differ")
+    return np.array(rows, dtype=np.float64).reshape(len(rows), 5)
+
+def format_label_lines(classes: np.ndarray, boxes: np.ndarray) -> List[str]:
+    """
+    Format boxes as YOLO label lines.
+
+    Args:
+        classes (np.ndarray): Class index of each box, shape (n,).
+        boxes (np.ndarray): Normalized (x_center, y_center, width, height) of each box, shape (n, 4).
+
+    Returns:
+        List[str]: One 'class x y w h' line per box. float32 boxes are written with the 7 significant
+        digits float32 holds, float64 boxes with 10.
+    """
+    precision = 7 if boxes.dtype == np.float32 else 10
+    line_format = '%d' + f' %.{precision}g' * 4
+    return [line_format % (cls, *box) for cls, box in zip(classes.tolist(), boxes.tolist())]
+
+def get_label_classes(label_filepath: str) -> List[int]:
+    """
+    Read the class index of every box in a YOLO label file.
+
+    Args:
+        label_filepath (str): Path to YOLO label file.
+
+    Returns:
+        List[int]: One class index per box. Empty if the file is missing or has no boxes.
+    """
+    if not label_filepath or not os.path.exists(label_filepath):
+        return []
+    with open(label_filepath, 'r') as file:
+        return [int(float(line.split(maxsplit=1)[0])) for line in file if line.strip()]
+
 def update_yolo_label_file(label_file_path, label_mapping):
     """
     Update a YOLO label file with new class indices based on the given mapping.
@@ -47,6 +101,65 @@ def update_yolo_label_file(label_file_path, label_mapping):
     return updated_lines
 
 
+def build_class_lut(label_mapping: Dict[int, int], num_source_classes: int = 0) -> np.ndarray:
+    """
+    Turn a label mapping from create_label_mapping into a lookup table indexed by old class index.
+
+    Args:
+        label_mapping (Dict[int, int]): Mapping of old class indices to new class indices.
+        num_source_classes (int, optional): Number of old classes, so unmapped classes past the highest
+            mapped index are covered too. Defaults to 0.
+
+    Returns:
+        np.ndarray: An int32 array where lut[old] is the new index, or -1 if old is unmapped.
+    """
+    size = max(max(label_mapping, default=-1) + 1, num_source_classes)
+    lut = np.full(size, -1, dtype=np.int32)
+    if label_mapping:
+        lut[np.fromiter(label_mapping.keys(), dtype=np.int64)] = np.fromiter(label_mapping.values(), dtype=np.int64)
+    return lut
+
+def remap_classes(classes: np.ndarray, boxes: np.ndarray, offsets: np.ndarray, lut: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[int, int]]:
+    """
+    Remap the class of every box in one pass and drop the boxes whose class is unmapped.
+
+    Args:
+        classes (np.ndarray): Old class index of every box, shape (n_boxes,).
+        boxes (np.ndarray): Boxes, shape (n_boxes, 4).
+        offsets (np.ndarray): Boxes of image i are rows offsets[i]:offsets[i + 1], shape (n_images + 1,).
+        lut (np.ndarray): Lookup table from build_class_lut.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[int, int]]: The new classes, the kept boxes,
+        the new offsets and the number of dropped boxes per old class index.
+    """
+    classes = np.asarray(classes).astype(np.int64)
+    in_range = (classes >= 0) & (classes < len(lut))
+    new_classes = np.full(len(classes), -1, dtype=np.int64)
+    new_classes[in_range] = lut[classes[in_range]]
+    keep = new_classes >= 0
+
+    dropped_classes, dropped_counts = np.unique(classes[~keep], return_counts=True)
+    kept_before = np.concatenate([[0], np.cumsum(keep)])
+    new_offsets = kept_before[np.asarray(offsets)]
+    dropped = dict(zip(dropped_classes.tolist(), dropped_counts.tolist()))
+    return new_classes[keep], np.asarray(boxes)[keep], new_offsets, dropped
+
+def remap_label_file(label_filepath: str, lut: np.ndarray) -> Tuple[List[str], Dict[int, int]]:
+    """
+    Remap a single YOLO label file with a class lookup table.
+
+    Args:
+        label_filepath (str): Path to YOLO label file.
+        lut (np.ndarray): Lookup table from build_class_lut.
+
+    Returns:
+        Tuple[List[str], Dict[int, int]]: The remapped label lines and the dropped boxes per old class index.
+    """
+    labels = read_label_array(label_filepath)
+    classes, boxes, _, dropped = remap_classes(labels[:, 0], labels[:, 1:], np.array([0, len(labels)]), lut)
+    return format_label_lines(classes, boxes), dropped
+
 def write_label_files(txt_file: str, output_file_path: str) -> None:
     """
     Write label files to output directory.
@@ -55,9 +168,11 @@ def write_label_files(txt_file: str, output_file_path: str) -> None:
         txt_file (str): Line from updated text file.
         output_file_path (str): path to the output file 
     """
-    # Write the updated lines back to the file
-    with open(output_file_path, 'w') as file:
+    # Write to a temporary file and swap it in, so a hardlinked output never writes through to its source
+    tmp_file_path = output_file_path + '.tmp'
+    with open(tmp_file_path, 'w') as file:
         file.write("\n".join(txt_file) + "\n")
+    os.replace(tmp_file_path, output_file_path)
     
     return None
 
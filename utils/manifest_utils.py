@@ -0,0 +1,96 @@
+# Utilities to persist the build manifest that records which source file and class mapping
+# produced every output in the yolo model directory
+
+import os
+import json
+import hashlib
+from typing import Dict, List, Tuple
+
+MANIFEST_FILE = '.manifest.json'
+MANIFEST_VERSION = 1
+
+
+def empty_manifest() -> Dict:
+    """
+    Create a manifest with no recorded sources or outputs.
+    """
+    return {'version': MANIFEST_VERSION, 'sources': {}, 'outputs': {}}
+
+
+def load_manifest(model_dir: str) -> Dict:
+    """
+    Load the build manifest of a yolo model directory.
+
+    Args:
+        model_dir (str): The yolo model directory.
+
+    Returns:
+        Dict: The manifest, or an empty manifest if none exists or it was written by another version.
+    """
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return empty_manifest()
+
+    with open(manifest_path, 'r') as file:
+        manifest = json.load(file)
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f"Ignoring manifest {manifest_path}: unsupported version {manifest.get('version')}.")
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(model_dir: str, manifest: Dict) -> None:
+    """
+    Atomically write the build manifest of a yolo model directory.
+
+    Args:
+        model_dir (str): The yolo model directory.
+        manifest (Dict): The manifest to write.
+    """
+    manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file)
+    os.replace(tmp_path, manifest_path)
+
+
+def record_quarantined(model_dir: str, image_paths: List[str], reason: str) -> int:
+    """
+    Record quarantined model images in the build manifest by content digest, so incremental builds don't
+    materialize their sources again. A source whose content changes gets a new digest and is built again.
+
+    Args:
+        model_dir (str): The yolo model directory.
+        image_paths (List[str]): Quarantined images, as they were placed in the model directory.
+        reason (str): Why they were quarantined.
+
+    Returns:
+        int: Number of images whose build output was found and recorded.
+    """
+    manifest = load_manifest(model_dir)
+    quarantined = manifest.setdefault('quarantined', {})
+    recorded = 0
+    for image_path in image_paths:
+        record = manifest['outputs'].get(os.path.relpath(image_path, model_dir))
+        if record is not None and 'digest' in record:
+            quarantined[record['digest']] = {'source': record['source'], 'reason': reason}
+            recorded += 1
+    save_manifest(model_dir, manifest)
+    return recorded
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    """
+    Get the (size, mtime_ns) pair used to detect that a source file changed without reading it.
+    """
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def mapping_fingerprint(label_mapping: Dict[int, int]) -> str:
+    """
+    Create a short, order-independent fingerprint of a class label mapping.
+    """
+    payload = json.dumps(sorted(label_mapping.items()))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
@@ -0,0 +1,365 @@
+# Parallel dataset merge pipeline. Scans the source datasets in the data directory once,
+# then runs label remapping, image placement and splitting as stages over one process pool.
+# Rebuilds are incremental: only outputs whose source file or class mapping changed are rewritten.
+
+import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+
+from utils.directories_util import create_split_dirs
+from utils.scan_utils import index_data_dir, SPLIT_NAMES
+from utils.yaml_utils import get_yaml_data, create_label_mapping, merge_class_names, write_model_yaml
+from utils.label_utils import remap_label_file, build_class_lut, write_label_files, get_label_classes
+from utils.split_utils import stratified_hash_split, source_id, write_split_lists, SPLIT_LIST_FILES, POOL_DIR
+from utils.file_utils import materialize_file
+from utils.manifest_utils import load_manifest, save_manifest, empty_manifest, mapping_fingerprint
+from utils.dedup_utils import image_dhash, find_duplicate_clusters, cluster_keys, collapse_clusters, MAX_DISTANCE
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-1 digest of a file's contents.
+
+    Args:
+        file_path (str): Path to the file to hash.
+        chunk_size (int, optional): Number of bytes read per chunk. Defaults to 1 MiB.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_source_datasets(data_dir: str) -> List[Dict]:
+    """
+    Walk the data directory once and collect every image/label pair of every source dataset.
+
+    Args:
+        data_dir (str): The root data directory containing one subdirectory per source dataset.
+
+    Returns:
+        List[Dict]: One entry per dataset with its 'name', 'classes' (from its data.yaml) and
+        'items', a list of {'split', 'image', 'label', 'image_sig', 'label_sig'} dicts.
+        'label' and 'label_sig' are None for unlabelled images.
+    """
+    datasets = []
+    for name, dataset in index_data_dir(data_dir).items():
+        if dataset['yaml'] is None:
+            print(f"Skipping directory {dataset['dir']}: 'data.yaml' not found.")
+            continue
+
+        items = []
+        for split_name, split in dataset['splits'].items():
+            for image_file, image_sig in split['images'].items():
+                label_file, label_sig = split['labels'].get(os.path.splitext(image_file)[0], (None, None))
+                items.append({
+                    'split': split_name,
+                    'image': os.path.join(split['images_dir'], image_file),
+                    'label': os.path.join(split['labels_dir'], label_file) if label_file else None,
+                    'image_sig': image_sig,
+                    'label_sig': label_sig
+                })
+
+        datasets.append({
+            'name': name,
+            'classes': get_yaml_data(dataset['yaml']),
+            'items': items
+        })
+
+    return datasets
+
+
+def prepare_item(paths: Tuple[Optional[str], Optional[str]]) -> Tuple[Optional[str], Optional[List[int]]]:
+    """
+    Pipeline stage 1 (worker): hash a new or changed source image and read the classes of a new or
+    changed source label file. Either path is None when its cached value is still valid.
+
+    Args:
+        paths (Tuple[Optional[str], Optional[str]]): The image path to hash and the label path to read.
+
+    Returns:
+        Tuple[Optional[str], Optional[List[int]]]: The image digest and the source class index of every box.
+    """
+    image_path, label_path = paths
+    digest = hash_file(image_path) if image_path else None
+    classes = get_label_classes(label_path) if label_path else None
+    return digest, classes
+
+
+def source_is_current(source: Optional[Dict], signature: Tuple[int, int]) -> bool:
+    """
+    Check whether a manifest source record was taken from a file with this (size, mtime_ns) signature.
+    """
+    return source is not None and (source['size'], source['mtime_ns']) == tuple(signature)
+
+
+def place_item(task: Dict) -> Tuple[Optional[str], Dict[int, int]]:
+    """
+    Pipeline stage 3 (worker): remap and write the label and materialize the image in its final split.
+    Either destination is None when that output is already up to date.
+
+    Args:
+        task (Dict): A task with 'image', 'image_dest', 'link_mode', 'label', 'label_lut' and 'label_dest'.
+
+    Returns:
+        Tuple[Optional[str], Dict[int, int]]: The materialize mode actually used for the image (None if
+        it was not written) and the boxes dropped from the label per unmapped source class.
+    """
+    used_mode = None
+    dropped = {}
+    if task['label_dest'] is not None:
+        lines, dropped = remap_label_file(task['label'], task['label_lut'])
+        write_label_files(lines, task['label_dest'])
+    if task['image_dest'] is not None:
+        used_mode = materialize_file(task['image'], task['image_dest'], task['link_mode'])
+    return used_mode, dropped
+
+
+def assign_output_names(prepared: List[Dict]) -> List[Dict]:
+    """
+    Drop byte-identical images and give every remaining image a unique output file name.
+
+    Images are addressed by content digest, so the same photo exported by two sources is only
+    placed once. Different images that share a file name get the digest appended to their stem.
+
+    Args:
+        prepared (List[Dict]): Scanned items with their image 'digest'.
+
+    Returns:
+        List[Dict]: The unique items, each with an 'output_stem' and 'output_ext'.
+    """
+    seen_digests = set()
+    used_names = set()
+    unique = []
+    for item in prepared:
+        if item['digest'] in seen_digests:
+            continue
+        seen_digests.add(item['digest'])
+
+        stem, ext = os.path.splitext(os.path.basename(item['image']))
+        if stem in used_names:
+            stem = f"{stem}_{item['digest'][:8]}"
+        used_names.add(stem)
+
+        item['output_stem'] = stem
+        item['output_ext'] = ext
+        unique.append(item)
+    return unique
+
+
+def output_is_current(model_dir: str, output_rel: str, record: Dict, previous_outputs: Dict[str, Dict]) -> bool:
+    """
+    Check whether an output was produced from exactly this record and still exists on disk.
+    """
+    return previous_outputs.get(output_rel) == record and os.path.exists(os.path.join(model_dir, output_rel))
+
+
+def image_output_is_current(model_dir: str, output_rel: str, record: Dict, previous_outputs: Dict[str, Dict]) -> bool:
+    """
+    Check whether an image output was produced from this source and digest and still exists, either with
+    the requested mode or already in it. The recorded 'mode' is the one actually used, which is 'copy'
+    after a fallback, so a fallback copy is current both for its requested mode and for 'copy'.
+    """
+    previous = previous_outputs.get(output_rel)
+    return (previous is not None and previous['source'] == record['source'] and previous['digest'] == record['digest']
+            and record['requested'] in (previous.get('requested'), previous['mode'])
+            and os.path.exists(os.path.join(model_dir, output_rel)))
+
+
+def run_pipeline(data_dir: str, model_dir: str, train_pct: float = 0.80, valid_pct: float = 0.15, seed: int = 123,
+                 keep_source_splits: bool = False, workers: Optional[int] = None, full_rebuild: bool = False,
+                 link_mode: str = 'copy', split_mode: str = 'copy', dedup: Optional[str] = None,
+                 dedup_distance: int = MAX_DISTANCE) -> Dict[str, int]:
+    """
+    Build the model dataset from every source dataset, rewriting only what changed since the last build.
+
+    Args:
+        data_dir (str): The root data directory.
+        model_dir (str): The output yolo model directory.
+        train_pct (float, optional): Fraction of images assigned to train. Defaults to 0.80.
+        valid_pct (float, optional): Fraction of images assigned to valid. Defaults to 0.15.
+        seed (int, optional): Salt for the stratified hash split. Defaults to 123.
+        keep_source_splits (bool, optional): Keep each source's own train/valid/test assignment instead
+            of re-splitting. Defaults to False.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        full_rebuild (bool, optional): Ignore the manifest and rewrite every output. Defaults to False.
+        link_mode (str, optional): How images are materialized: 'copy', 'hardlink', 'reflink' or 'symlink'.
+            Falls back to copying where the filesystem does not support it. Defaults to 'copy'.
+        split_mode (str, optional): 'copy' places files in train/valid/test directories. 'virtual' places
+            every file once under the pool directory and writes train/val/test list files that data.yaml
+            points at, so re-splitting never moves files. Defaults to 'copy'.
+        dedup (str, optional): Handling of near-duplicate images found by perceptual hash. 'group' keeps
+            each cluster in a single split (ignored with keep_source_splits), 'collapse' keeps one image per
+            cluster. Defaults to None, which only drops exact duplicates.
+        dedup_distance (int, optional): Maximum dHash Hamming distance of near-duplicates. Defaults to 6.
+
+    Returns:
+        Dict[str, int]: Counts of scanned, duplicate, near-duplicate, quarantined, written, skipped, deleted and
+        fallback-copied files, boxes dropped from rewritten labels because their class is unmapped, and images per split.
+    """
+    datasets = scan_source_datasets(data_dir)
+    classes_dict = merge_class_names([dataset['classes'] for dataset in datasets])
+    if split_mode == 'virtual':
+        write_model_yaml(classes_dict, model_dir, split_paths=SPLIT_LIST_FILES)
+        for sub_dir in ['images', 'labels']:
+            os.makedirs(os.path.join(model_dir, POOL_DIR, sub_dir), exist_ok=True)
+    else:
+        write_model_yaml(classes_dict, model_dir)
+        create_split_dirs(model_dir)
+
+    previous = load_manifest(model_dir)
+    cached = empty_manifest() if full_rebuild else previous
+    manifest = empty_manifest()
+    # Images quarantined by ingest or dedup stay out of the build, even on a full rebuild
+    quarantined = previous.get('quarantined', {})
+
+    items = []
+    for dataset in datasets:
+        label_mapping = create_label_mapping(dataset['classes'], classes_dict)
+        label_lut = build_class_lut(label_mapping, len(dataset['classes']))
+        mapping_fp = mapping_fingerprint(label_mapping)
+        for item in dataset['items']:
+            item['label_mapping'] = label_mapping
+            item['label_lut'] = label_lut
+            item['mapping_fp'] = mapping_fp
+            item['image_rel'] = os.path.relpath(item['image'], data_dir)
+            item['label_rel'] = os.path.relpath(item['label'], data_dir) if item['label'] else None
+            items.append(item)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Stage 1: reuse recorded digests and label classes, only reading sources whose size or mtime changed
+        to_prepare = []
+        for item in items:
+            image_source = cached['sources'].get(item['image_rel'])
+            if source_is_current(image_source, item['image_sig']):
+                item['digest'] = image_source['digest']
+            label_source = cached['sources'].get(item['label_rel']) if item['label'] else None
+            if item['label'] is None:
+                item['source_classes'] = []
+            elif source_is_current(label_source, item['label_sig']):
+                item['source_classes'] = label_source['classes']
+
+            if 'digest' not in item or 'source_classes' not in item:
+                to_prepare.append(item)
+
+        tasks = [(None if 'digest' in item else item['image'], None if 'source_classes' in item else item['label'])
+                 for item in to_prepare]
+        for item, (digest, classes) in zip(to_prepare, executor.map(prepare_item, tasks, chunksize=64)):
+            item.setdefault('digest', digest)
+            item.setdefault('source_classes', classes)
+
+        # Stage 2: drop quarantined images, deduplicate, hash images for near-duplicate detection and assign splits
+        kept = [item for item in items if item['digest'] not in quarantined]
+        unique = assign_output_names(kept)
+        near_duplicates = 0
+        if dedup:
+            to_hash = []
+            for item in unique:
+                image_source = cached['sources'].get(item['image_rel'])
+                if source_is_current(image_source, item['image_sig']) and 'dhash' in image_source:
+                    item['dhash'] = image_source['dhash']
+                else:
+                    to_hash.append(item)
+            for item, dhash in zip(to_hash, executor.map(image_dhash, [item['image'] for item in to_hash], chunksize=64)):
+                item['dhash'] = dhash
+
+            clusters = find_duplicate_clusters([item['dhash'] for item in unique], max_distance=dedup_distance)
+            near_duplicates = sum(len(members) - 1 for members in clusters)
+            if dedup == 'collapse':
+                dropped_indices = set(collapse_clusters(clusters))
+                unique = [item for index, item in enumerate(unique) if index not in dropped_indices]
+                split_keys = [source_id(item['image']) for item in unique]
+            else:
+                split_keys = cluster_keys([item['image'] for item in unique], clusters)
+        else:
+            split_keys = [source_id(item['image']) for item in unique]
+
+        manifest['quarantined'] = {item['digest']: quarantined[item['digest']] for item in items if item['digest'] in quarantined}
+        for item in items:
+            size, mtime_ns = item['image_sig']
+            manifest['sources'][item['image_rel']] = {'size': size, 'mtime_ns': mtime_ns, 'digest': item['digest']}
+            if item.get('dhash') is not None:
+                manifest['sources'][item['image_rel']]['dhash'] = item['dhash']
+            if item['label']:
+                size, mtime_ns = item['label_sig']
+                manifest['sources'][item['label_rel']] = {'size': size, 'mtime_ns': mtime_ns, 'classes': item['source_classes']}
+
+        if keep_source_splits:
+            splits = {split_name: [item for item in unique if item['split'] == split_name] for split_name in SPLIT_NAMES}
+        else:
+            image_classes = [[item['label_mapping'][cls] for cls in item['source_classes'] if cls in item['label_mapping']]
+                             for item in unique]
+            splits = dict(zip(SPLIT_NAMES, stratified_hash_split(unique, image_classes, train_pct=train_pct, valid_pct=valid_pct,
+                                                                 seed=seed, keys=split_keys)))
+
+        # Stage 3: write only the labels and images whose inputs changed
+        tasks = []
+        skipped = 0
+        for split_name, split_items in splits.items():
+            output_dir = POOL_DIR if split_mode == 'virtual' else split_name
+            for item in split_items:
+                image_rel = os.path.join(output_dir, 'images', item['output_stem'] + item['output_ext'])
+                image_record = {'source': item['image_rel'], 'digest': item['digest'], 'requested': link_mode, 'mode': link_mode}
+                manifest['outputs'][image_rel] = image_record
+                image_current = image_output_is_current(model_dir, image_rel, image_record, cached['outputs'])
+                if image_current:
+                    image_record['mode'] = cached['outputs'][image_rel]['mode']
+
+                label_rel = None
+                label_current = True
+                if item['label'] is not None:
+                    label_rel = os.path.join(output_dir, 'labels', item['output_stem'] + '.txt')
+                    size, mtime_ns = item['label_sig']
+                    label_record = {'source': item['label_rel'], 'size': size, 'mtime_ns': mtime_ns, 'mapping': item['mapping_fp']}
+                    manifest['outputs'][label_rel] = label_record
+                    label_current = output_is_current(model_dir, label_rel, label_record, cached['outputs'])
+
+                skipped += image_current + (label_rel is not None and label_current)
+                if image_current and label_current:
+                    continue
+                tasks.append({
+                    'image': item['image'],
+                    'image_rel': image_rel,
+                    'image_dest': None if image_current else os.path.join(model_dir, image_rel),
+                    'link_mode': link_mode,
+                    'label': item['label'],
+                    'label_lut': item['label_lut'],
+                    'label_dest': None if label_current else os.path.join(model_dir, label_rel)
+                })
+        used_modes = []
+        dropped_boxes = 0
+        for task, (used_mode, dropped) in zip(tasks, executor.map(place_item, tasks, chunksize=64)):
+            if used_mode is not None:
+                # Record the mode actually used, e.g. 'copy' when hardlinks aren't supported
+                manifest['outputs'][task['image_rel']]['mode'] = used_mode
+            used_modes.append(used_mode)
+            dropped_boxes += sum(dropped.values())
+
+    # Remove outputs whose sources disappeared or moved to another split
+    deleted = 0
+    for output_rel in previous['outputs'].keys() - manifest['outputs'].keys():
+        output_path = os.path.join(model_dir, output_rel)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+            deleted += 1
+
+    if split_mode == 'virtual':
+        write_split_lists(model_dir, {
+            split_name: [os.path.join(model_dir, POOL_DIR, 'images', item['output_stem'] + item['output_ext']) for item in split_items]
+            for split_name, split_items in splits.items()
+        })
+
+    save_manifest(model_dir, manifest)
+
+    written = sum((task['image_dest'] is not None) + (task['label_dest'] is not None) for task in tasks)
+    summary = {'scanned': len(items), 'duplicates': len(kept) - len(unique) - (near_duplicates if dedup == 'collapse' else 0),
+               'near_duplicates': near_duplicates, 'quarantined': len(items) - len(kept),
+               'written': written, 'skipped': skipped, 'deleted': deleted, 'dropped_boxes': dropped_boxes,
+               'fallback_copies': sum(mode is not None and mode != link_mode for mode in used_modes)}
+    summary.update({split_name: len(split_items) for split_name, split_items in splits.items()})
+    return summary
@@ -0,0 +1,197 @@
+# Pre-resized copy of the model dataset for one training imgsz.
+#
+# Ultralytics decodes every training image and resizes it so its longest side is imgsz, every epoch.
+# The cache stores each image already resized that way under <model_dir>/cache/<imgsz>/, mirroring the
+# model directory layout (split directories or the virtual split pool, labels and split lists), so the
+# dataloader's resize becomes a no-op and the smaller JPEGs decode faster. Aspect ratios are kept, so
+# normalized YOLO labels stay valid and are linked in unchanged.
+
+import os
+import math
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, Optional
+
+import yaml
+from PIL import Image, ImageOps
+
+from utils.file_utils import materialize_file
+from utils.images_util import convert_imgpath_to_labelpath
+from utils.manifest_utils import load_manifest, save_manifest, empty_manifest, file_signature
+from utils.pipeline_utils import hash_file
+from utils.split_utils import resolve_split_images
+
+# Directory under the model directory holding one cache per imgsz
+RESIZE_CACHE_DIR = 'cache'
+JPEG_QUALITY = 95
+# Recorded with every cached image; cached images resized by an older version of resize_image are redone
+RESIZE_VERSION = 2
+
+
+def cache_dir_for(model_dir: str, imgsz: int) -> str:
+    """
+    Get the cache directory of a model directory for one imgsz.
+    """
+    return os.path.join(model_dir, RESIZE_CACHE_DIR, str(imgsz))
+
+
+def resize_image(src: str, dst: str, imgsz: int, quality: int = JPEG_QUALITY) -> Tuple[int, int]:
+    """
+    Resize an image so its longest side is imgsz, keeping its aspect ratio and format, the same
+    way Ultralytics resizes images when loading them for training.
+
+    Args:
+        src (str): Path of the source image.
+        dst (str): Destination path. Written atomically.
+        imgsz (int): Target size of the longest side.
+        quality (int, optional): JPEG quality. Defaults to 95.
+
+    Returns:
+        Tuple[int, int]: The (width, height) of the resized image.
+    """
+    with Image.open(src) as img:
+        img_format = img.format
+        # OpenCV applies the EXIF orientation when Ultralytics reads the source, so the cache does too
+        img = ImageOps.exif_transpose(img)
+        width, height = img.size
+        ratio = imgsz / max(width, height)
+        # Same rounding as Ultralytics load_image, so the cached image loads at ratio 1 without resampling again
+        size = (max(1, min(math.ceil(width * ratio), imgsz)), max(1, min(math.ceil(height * ratio), imgsz)))
+        resample = Image.Resampling.LANCZOS if ratio < 1 else Image.Resampling.BILINEAR
+        resized = img.resize(size, resample) if size != (width, height) else img.copy()
+
+    tmp_dst = dst + '.tmp'
+    save_kwargs = {'quality': quality} if img_format == 'JPEG' else {}
+    if img_format == 'JPEG' and resized.mode not in ('RGB', 'L'):
+        resized = resized.convert('RGB')
+    resized.save(tmp_dst, format=img_format, **save_kwargs)
+    os.replace(tmp_dst, dst)
+    return resized.size
+
+
+def cache_image(task: Tuple[str, str, int, Optional[str]]) -> Tuple[str, bool]:
+    """
+    Pipeline stage: hash a source image and resize it into the cache unless the cached copy was
+    already made from the same contents.
+
+    Args:
+        task (Tuple[str, str, int, Optional[str]]): Source path, cache path, imgsz and the digest
+            the existing cached copy was made from, if any.
+
+    Returns:
+        Tuple[str, bool]: The source digest and whether the image was resized.
+    """
+    src, dst, imgsz, cached_digest = task
+    digest = hash_file(src)
+    if digest == cached_digest and os.path.exists(dst):
+        return digest, False
+
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    resize_image(src, dst, imgsz)
+    return digest, True
+
+
+def build_resize_cache(yaml_file: str, imgsz: int = 640, workers: Optional[int] = None, full_rebuild: bool = False) -> Dict:
+    """
+    Build or refresh the pre-resized copy of the dataset referenced by a data.yaml.
+
+    Cached images are keyed by the SHA-1 of their source, and the cache directory by imgsz. Sources
+    whose size and mtime are unchanged since the last build are not even re-hashed. Cached files
+    whose source left the dataset are deleted.
+
+    Args:
+        yaml_file (str): Path to the model data.yaml.
+        imgsz (int, optional): Training image size. Defaults to 640.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        full_rebuild (bool, optional): Ignore the cache manifest and resize every image. Defaults to False.
+
+    Returns:
+        Dict: Summary with the cache 'yaml' path and counts of 'images', 'resized', 'skipped' and 'deleted'.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    cache_dir = cache_dir_for(root_dir, imgsz)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    manifest = empty_manifest() if full_rebuild else load_manifest(cache_dir)
+    image_paths = sorted({path for paths in resolve_split_images(yaml_file).values() for path in paths if os.path.exists(path)})
+
+    new_manifest = empty_manifest()
+    tasks = []
+    skipped = 0
+    for image_path in image_paths:
+        image_rel = os.path.relpath(image_path, root_dir)
+        dst = os.path.join(cache_dir, image_rel)
+        size, mtime_ns = file_signature(image_path)
+        record = manifest['outputs'].get(image_rel)
+        current = record is not None and record.get('resize') == RESIZE_VERSION
+        if current and record['size'] == size and record['mtime_ns'] == mtime_ns and os.path.exists(dst):
+            new_manifest['outputs'][image_rel] = record
+            skipped += 1
+        else:
+            tasks.append((image_path, dst, imgsz, record['digest'] if current else None))
+
+    resized = 0
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for (image_path, dst, _, _), (digest, was_resized) in zip(tasks, executor.map(cache_image, tasks, chunksize=16)):
+                size, mtime_ns = file_signature(image_path)
+                record = {'size': size, 'mtime_ns': mtime_ns, 'digest': digest, 'resize': RESIZE_VERSION}
+                new_manifest['outputs'][os.path.relpath(image_path, root_dir)] = record
+                resized += was_resized
+                skipped += not was_resized
+
+    # Labels are small and rewritten atomically by the build, so they are copied rather than hardlinked
+    for image_path in image_paths:
+        label_path = convert_imgpath_to_labelpath(image_path)
+        if not os.path.exists(label_path):
+            continue
+        label_rel = os.path.relpath(label_path, root_dir)
+        dst = os.path.join(cache_dir, label_rel)
+        size, mtime_ns = file_signature(label_path)
+        record = manifest['sources'].get(label_rel)
+        if not (record and record['size'] == size and record['mtime_ns'] == mtime_ns and os.path.exists(dst)):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            materialize_file(label_path, dst, 'copy')
+        new_manifest['sources'][label_rel] = {'size': size, 'mtime_ns': mtime_ns}
+
+    deleted = 0
+    for rel_path in set(manifest['outputs']) - set(new_manifest['outputs']) | set(manifest['sources']) - set(new_manifest['sources']):
+        stale_path = os.path.join(cache_dir, rel_path)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+            deleted += 1
+
+    cache_yaml = write_cache_yaml(yaml_file, cache_dir)
+    save_manifest(cache_dir, new_manifest)
+
+    return {'yaml': cache_yaml, 'images': len(image_paths), 'resized': resized, 'skipped': skipped, 'deleted': deleted}
+
+
+def write_cache_yaml(yaml_file: str, cache_dir: str) -> str:
+    """
+    Write the data.yaml of a cache, copying any split list files it references. Split paths are
+    relative and the cache mirrors the model directory, so they are kept as they are.
+
+    Args:
+        yaml_file (str): Path to the model data.yaml.
+        cache_dir (str): The cache directory.
+
+    Returns:
+        str: Path to the cache data.yaml.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    with open(yaml_file, 'r') as file:
+        data = yaml.safe_load(file)
+    data.pop('path', None)
+
+    for key in ['train', 'val', 'test']:
+        value = data.get(key)
+        if value and value.endswith('.txt') and os.path.isfile(os.path.join(root_dir, value)):
+            dst = os.path.join(cache_dir, value)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy(os.path.join(root_dir, value), dst)
+
+    cache_yaml = os.path.join(cache_dir, 'data.yaml')
+    with open(cache_yaml, 'w') as file:
+        yaml.dump(data, file)
+    return cache_yaml
@@ -0,0 +1,85 @@
+# Class balancing by per-image sampling weights instead of duplicating image files.
+# Images holding rare classes are drawn more often by a weighted sampler during training,
+# so rare pantry classes get more exposure without extra files on disk or extra reads.
+
+from typing import List, Sequence, Dict
+
+import numpy as np
+
+# Exponent applied to the inverse class frequency. 1 fully equalizes class exposure, 0 disables balancing
+WEIGHT_POWER = 0.5
+
+# Cap on an image's weight relative to an image holding only the most common class
+MAX_WEIGHT = 10.0
+
+
+def compute_class_weights(image_classes: List[Sequence[int]], num_classes: int, power: float = WEIGHT_POWER) -> np.ndarray:
+    """
+    Weight every class by its inverse frequency, counting the images a class appears in rather than its boxes.
+
+    Args:
+        image_classes (List[Sequence[int]]): Class indices of the boxes of each image.
+        num_classes (int): Number of classes in the dataset.
+        power (float, optional): Exponent applied to the inverse frequency. Defaults to 0.5.
+
+    Returns:
+        np.ndarray: A float64 array of shape (num_classes,). The most common class has weight 1 and
+        classes without images have weight 0.
+    """
+    counts = np.zeros(num_classes, dtype=np.int64)
+    for classes in image_classes:
+        counts[np.unique(np.asarray(classes, dtype=np.int64))] += 1
+
+    class_weights = np.zeros(num_classes)
+    present = counts > 0
+    class_weights[present] = (counts.max() / counts[present]) ** power
+    return class_weights
+
+
+def compute_image_weights(image_classes: List[Sequence[int]], num_classes: int, power: float = WEIGHT_POWER,
+                          max_weight: float = MAX_WEIGHT) -> np.ndarray:
+    """
+    Compute the sampling weight of every image from the classes it holds. An image is weighted by its
+    rarest class, so an image is drawn as often as its most under-represented object needs.
+
+    Args:
+        image_classes (List[Sequence[int]]): Class indices of the boxes of each image, in dataset order.
+        num_classes (int): Number of classes in the dataset.
+        power (float, optional): Exponent applied to the inverse class frequency. Defaults to 0.5.
+        max_weight (float, optional): Cap on an image's weight before normalization. Defaults to 10.
+
+    Returns:
+        np.ndarray: A float64 array of shape (n_images,) with mean 1. Background images get weight 1
+        before normalization.
+    """
+    class_weights = compute_class_weights(image_classes, num_classes, power)
+    counts = np.array([len(classes) for classes in image_classes], dtype=np.int64)
+    if counts.sum() == 0:
+        return np.ones(len(image_classes))
+
+    classes = np.concatenate([np.asarray(classes, dtype=np.int64) for classes in image_classes])
+    owner = np.repeat(np.arange(len(image_classes)), counts)
+
+    weights = np.zeros(len(image_classes))
+    np.maximum.at(weights, owner, class_weights[classes])
+    weights[counts == 0] = 1.0
+    weights = np.minimum(weights, max_weight)
+    return weights / weights.mean()
+
+
+def expected_class_exposure(image_classes: List[Sequence[int]], weights: np.ndarray, num_classes: int) -> Dict[int, float]:
+    """
+    Get the expected share of sampled images holding each class, to compare balancing settings.
+
+    Args:
+        image_classes (List[Sequence[int]]): Class indices of the boxes of each image.
+        weights (np.ndarray): Sampling weight of each image.
+        num_classes (int): Number of classes in the dataset.
+
+    Returns:
+        Dict[int, float]: The expected fraction of draws that contain each class.
+    """
+    exposure = np.zeros(num_classes)
+    for classes, weight in zip(image_classes, weights):
+        exposure[np.unique(np.asarray(classes, dtype=np.int64))] += weight
+    return dict(enumerate((exposure / weights.sum()).tolist()))
@@ -0,0 +1,102 @@
+# Directory scanning built on os.scandir. Entry types come from the directory listing itself, so
+# telling files from directories costs no stat call per entry, and directories are matched by their
+# explicit names ('train', 'images', 'labels', ...) rather than by listing order.
+#
+# index_data_dir scans every source dataset once into an in-memory index of its images and labels
+# that the scripts and the pipeline share, so a run never lists or stats the same file twice.
+
+import os
+from typing import Dict, Optional, Tuple
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+SPLIT_NAMES = ('train', 'valid', 'test')
+
+# Index per data directory, built once per run
+_index_cache = {}
+
+
+def scan_dir(directory: str, with_stats: bool = False) -> Tuple[Dict[str, str], Dict[str, Optional[Tuple[int, int]]]]:
+    """
+    List a directory once, separating subdirectories from files.
+
+    Args:
+        directory (str): The directory to scan. A missing directory scans as empty.
+        with_stats (bool, optional): Also record each file's (size, mtime_ns). This costs one stat
+            syscall per file on Linux, where DirEntry only gets the file type from the listing; Windows
+            returns the stat with the listing. Defaults to False.
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, Optional[Tuple[int, int]]]]: Subdirectory paths by name, and
+        file signatures by name (None when with_stats is False).
+    """
+    dirs, files = {}, {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    dirs[entry.name] = entry.path
+                elif entry.is_file():
+                    if with_stats:
+                        stat = entry.stat()
+                        files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                    else:
+                        files[entry.name] = None
+    except FileNotFoundError:
+        pass
+    return dirs, files
+
+
+def index_split(split_dir: str, with_stats: bool = True) -> Dict:
+    """
+    Index the images and labels of one split directory.
+
+    Args:
+        split_dir (str): A split directory holding 'images' and 'labels' subdirectories.
+        with_stats (bool, optional): Record each file's (size, mtime_ns). Defaults to True.
+
+    Returns:
+        Dict: 'images_dir' and 'labels_dir' paths, 'images' mapping each image file name to its signature
+        and 'labels' mapping each label stem to (file name, signature).
+    """
+    images_dir = os.path.join(split_dir, 'images')
+    labels_dir = os.path.join(split_dir, 'labels')
+    _, image_files = scan_dir(images_dir, with_stats)
+    _, label_files = scan_dir(labels_dir, with_stats)
+    return {
+        'images_dir': images_dir,
+        'labels_dir': labels_dir,
+        'images': {name: sig for name, sig in sorted(image_files.items()) if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS},
+        'labels': {os.path.splitext(name)[0]: (name, sig) for name, sig in sorted(label_files.items()) if name.endswith('.txt')},
+    }
+
+
+def index_data_dir(data_dir: str, with_stats: bool = True, refresh: bool = False) -> Dict[str, Dict]:
+    """
+    Index every source dataset in the data directory. The index is built once per run and reused
+    by later calls unless refresh is set.
+
+    Args:
+        data_dir (str): The root data directory containing one subdirectory per source dataset.
+        with_stats (bool, optional): Record each file's (size, mtime_ns). Defaults to True.
+        refresh (bool, optional): Rescan even if the directory was indexed before. Defaults to False.
+
+    Returns:
+        Dict[str, Dict]: Per dataset name, its 'dir', 'yaml' (None without a data.yaml) and 'splits',
+        the index_split of every split directory present.
+    """
+    key = (os.path.abspath(data_dir), with_stats)
+    if not refresh and key in _index_cache:
+        return _index_cache[key]
+
+    index = {}
+    dataset_dirs, _ = scan_dir(data_dir)
+    for name, dataset_dir in sorted(dataset_dirs.items()):
+        split_dirs, files = scan_dir(dataset_dir)
+        index[name] = {
+            'dir': dataset_dir,
+            'yaml': os.path.join(dataset_dir, 'data.yaml') if 'data.yaml' in files else None,
+            'splits': {split_name: index_split(split_dirs[split_name], with_stats) for split_name in SPLIT_NAMES if split_name in split_dirs},
+        }
+
+    _index_cache[key] = index
+    return index
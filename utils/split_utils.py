@@ -0,0 +1,241 @@
+# Utilities to assign image/label pairs to train, valid and test splits
+
+import os
+import random
+import yaml
+import hashlib
+from collections import defaultdict
+from typing import List, Tuple, Dict, Sequence, Optional, Any
+
+SPLIT_MODES = ('copy', 'virtual')
+
+# Directory under the model directory holding every image and label when splits are virtual
+POOL_DIR = 'all'
+
+# Split list files written by write_split_lists, named after the data.yaml keys they are referenced by
+SPLIT_LIST_FILES = {'train': 'train.txt', 'valid': 'val.txt', 'test': 'test.txt'}
+
+
+def split_dataset(data: List[Tuple[str, str]], train_pct: float, valid_pct: float, seed: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """
+    Split the dataset into train, validation, and test sets based on the given percentages.
+    Returns:
+        Tuple[List[Tuple[str, str]], List[Tuple[str, str]], List[Tuple[str, str]]]: Tuple of Lists to each path for each split set
+    """
+    random.seed(seed)
+    random.shuffle(data)
+
+    train_end = int(train_pct * len(data))
+    valid_end = int(valid_pct * len(data)) + train_end
+
+    train_data = data[:train_end]
+    valid_data = data[train_end:valid_end]
+    test_data = data[valid_end:]
+
+    return train_data, valid_data, test_data
+
+
+def source_id(image_path: str) -> str:
+    """
+    Get the ID of the photo an image was exported from.
+
+    Roboflow names exports '<original>_<ext>.rf.<hash>.jpg', with one hash per augmented variant,
+    so stripping the '.rf.<hash>' suffix groups every variant of a photo under one ID.
+
+    Args:
+        image_path (str): Path or file name of the image.
+
+    Returns:
+        str: The source ID of the image.
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    return stem.split('.rf.')[0]
+
+
+def stable_fraction(key: str, seed: int) -> float:
+    """
+    Map a key to a fraction in [0, 1) that only depends on the key and the seed.
+    """
+    digest = hashlib.sha1(f'{seed}:{key}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def stratified_hash_split(data: List[Any], image_classes: List[Sequence[int]], train_pct: float, valid_pct: float, seed: int,
+                          keys: Optional[List[str]] = None, min_class_groups: int = 3) -> Tuple[List[Any], List[Any], List[Any]]:
+    """
+    Split the dataset deterministically by hashing each image's source ID, then make sure every class
+    with enough images is represented in valid and test.
+
+    Every group of images sharing a key is assigned to a split by a stable hash of the key, so adding
+    or removing images never moves the others and augmented variants of one photo stay together.
+    A class whose groups all hashed outside valid (or test) has its train group closest to the
+    split boundary moved there, rarest classes first. Those coverage moves are the only assignments
+    that can change when images of the same rare class are added.
+
+    Args:
+        data (List[Any]): Items to split, e.g. (image, label) path tuples.
+        image_classes (List[Sequence[int]]): Class indices of the boxes of each item, read from its label file.
+        train_pct (float): Fraction of groups assigned to train.
+        valid_pct (float): Fraction of groups assigned to valid.
+        seed (int): Salt for the hash. Changing it reshuffles every assignment.
+        keys (List[str], optional): Group key of each item. Defaults to the source_id of the first element
+            of the item (or the item itself if it is a path).
+        min_class_groups (int, optional): Classes with fewer groups are not moved for coverage. Defaults to 3.
+
+    Returns:
+        Tuple[List[Any], List[Any], List[Any]]: The train, valid and test items, in input order.
+    """
+    if keys is None:
+        keys = [source_id(item if isinstance(item, str) else item[0]) for item in data]
+
+    group_classes = defaultdict(set)
+    for key, classes in zip(keys, image_classes):
+        group_classes[key].update(classes)
+
+    fractions = {key: stable_fraction(key, seed) for key in group_classes}
+    group_split = {}
+    for key, fraction in fractions.items():
+        if fraction < train_pct:
+            group_split[key] = 'train'
+        elif fraction < train_pct + valid_pct:
+            group_split[key] = 'valid'
+        else:
+            group_split[key] = 'test'
+
+    class_groups = defaultdict(list)
+    for key, classes in group_classes.items():
+        for cls in classes:
+            class_groups[cls].append(key)
+
+    targets = [split_name for split_name, pct in [('valid', valid_pct), ('test', 1 - train_pct - valid_pct)] if pct > 0]
+    moved = set()
+    for cls, groups in sorted(class_groups.items(), key=lambda class_group: (len(class_group[1]), class_group[0])):
+        if len(groups) < min_class_groups:
+            continue
+        for target in targets:
+            if any(group_split[key] == target for key in groups):
+                continue
+            candidates = [key for key in groups if group_split[key] == 'train' and key not in moved]
+            if len(candidates) < 2:
+                continue
+            # The train group that hashed closest to the train boundary moves
+            key = max(candidates, key=lambda candidate: fractions[candidate])
+            group_split[key] = target
+            moved.add(key)
+
+    splits = {'train': [], 'valid': [], 'test': []}
+    for item, key in zip(data, keys):
+        splits[group_split[key]].append(item)
+    return splits['train'], splits['valid'], splits['test']
+
+
+def write_split_lists(model_dir: str, splits: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Write virtual splits as index files of image paths instead of copying files into split directories.
+
+    Each line is written as './<path relative to model_dir>', which Ultralytics resolves relative to
+    the list file, so the lists stay valid when the model directory is moved or synced elsewhere.
+
+    Args:
+        model_dir (str): The yolo model directory the lists are written to.
+        splits (Dict[str, List[str]]): Image paths per split name ('train', 'valid', 'test').
+
+    Returns:
+        Dict[str, str]: The list file name per split, relative to model_dir.
+
+    Raises:
+        ValueError: If an image is assigned to more than one split.
+    """
+    # Copies of an image in several split directories share a file name, so overlap is checked by name
+    seen = {}
+    for split_name, image_paths in splits.items():
+        for image_path in image_paths:
+            image_name = os.path.basename(image_path)
+            if image_name in seen:
+                raise ValueError(f"Image {image_name} is assigned to both '{seen[image_name]}' and '{split_name}'.")
+            seen[image_name] = split_name
+
+    list_files = {}
+    for split_name, image_paths in splits.items():
+        list_file = SPLIT_LIST_FILES[split_name]
+        list_path = os.path.join(model_dir, list_file)
+        tmp_path = list_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            for image_path in image_paths:
+                file.write('./' + os.path.relpath(image_path, model_dir).replace(os.sep, '/') + '\n')
+        os.replace(tmp_path, list_path)
+        list_files[split_name] = list_file
+    return list_files
+
+
+def resolve_split_images(yaml_file: str, image_extensions: Tuple[str, ...] = ('.jpg', '.jpeg', '.png', '.bmp')) -> Dict[str, List[str]]:
+    """
+    Resolve the images of every split referenced by a data.yaml, whether the split is an image
+    directory or a virtual split list file. Paths are resolved the way Ultralytics does it.
+
+    Args:
+        yaml_file (str): Path to the data.yaml.
+        image_extensions (Tuple[str, ...], optional): Image file extensions to include from directories.
+
+    Returns:
+        Dict[str, List[str]]: Sorted image paths per split name ('train', 'valid', 'test') present in the yaml.
+    """
+    with open(yaml_file, 'r') as file:
+        data = yaml.safe_load(file)
+
+    root = data.get('path') or os.path.dirname(os.path.abspath(yaml_file))
+    splits = {}
+    for split_name, key in [('train', 'train'), ('valid', 'val'), ('test', 'test')]:
+        value = data.get(key)
+        if not value:
+            continue
+        path = os.path.normpath(os.path.join(root, value))
+        if not os.path.exists(path) and value.startswith('../'):
+            path = os.path.normpath(os.path.join(root, value[3:]))
+
+        if os.path.isdir(path):
+            image_paths = [os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(image_extensions)]
+        elif os.path.isfile(path):
+            parent = os.path.dirname(path) + os.sep
+            with open(path, 'r') as file:
+                lines = [line.strip() for line in file if line.strip()]
+            image_paths = [os.path.normpath(line.replace('./', parent, 1) if line.startswith('./') else line) for line in lines]
+        else:
+            print(f"Warning: {key} path {path} from {yaml_file} does not exist.")
+            image_paths = []
+        splits[split_name] = sorted(image_paths)
+    return splits
+
+
+def remove_from_split_lists(yaml_file: str, image_paths: List[str]) -> int:
+    """
+    Drop images from the virtual split list files referenced by a data.yaml, e.g. after quarantining them.
+    Splits that are image directories are left alone.
+
+    Args:
+        yaml_file (str): Path to the data.yaml.
+        image_paths (List[str]): Images to drop.
+
+    Returns:
+        int: The number of list entries removed.
+    """
+    with open(yaml_file, 'r') as file:
+        data = yaml.safe_load(file)
+
+    root = data.get('path') or os.path.dirname(os.path.abspath(yaml_file))
+    to_remove = {os.path.normpath(os.path.abspath(image_path)) for image_path in image_paths}
+    removed = 0
+    for key in ['train', 'val', 'test']:
+        if not data.get(key) or not data[key].endswith('.txt'):
+            continue
+        list_path = os.path.join(root, data[key])
+        parent = os.path.dirname(list_path) + os.sep
+        with open(list_path, 'r') as file:
+            lines = [line.strip() for line in file if line.strip()]
+        kept = [line for line in lines
+                if os.path.normpath(os.path.abspath(line.replace('./', parent, 1) if line.startswith('./') else line)) not in to_remove]
+        removed += len(lines) - len(kept)
+        with open(list_path + '.tmp', 'w') as file:
+            file.write(''.join(line + '\n' for line in kept))
+        os.replace(list_path + '.tmp', list_path)
+    return removed
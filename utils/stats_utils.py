@@ -0,0 +1,283 @@
+# Dataset statistics: class counts, box size distributions, boxes per image and per-class split coverage.
+#
+# Labels are parsed into packed label stores cached under <model_dir>/.stats_cache/<name>/ together with
+# the (size, mtime_ns) of every label file, so later runs only re-read files that changed. Statistics are
+# computed from the packed arrays in one vectorized pass per split and cached in stats.json under a
+# fingerprint of every label file's path and signature; an unchanged dataset returns the cached stats.
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from utils.images_util import convert_imgpath_to_labelpath
+from utils.label_store_utils import pack_labels, save_label_store, load_label_store
+from utils.split_utils import resolve_split_images
+from utils.yaml_utils import get_yaml_data
+
+STATS_CACHE_DIR = '.stats_cache'
+STATS_FILE = 'stats.json'
+SIGNATURES_FILE = 'signatures.npy'
+
+# Boxes per image histogram bins; the last bin counts every image with at least that many boxes
+MAX_BOXES_BIN = 50
+
+# Log-spaced bin edges for box area (fraction of the image) and aspect ratio (width / height)
+AREA_BINS = np.logspace(-5, 0, 21)
+ASPECT_BINS = np.logspace(-2, 2, 17)
+
+
+def label_signatures(label_files: List[str]) -> np.ndarray:
+    """
+    Get the (size, mtime_ns) of every label file as an (n, 2) int64 array, (-1, -1) for missing files.
+    """
+    signatures = np.full((len(label_files), 2), -1, dtype=np.int64)
+    for index, label_file in enumerate(label_files):
+        try:
+            stat = os.stat(label_file)
+        except FileNotFoundError:
+            continue
+        signatures[index] = (stat.st_size, stat.st_mtime_ns)
+    return signatures
+
+
+def gather_images(store: Dict, indices: np.ndarray) -> Dict:
+    """
+    Select images from a store by index, without a Python loop over images.
+
+    Returns:
+        Dict: 'classes', 'boxes' and 'counts' of the selected images, in the order of indices.
+    """
+    offsets = np.asarray(store['offsets'])
+    starts, counts = offsets[indices], offsets[indices + 1] - offsets[indices]
+    rows = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts) + np.arange(counts.sum())
+    return {'classes': np.asarray(store['classes'])[rows], 'boxes': np.asarray(store['boxes'])[rows], 'counts': counts}
+
+
+def load_labels_cached(label_files: List[str], root_dir: str, name: str, workers: Optional[int] = None) -> Dict:
+    """
+    Load label files as a packed label store, re-reading only files whose size or mtime changed since
+    the cached store of the same name was written.
+
+    Args:
+        label_files (List[str]): Label files, one per image, in the order images should be indexed.
+        root_dir (str): The dataset root; the cache lives in root_dir/.stats_cache/<name>.
+        name (str): Cache name, e.g. the split name.
+        workers (int, optional): Number of worker processes for reading changed files.
+
+    Returns:
+        Dict: The store with 'names', 'classes', 'boxes' and 'offsets'.
+
+    Raises:
+        ValueError: If a changed label file is malformed (validate_yolo.py reports which rows).
+    """
+    cache_dir = os.path.join(root_dir, STATS_CACHE_DIR, name)
+    names = [os.path.relpath(label_file, root_dir) for label_file in label_files]
+    signatures = label_signatures(label_files)
+
+    previous = None
+    if os.path.exists(os.path.join(cache_dir, SIGNATURES_FILE)):
+        previous = load_label_store(cache_dir)
+        previous_signatures = np.load(os.path.join(cache_dir, SIGNATURES_FILE))
+        previous_index = {label_name: index for index, label_name in enumerate(previous['names'])}
+
+    reuse = np.full(len(label_files), -1, dtype=np.int64)
+    if previous is not None:
+        for index, label_name in enumerate(names):
+            cached = previous_index.get(label_name)
+            if cached is not None and (previous_signatures[cached] == signatures[index]).all():
+                reuse[index] = cached
+
+    changed = np.flatnonzero(reuse < 0)
+    if previous is not None and len(names) == len(previous['names']) and (reuse == np.arange(len(names))).all():
+        return previous
+
+    fresh = pack_labels([label_files[index] for index in changed], root_dir, workers=workers) if len(changed) else None
+
+    # Merge reused and freshly read images, keeping the requested order
+    parts = []
+    if previous is not None and (reuse >= 0).any():
+        parts.append((np.flatnonzero(reuse >= 0), gather_images(previous, reuse[reuse >= 0])))
+    if fresh is not None:
+        parts.append((changed, gather_images(fresh, np.arange(len(changed)))))
+
+    order = np.concatenate([positions for positions, _ in parts]) if parts else np.zeros(0, dtype=np.int64)
+    merged = {
+        'classes': np.concatenate([part['classes'] for _, part in parts]) if parts else np.zeros(0, dtype=np.uint16),
+        'boxes': np.concatenate([part['boxes'] for _, part in parts]) if parts else np.zeros((0, 4), dtype=np.float32),
+        'offsets': np.concatenate([[0], np.cumsum(np.concatenate([part['counts'] for _, part in parts]))]).astype(np.int64)
+                   if parts else np.zeros(1, dtype=np.int64),
+    }
+    store = {'names': names, **gather_images(merged, np.argsort(order, kind='stable'))}
+    store['offsets'] = np.concatenate([[0], np.cumsum(store.pop('counts'))]).astype(np.int64)
+    store['classes'] = store['classes'].astype(np.uint16)
+    store['boxes'] = store['boxes'].astype(np.float32)
+
+    save_label_store(store, cache_dir)
+    np.save(os.path.join(cache_dir, SIGNATURES_FILE), signatures)
+    return store
+
+
+def store_image_classes(store: Dict) -> List[np.ndarray]:
+    """
+    Split a store's classes into one array per image, e.g. for stratified_hash_split or sampling weights.
+    """
+    offsets = np.asarray(store['offsets'])
+    return np.split(np.asarray(store['classes']).astype(np.int64), offsets[1:-1])
+
+
+def dataset_fingerprint(split_label_files: Dict[str, List[str]]) -> str:
+    """
+    Fingerprint the label files of every split by path and (size, mtime_ns).
+    """
+    digest = hashlib.sha1()
+    for split_name in sorted(split_label_files):
+        label_files = split_label_files[split_name]
+        digest.update(split_name.encode())
+        digest.update('\n'.join(label_files).encode())
+        digest.update(label_signatures(label_files).tobytes())
+    return digest.hexdigest()
+
+
+def split_stats(store: Dict, num_classes: int) -> Dict:
+    """
+    Compute the statistics of one split from its label store.
+
+    Args:
+        store (Dict): The label store of the split.
+        num_classes (int): Number of classes in the dataset.
+
+    Returns:
+        Dict: Image, box and background counts, per-class box and image counts and histograms of
+        boxes per image, box area and box aspect ratio.
+    """
+    offsets = np.asarray(store['offsets'])
+    classes = np.asarray(store['classes']).astype(np.int64)
+    boxes = np.asarray(store['boxes']).astype(np.float64)
+    counts = np.diff(offsets)
+    owner = np.repeat(np.arange(len(counts)), counts)
+
+    # Out-of-range classes are left to validate_yolo.py
+    in_range = classes < num_classes
+    class_boxes = np.bincount(classes[in_range], minlength=num_classes)
+    image_class_pairs = np.unique(owner[in_range] * num_classes + classes[in_range])
+    class_images = np.bincount(image_class_pairs % num_classes, minlength=num_classes)
+
+    widths, heights = boxes[:, 2], boxes[:, 3]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aspect = widths / heights
+
+    return {
+        'images': int(len(counts)),
+        'boxes': int(len(classes)),
+        'background_images': int((counts == 0).sum()),
+        'class_boxes': class_boxes.tolist(),
+        'class_images': class_images.tolist(),
+        'boxes_per_image': np.bincount(np.minimum(counts, MAX_BOXES_BIN), minlength=MAX_BOXES_BIN + 1).tolist(),
+        'box_area': np.histogram(widths * heights, bins=AREA_BINS)[0].tolist(),
+        'box_aspect': np.histogram(aspect[np.isfinite(aspect)], bins=ASPECT_BINS)[0].tolist(),
+        'box_area_mean': float((widths * heights).mean()) if len(classes) else 0.0,
+    }
+
+
+def compute_dataset_stats(yaml_file: str, workers: Optional[int] = None, refresh: bool = False) -> Dict:
+    """
+    Compute or load the cached statistics of every split referenced by a data.yaml.
+
+    Args:
+        yaml_file (str): Path to the model data.yaml.
+        workers (int, optional): Number of worker processes for reading changed label files.
+        refresh (bool, optional): Recompute even if the fingerprint matches the cached stats. Defaults to False.
+
+    Returns:
+        Dict: 'fingerprint', 'names', per-split stats under 'splits' and per-class totals and split
+        coverage under 'classes'.
+    """
+    root_dir = os.path.dirname(os.path.abspath(yaml_file))
+    names = get_yaml_data(yaml_file)
+    num_classes = len(names)
+    split_label_files = {split_name: [convert_imgpath_to_labelpath(image_path) for image_path in image_paths]
+                         for split_name, image_paths in resolve_split_images(yaml_file).items()}
+
+    fingerprint = dataset_fingerprint(split_label_files)
+    stats_path = os.path.join(root_dir, STATS_CACHE_DIR, STATS_FILE)
+    if not refresh and os.path.exists(stats_path):
+        with open(stats_path, 'r') as file:
+            cached = json.load(file)
+        if cached.get('fingerprint') == fingerprint:
+            return cached
+
+    splits = {split_name: split_stats(load_labels_cached(label_files, root_dir, split_name, workers), num_classes)
+              for split_name, label_files in split_label_files.items()}
+
+    classes = []
+    for cls in range(num_classes):
+        split_boxes = {split_name: stats['class_boxes'][cls] for split_name, stats in splits.items()}
+        split_images = {split_name: stats['class_images'][cls] for split_name, stats in splits.items()}
+        classes.append({
+            'name': names.get(cls, str(cls)),
+            'boxes': sum(split_boxes.values()),
+            'images': sum(split_images.values()),
+            'split_boxes': split_boxes,
+            'split_images': split_images,
+            'missing_from': [split_name for split_name, count in split_images.items() if count == 0],
+        })
+
+    stats = {'fingerprint': fingerprint, 'yaml': yaml_file, 'names': [names.get(cls, str(cls)) for cls in range(num_classes)],
+             'splits': splits, 'classes': classes}
+    os.makedirs(os.path.dirname(stats_path), exist_ok=True)
+    with open(stats_path + '.tmp', 'w') as file:
+        json.dump(stats, file)
+    os.replace(stats_path + '.tmp', stats_path)
+    return stats
+
+
+def plot_stats(stats: Dict, output_dir: str) -> List[str]:
+    """
+    Plot class counts per split, boxes per image and box area distributions as PNG files.
+    Needs matplotlib; without it nothing is plotted.
+
+    Returns:
+        List[str]: Paths of the written plots.
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed, skipping plots.")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+
+    fig, ax = plt.subplots(figsize=(max(10, len(stats['names']) * 0.15), 5))
+    bottom = np.zeros(len(stats['names']))
+    for split_name, split in stats['splits'].items():
+        ax.bar(range(len(stats['names'])), split['class_boxes'], bottom=bottom, label=split_name)
+        bottom += split['class_boxes']
+    ax.set_xticks(range(len(stats['names'])))
+    ax.set_xticklabels(stats['names'], rotation=90, fontsize=6)
+    ax.set_ylabel('boxes')
+    ax.legend()
+    paths.append(os.path.join(output_dir, 'class_boxes.png'))
+
+    fig2, (ax_boxes, ax_area) = plt.subplots(1, 2, figsize=(12, 4))
+    for split_name, split in stats['splits'].items():
+        ax_boxes.plot(range(MAX_BOXES_BIN + 1), split['boxes_per_image'], label=split_name)
+        ax_area.plot(np.sqrt(AREA_BINS[:-1] * AREA_BINS[1:]), split['box_area'], label=split_name)
+    ax_boxes.set_xlabel(f'boxes per image ({MAX_BOXES_BIN} = {MAX_BOXES_BIN}+)')
+    ax_boxes.set_ylabel('images')
+    ax_area.set_xscale('log')
+    ax_area.set_xlabel('box area (fraction of image)')
+    ax_area.set_ylabel('boxes')
+    ax_boxes.legend()
+    paths.append(os.path.join(output_dir, 'box_distributions.png'))
+
+    for figure, path in zip([fig, fig2], paths):
+        figure.tight_layout()
+        figure.savefig(path, dpi=120)
+        plt.close(figure)
+    return paths
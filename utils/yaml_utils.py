@@ -56,6 +56,67 @@ def create_label_mapping(old_classes: Dict[int, str], new_classes: Dict[int, str
     return label_mapping
 
 
+def merge_class_names(class_dicts: List[Dict[int, str]]) -> Dict[int, str]:
+    """
+    Merge the class names of several datasets into a single sorted, indexed dictionary.
+
+    Args:
+        class_dicts (List[Dict[int, str]]): Class name dictionaries loaded with get_yaml_data.
+
+    Returns:
+        Dict[int, str]: A dictionary where keys are the new indices and values are class names.
+    """
+    classes_list = sorted({name for class_dict in class_dicts for name in class_dict.values()})
+    return {i: cls for i, cls in enumerate(classes_list)}
+
+
+def write_model_yaml(classes_dict: Dict[int, str], output_dir: str, split_paths: Dict[str, str] = None) -> str:
+    """
+    Write the final model data.yaml with relative split paths and the merged class names.
+
+    Args:
+        classes_dict (Dict[int, str]): A dictionary where keys are indices and values are class names.
+        output_dir (str): The directory path where the YAML file will be saved.
+        split_paths (Dict[str, str], optional): Paths for the 'train', 'valid' and 'test' splits, such as
+            split list files. Defaults to the train/valid/test image directories.
+
+    Returns:
+        str: Path to the written YAML file.
+    """
+    output_file = os.path.join(output_dir, 'data.yaml')
+    split_paths = split_paths or {'train': '../train/images', 'valid': '../valid/images', 'test': '../test/images'}
+    data = {
+        'train': split_paths['train'],
+        'val': split_paths['valid'],
+        'test': split_paths['test'],
+        'nc': len(classes_dict),
+        'names': dict(classes_dict)
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(output_file, 'w') as yaml_file:
+        yaml.dump(data, yaml_file)
+
+    return output_file
+
+def update_yaml_split_paths(yaml_file: str, split_paths: Dict[str, str]) -> None:
+    """
+    Point the train/val/test entries of an existing data.yaml at new paths, keeping everything else.
+
+    Args:
+        yaml_file (str): Path to the data.yaml to update.
+        split_paths (Dict[str, str]): Paths for the 'train', 'valid' and 'test' splits.
+    """
+    with open(yaml_file, 'r') as file:
+        data = yaml.safe_load(file)
+
+    data['train'] = split_paths['train']
+    data['val'] = split_paths['valid']
+    data['test'] = split_paths['test']
+
+    with open(yaml_file, 'w') as file:
+        yaml.dump(data, file)
+
 
 def main():
       pass
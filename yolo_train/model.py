@@ -1,13 +1,30 @@
 from ultralytics import YOLO
 from dotenv import load_dotenv
 import os
+import sys
 import torch
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from yolo_train.weighted_trainer import WeightedDetectionTrainer
+
 # Load environment variables
 load_dotenv(dotenv_path='.env.yolo')
 data_yaml = os.getenv('YOLO_YAML')
 model_path = os.getenv('MODEL_PATH')
 finished_model_path = os.getenv('FINISHED_MODEL')
+imgsz = int(os.getenv('IMGSZ', 640))
+
+# Balance classes with a weighted sampler instead of oversampled image copies (set WEIGHTED_SAMPLING=0 to disable)
+trainer = WeightedDetectionTrainer if os.getenv('WEIGHTED_SAMPLING', '1') == '1' else None
+
+# Train on the pre-resized copy written by scripts/resize_cache.py, so images aren't decoded at full size
+# and resized again in every epoch. It lives at <model dir>/cache/<imgsz>/data.yaml.
+if os.getenv('USE_RESIZE_CACHE', '0') == '1':
+    cache_yaml = os.path.join(os.path.dirname(data_yaml), 'cache', str(imgsz), 'data.yaml')
+    if not os.path.exists(cache_yaml):
+        raise FileNotFoundError(f"Resize cache not found at: {cache_yaml}. Run scripts/resize_cache.py --imgsz {imgsz}")
+    data_yaml = cache_yaml
 
 def train_model():
     """
@@ -19,6 +36,8 @@ def train_model():
     # Start training
     results = model.train(
         data=data_yaml, 
+        imgsz=imgsz,
+        trainer=trainer,
         epochs=250, 
         patience=25
     )
@@ -36,7 +55,7 @@ def resume_training():
     
     # Try to resume training, handle optimizer state issues
     try:
-        results = model.train(resume=model_path, data=data_yaml, epochs=100, patience=25)
+        results = model.train(resume=model_path, data=data_yaml, imgsz=imgsz, trainer=trainer, epochs=100, patience=25)
     except KeyError as e:
         print(f"KeyError encountered: {e}. Removing optimizer state and trying again.")
         
@@ -53,7 +72,7 @@ def resume_training():
         
         # Retry training after removing optimizer state
         model = YOLO(model_path)
-        results = model.train(resume=model_path, data=data_yaml, epochs=100, patience=25)
+        results = model.train(resume=model_path, data=data_yaml, imgsz=imgsz, trainer=trainer, epochs=100, patience=25)
     
     # Save results or handle as needed
     print("Training resumed successfully.")
@@ -74,7 +93,7 @@ def continue_training(additional_epochs=50):
     
     # Continue training for the specified number of additional epochs
     print(f"Continuing training for {additional_epochs} more epochs...")
-    results = model.train(data=data_yaml, epochs=additional_epochs, patience=25)
+    results = model.train(data=data_yaml, imgsz=imgsz, trainer=trainer, epochs=additional_epochs, patience=25)
     
     # Save results or handle as needed
     print(f"Training continued for additional {additional_epochs} epochs successfully.")
@@ -0,0 +1,62 @@
+# Detection trainer that balances classes by sampling images with per-image weights instead of
+# training on duplicated image files. Pass it to model.train(trainer=WeightedDetectionTrainer).
+
+import os
+import sys
+
+import numpy as np
+import torch
+from torch.utils.data import WeightedRandomSampler
+from ultralytics.data.build import InfiniteDataLoader, seed_worker
+from ultralytics.models.yolo.detect import DetectionTrainer
+from ultralytics.utils import RANK
+from ultralytics.utils.torch_utils import torch_distributed_zero_first
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.sampling_utils import compute_image_weights, expected_class_exposure, WEIGHT_POWER, MAX_WEIGHT
+
+
+class WeightedDetectionTrainer(DetectionTrainer):
+    """
+    DetectionTrainer whose training dataloader draws images with replacement, weighted by the rarest
+    class each image holds. The weights come from the labels the dataset has already parsed, so
+    balancing reads no extra files. Validation and distributed training keep the default loaders.
+    """
+
+    def get_dataloader(self, dataset_path, batch_size=16, rank=0, mode='train'):
+        if mode != 'train' or rank != -1:
+            return super().get_dataloader(dataset_path, batch_size, rank, mode)
+
+        with torch_distributed_zero_first(rank):
+            dataset = self.build_dataset(dataset_path, mode, batch_size)
+
+        # Read when training starts, so values from .env.yolo loaded after this module was imported apply
+        weight_power = float(os.getenv('SAMPLE_WEIGHT_POWER', WEIGHT_POWER))
+        max_weight = float(os.getenv('SAMPLE_MAX_WEIGHT', MAX_WEIGHT))
+        num_classes = len(self.data['names'])
+        image_classes = [label['cls'].ravel().astype(np.int64) for label in dataset.labels]
+        weights = compute_image_weights(image_classes, num_classes, power=weight_power, max_weight=max_weight)
+
+        exposure = expected_class_exposure(image_classes, weights, num_classes)
+        uniform = expected_class_exposure(image_classes, np.ones(len(weights)), num_classes)
+        present = [cls for cls in range(num_classes) if uniform[cls] > 0]
+        rarest = min(present, key=lambda cls: uniform[cls]) if present else None
+        if rarest is not None:
+            print(f"Weighted sampling over {len(weights)} images: rarest class '{self.data['names'][rarest]}' "
+                  f"goes from {uniform[rarest]:.2%} to {exposure[rarest]:.2%} of draws.")
+
+        generator = torch.Generator()
+        generator.manual_seed(6148914691236517205 + RANK)
+        sampler = WeightedRandomSampler(torch.as_tensor(weights, dtype=torch.double), num_samples=len(weights),
+                                        replacement=True, generator=generator)
+        return InfiniteDataLoader(
+            dataset=dataset,
+            batch_size=min(batch_size, len(dataset)),
+            sampler=sampler,
+            num_workers=min(os.cpu_count() // max(torch.cuda.device_count(), 1), self.args.workers),
+            pin_memory=torch.cuda.is_available(),
+            collate_fn=getattr(dataset, 'collate_fn', None),
+            worker_init_fn=seed_worker,
+            generator=generator
+        )